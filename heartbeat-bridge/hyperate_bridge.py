@@ -3,8 +3,10 @@
 MORTEM v2 — HyperRate Heart Rate Bridge
 
 Connects to HyperRate's WebSocket API to read real-time heart rate from
-Christopher's Apple Watch, then POSTs each reading to the heartbeat receiver
-on localhost:8080.
+Christopher's Apple Watch, then forwards the readings to the heartbeat
+receiver on localhost:8080. Readings are timestamped on arrival and sent in
+batches to /bpm/batch every BATCH_SECONDS; set BATCH_SECONDS=0 to POST each
+reading individually to RECEIVER_URL instead.
 
 Usage:
   export HYPERATE_API_KEY="your-api-key"
@@ -25,6 +27,14 @@ from datetime import datetime, timezone
 HYPERATE_DEVICE_ID = os.environ.get("HYPERATE_DEVICE_ID", "8A1B")
 HYPERATE_API_KEY = os.environ.get("HYPERATE_API_KEY", "")
 RECEIVER_URL = os.environ.get("RECEIVER_URL", "http://localhost:8080/bpm")
+BATCH_URL = os.environ.get("BATCH_URL", RECEIVER_URL.rstrip("/") + "/batch")
+ENTITY = os.environ.get("ENTITY", "")  # subject id when the receiver serves several
+if ENTITY:
+    RECEIVER_URL += f"?entity={ENTITY}"
+    BATCH_URL += f"?entity={ENTITY}"
+BATCH_SECONDS = float(os.environ.get("BATCH_SECONDS", "5"))
+BATCH_MAX_PENDING = 3600  # readings kept for retry while the receiver is down
+SOURCE = "Christopher's Apple Watch (HyperRate)"
 WS_URL = f"wss://app.hyperate.io/socket/websocket?token={HYPERATE_API_KEY}"
 PHOENIX_HEARTBEAT_INTERVAL = 25  # seconds
 
@@ -33,7 +43,7 @@ def post_bpm(bpm: int):
     """POST BPM to the MORTEM heartbeat receiver."""
     data = json.dumps({
         "bpm": bpm,
-        "source": "Christopher's Apple Watch (HyperRate)",
+        "source": SOURCE,
         "watch_id": 1,
     }).encode()
     req = urllib.request.Request(
@@ -50,6 +60,60 @@ def post_bpm(bpm: int):
         return None
 
 
+class BatchPoster:
+    """Buffers readings and POSTs them to /bpm/batch on a fixed interval.
+
+    A failed POST keeps its readings for the next flush; the receiver drops
+    samples it has already seen, so resending is safe.
+    """
+
+    def __init__(self, url: str, interval: float):
+        self.url = url
+        self.interval = interval
+        self._pending: list[dict] = []
+        self._lock = threading.Lock()
+
+    def add(self, bpm: int):
+        with self._lock:
+            self._pending.append({"bpm": bpm, "timestamp": round(time.time(), 3)})
+            del self._pending[:-BATCH_MAX_PENDING]
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            batch = self._pending
+            self._pending = []
+        if not batch:
+            return None
+        data = json.dumps({"source": SOURCE, "watch_id": 1, "samples": batch}).encode()
+        req = urllib.request.Request(
+            self.url,
+            data=data,
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=10) as resp:
+                result = json.loads(resp.read())
+        except Exception as e:
+            print(f"  Batch POST failed ({len(batch)} readings kept): {e}")
+            with self._lock:
+                self._pending[:0] = batch
+                del self._pending[:-BATCH_MAX_PENDING]
+            return None
+        now = datetime.now().strftime("%H:%M:%S")
+        print(f"[{now}] batch: {result.get('accepted', 0)} accepted, "
+              f"{result.get('duplicates', 0)} duplicate, {result.get('rejected', 0)} rejected")
+        return result
+
+
 def main():
     if not HYPERATE_API_KEY:
         print("=" * 55)
@@ -77,12 +141,19 @@ def main():
     print("=" * 55)
     print("  MORTEM v2 — HyperRate Bridge")
     print(f"  Device: {HYPERATE_DEVICE_ID}")
-    print(f"  Receiver: {RECEIVER_URL}")
+    if BATCH_SECONDS > 0:
+        print(f"  Receiver: {BATCH_URL} (batched every {BATCH_SECONDS:g}s)")
+    else:
+        print(f"  Receiver: {RECEIVER_URL}")
     print("=" * 55)
     print()
 
     last_hr = 0
     beat_count = 0
+    batcher = None
+    if BATCH_SECONDS > 0:
+        batcher = BatchPoster(BATCH_URL, BATCH_SECONDS)
+        batcher.start()
 
     def on_message(ws, message):
         nonlocal last_hr, beat_count
@@ -96,9 +167,13 @@ def main():
                     last_hr = hr
                     beat_count += 1
                     now = datetime.now().strftime("%H:%M:%S")
-                    result = post_bpm(hr)
-                    status = "OK" if result and result.get("ok") else "FAIL"
-                    print(f"[{now}] BPM: {hr} | posted: {status} | #{beat_count}")
+                    if batcher:
+                        batcher.add(hr)
+                        print(f"[{now}] BPM: {hr} | queued | #{beat_count}")
+                    else:
+                        result = post_bpm(hr)
+                        status = "OK" if result and result.get("ok") else "FAIL"
+                        print(f"[{now}] BPM: {hr} | posted: {status} | #{beat_count}")
 
             elif event == "phx_reply":
                 status = data.get("payload", {}).get("status")
@@ -171,6 +246,8 @@ def main():
             ws.run_forever(ping_interval=30)
         except KeyboardInterrupt:
             print("\nShutting down bridge.")
+            if batcher:
+                batcher.flush()
             break
         except Exception as e:
             print(f"  Connection failed: {e}")
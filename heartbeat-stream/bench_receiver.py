@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+MORTEM v2 — BPM Receiver Load Benchmark
+
+Drives the receiver with N concurrent keep-alive connections, each POSTing
+{"bpm": ...} back-to-back, and reports requests/sec and latency percentiles.
+
+By default an in-process BPMReceiver is started on a free port with a
+minimal ingest route, so the numbers measure the HTTP layer itself. Point
+--url at a running heartbeat_stream.py to benchmark the full stack.
+
+With --batch N each request instead POSTs N synthetic samples (seeded
+generator from mortem_common.synthetic) to /bpm/batch, and samples/sec is
+reported as well.
+
+Run: python bench_receiver.py --connections 50 --seconds 10
+     python bench_receiver.py --batch 500 --url http://localhost:8080/bpm/batch
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # mortem_common
+
+from bpm_receiver import BPMReceiver, Request, Response, extract_bpm, json_response, parse_batch
+from mortem_common.synthetic import SyntheticHeartbeat
+
+
+def _start_local_receiver() -> BPMReceiver:
+    received = 0
+
+    async def ingest(request: Request) -> Response:
+        nonlocal received
+        bpm, _ = extract_bpm(request.json())
+        received += 1
+        return json_response({"ok": True, "bpm": bpm})
+
+    async def ingest_batch(request: Request) -> Response:
+        nonlocal received
+        accepted, rejected, _, _ = parse_batch(request.body, time.time())
+        received += len(accepted)
+        return json_response({"ok": True, "accepted": len(accepted), "rejected": len(rejected)})
+
+    receiver = BPMReceiver("127.0.0.1", 0)
+    receiver.route("POST", "/bpm/batch", ingest_batch)
+    receiver.route("POST", "*", ingest)
+    receiver.start()
+    return receiver
+
+
+def _batch_body(gen: SyntheticHeartbeat, size: int) -> tuple[bytes, int]:
+    b = gen.batch(size)
+    samples = [{"bpm": bpm, "timestamp": t} for bpm, t in zip(b.bpm.tolist(), b.epochs.tolist())]
+    return json.dumps({"source": "bench", "samples": samples}).encode(), len(samples)
+
+
+async def _client(host: str, port: int, path: str, deadline: float, latencies: list, errors: list,
+                  batch: int = 0, seed: int = 0, counts: list | None = None):
+    reader, writer = await asyncio.open_connection(host, port)
+    # A month of history at 1 Hz, so batch timestamps are never in the future
+    gen = SyntheticHeartbeat(seed=seed, start=time.time() - 30 * 86400) if batch else None
+    i = 0
+    try:
+        while time.perf_counter() < deadline:
+            if gen:
+                body, n = _batch_body(gen, batch)
+                counts.append(n)
+            else:
+                body = json.dumps({"bpm": 60 + i % 40, "source": "bench"}).encode()
+            req = (f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                   f"Content-Length: {len(body)}\r\n\r\n").encode() + body
+            t0 = time.perf_counter()
+            writer.write(req)
+            await writer.drain()
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - t0)
+            if not head.startswith(b"HTTP/1.1 200"):
+                errors.append(head.split(b"\r\n", 1)[0])
+            i += 1
+    except (ConnectionError, asyncio.IncompleteReadError) as e:
+        errors.append(str(e))
+    finally:
+        writer.close()
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+async def _run(host: str, port: int, path: str, connections: int, seconds: float,
+               batch: int = 0) -> dict:
+    latencies: list[float] = []
+    errors: list = []
+    counts: list[int] = []
+    deadline = time.perf_counter() + seconds
+    t0 = time.perf_counter()
+    await asyncio.gather(*(
+        _client(host, port, path, deadline, latencies, errors, batch, seed, counts)
+        for seed in range(connections)
+    ))
+    elapsed = time.perf_counter() - t0
+    latencies.sort()
+    extra = {}
+    if batch:
+        extra = {"samples": sum(counts), "samples_per_sec": round(sum(counts) / elapsed, 1)}
+    return {
+        "connections": connections,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "max_ms": round((latencies[-1] if latencies else 0) * 1000, 3),
+        **extra,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the MORTEM BPM receiver")
+    parser.add_argument("--url", help="Receiver URL (default: in-process receiver)")
+    parser.add_argument("--connections", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--batch", type=int, default=0,
+                        help="POST this many synthetic samples per request to /bpm/batch")
+    args = parser.parse_args()
+
+    receiver = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port, path = parts.hostname, parts.port or 80, parts.path or "/bpm"
+    else:
+        receiver = _start_local_receiver()
+        host, port, path = "127.0.0.1", receiver.port, "/bpm/batch" if args.batch else "/bpm"
+
+    try:
+        result = asyncio.run(_run(host, port, path, args.connections, args.seconds, args.batch))
+    finally:
+        if receiver:
+            receiver.shutdown()
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,552 @@
+"""
+MORTEM v2 — Live BPM Receiver
+
+Asyncio HTTP/1.1 server for Apple Watch readings (iOS Shortcuts, Health Auto
+Export, the HyperRate bridge). Replaces the single-threaded http.server
+receiver, which spoke HTTP/1.0, closed after every request and let one slow
+client block everyone else.
+
+  - persistent connections (HTTP/1.1 keep-alive, opt-in for HTTP/1.0)
+  - any number of concurrent connections on one event loop
+  - header and body size limits (431 / 413)
+  - read timeouts against slow clients, bounded handler time (503)
+  - streaming routes that consume large bodies chunk by chunk
+  - long-lived streamed responses (server-sent events, WebSocket push)
+
+The server runs its event loop on a daemon thread so the synchronous
+heartbeat loop can keep calling get_bpm() as before. Routes are registered
+by the owner (HealthKitSource) with route(); unmatched requests fall through
+to the method's "*" route.
+"""
+
+import asyncio
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+from urllib.parse import urlsplit, parse_qs
+
+from replay_store import format_timestamp, parse_timestamp
+
+log = logging.getLogger("heartbeat")
+
+HAE_SOURCE = "Christopher's Apple Watch (Health Auto Export)"
+DEFAULT_SOURCE = "Christopher's Apple Watch"
+
+MAX_BPM = 300           # batch samples above this are rejected as sensor noise
+MAX_FUTURE_SKEW = 300   # seconds a batch sample may be ahead of the receiver clock
+
+REASONS = {
+    101: "Switching Protocols", 200: "OK", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout", 413: "Payload Too Large",
+    431: "Request Header Fields Too Large", 500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+# ---------------------------------------------------------------------------
+# Payload formats
+# ---------------------------------------------------------------------------
+
+def sample_bpm(sample: dict) -> int:
+    """BPM of one Health Auto Export sample (Avg, then qty, then Max)."""
+    return int(sample.get("Avg", sample.get("qty", sample.get("Max", 0))))
+
+
+def extract_bpm(data: dict) -> tuple[int, str]:
+    """Extract BPM from various payload formats.
+
+    Supports:
+      1. Health Auto Export format:
+         {"name":"Heart Rate","units":"bpm","data":[{"date":"...","Avg":72,"Min":60,"Max":95}]}
+      2. Simple format: {"bpm": 72} or {"value": 72}
+      3. Health Auto Export metrics array:
+         {"data":{"metrics":[{"name":"Heart Rate","data":[{"Avg":72}]}]}}
+
+    Returns (bpm, source_label).
+    """
+    # --- Health Auto Export: top-level metric object ---
+    if data.get("name") == "Heart Rate" and "data" in data:
+        samples = data["data"]
+        if samples and isinstance(samples, list):
+            return sample_bpm(samples[-1]), HAE_SOURCE  # most recent sample
+
+    # --- Health Auto Export: wrapped metrics array ---
+    metrics = None
+    if isinstance(data.get("data"), dict):
+        metrics = data["data"].get("metrics", [])
+    elif isinstance(data.get("metrics"), list):
+        metrics = data["metrics"]
+    if metrics:
+        for m in metrics:
+            if m.get("name") == "Heart Rate" and m.get("data"):
+                return sample_bpm(m["data"][-1]), HAE_SOURCE
+
+    # --- Simple format: {"bpm": 72} or {"value": 72} ---
+    bpm = int(data.get("bpm", data.get("value", 0)))
+    source = data.get("source", DEFAULT_SOURCE)
+    return bpm, source
+
+
+def _sample_time(sample: dict, default: float) -> tuple[float, int, str | None]:
+    """(epoch, utc_offset, date) from a sample's "date"; (default, 0, None) if absent."""
+    date = sample.get("date")
+    try:
+        return (*parse_timestamp(date), date)
+    except (TypeError, ValueError):
+        return default, 0, None
+
+
+def _hae_samples(data: dict) -> list | None:
+    """The Heart Rate sample list from either Health Auto Export shape."""
+    if data.get("name") == "Heart Rate" and isinstance(data.get("data"), list):
+        return data["data"]
+    metrics = None
+    if isinstance(data.get("data"), dict):
+        metrics = data["data"].get("metrics", [])
+    elif isinstance(data.get("metrics"), list):
+        metrics = data["metrics"]
+    for m in metrics or ():
+        if m.get("name") == "Heart Rate" and m.get("data"):
+            return m["data"]
+    return None
+
+
+def extract_samples(data: dict, received_at: float) -> tuple[list[tuple], str]:
+    """Extract every sample from a payload, not just the most recent.
+
+    Same formats as extract_bpm(); the simple format may also carry a "date".
+    Returns ([(bpm, sample_epoch, utc_offset_minutes, date), ...], source)
+    with non-positive readings dropped. Samples without a parseable "date"
+    are stamped with `received_at` and have date None.
+    """
+    samples = _hae_samples(data)
+    if samples:
+        out = []
+        for sample in samples:
+            try:
+                bpm = sample_bpm(sample)
+            except (TypeError, ValueError):
+                continue
+            if bpm > 0:
+                out.append((bpm, *_sample_time(sample, received_at)))
+        return out, HAE_SOURCE
+
+    bpm, source = extract_bpm(data)
+    return ([(bpm, *_sample_time(data, received_at))] if bpm > 0 else []), source
+
+
+def _batch_sample(sample, received_at: float) -> tuple:
+    """Validate one batch sample -> (bpm, epoch, utc_offset, date). Raises ValueError."""
+    if not isinstance(sample, dict):
+        raise ValueError("sample must be an object")
+    bpm = sample.get("bpm", sample.get("value"))
+    if bpm is None:
+        bpm = sample_bpm(sample)
+    if isinstance(bpm, bool) or not isinstance(bpm, (int, float)):
+        raise ValueError("bpm must be a number")
+    bpm = round(bpm)
+    if not 0 < bpm <= MAX_BPM:
+        raise ValueError(f"bpm {bpm} out of range")
+    if "date" in sample:
+        epoch, offset = parse_timestamp(sample["date"])
+        date = sample["date"]
+    elif "timestamp" in sample:
+        epoch = sample["timestamp"]
+        if isinstance(epoch, bool) or not isinstance(epoch, (int, float)):
+            raise ValueError("timestamp must be epoch seconds")
+        epoch, offset = float(epoch), 0
+        date = format_timestamp(epoch, 0)
+    else:
+        raise ValueError("missing date or timestamp")
+    if epoch > received_at + MAX_FUTURE_SKEW:
+        raise ValueError("timestamp is in the future")
+    return bpm, epoch, offset, date
+
+
+def parse_batch(body: bytes, received_at: float, ndjson: bool = False) -> tuple[list, list, str, int]:
+    """Validate a batch of timestamped samples in one pass.
+
+    The body is a JSON array of samples, an object {"source": ..., "watch_id":
+    ..., "samples": [...]}, or NDJSON with one sample per line. Each sample
+    needs a BPM ("bpm", "value" or Health Auto Export "Avg") and a time, as
+    "date" (Health Auto Export or ISO 8601) or "timestamp" (epoch seconds).
+
+    Returns (accepted, rejected, source, watch_id): accepted holds
+    (bpm, sample_epoch, utc_offset_minutes, date) tuples sorted by time,
+    rejected holds {"index", "error"} for each invalid sample. Raises
+    ValueError if the body isn't a batch at all.
+    """
+    source, watch_id = DEFAULT_SOURCE, 1
+    if ndjson:
+        samples = None
+    else:
+        try:
+            data = json.loads(body)
+        except json.JSONDecodeError as e:
+            if e.msg != "Extra data":
+                raise ValueError(f"Invalid JSON: {e}") from None
+            samples = None  # several top-level values: NDJSON without the header
+        else:
+            if isinstance(data, dict) and isinstance(data.get("samples"), list):
+                source = str(data.get("source", source))
+                watch_id = int(data.get("watch_id", watch_id))
+                samples = data["samples"]
+            elif isinstance(data, list):
+                samples = data
+            else:
+                raise ValueError("Expected an array of samples or {\"samples\": [...]}")
+
+    accepted, rejected = [], []
+    if samples is None:
+        lines = [line for line in body.splitlines() if line.strip()]
+        for i, line in enumerate(lines):
+            try:
+                accepted.append(_batch_sample(json.loads(line), received_at))
+            except (TypeError, ValueError) as e:  # JSONDecodeError is a ValueError
+                rejected.append({"index": i, "error": str(e)})
+    else:
+        for i, sample in enumerate(samples):
+            try:
+                accepted.append(_batch_sample(sample, received_at))
+            except (TypeError, ValueError) as e:
+                rejected.append({"index": i, "error": str(e)})
+    accepted.sort(key=lambda s: s[1])
+    return accepted, rejected, source, watch_id
+
+
+# ---------------------------------------------------------------------------
+# Request / Response
+# ---------------------------------------------------------------------------
+
+@dataclass
+class Request:
+    method: str
+    target: str
+    version: str
+    headers: dict[str, str]
+    body: bytes = b""
+    stream: object = None        # async chunk iterator, streaming routes only
+    body_consumed: bool = False
+    peer: str = ""
+    path: str = field(init=False)
+    query: dict[str, list[str]] = field(init=False)
+
+    def __post_init__(self):
+        parts = urlsplit(self.target)
+        self.path = parts.path or "/"
+        self.query = parse_qs(parts.query)
+
+    def json(self):
+        return json.loads(self.body) if self.body else {}
+
+    @property
+    def keep_alive(self) -> bool:
+        conn = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return conn == "keep-alive"
+        return conn != "close"
+
+
+@dataclass
+class Response:
+    status: int = 200
+    body: bytes = b""
+    content_type: str = "application/json"
+    headers: dict[str, str] = field(default_factory=dict)
+    stream: object = None  # async iterator of body chunks for long-lived responses
+
+
+def json_response(obj, status: int = 200) -> Response:
+    return Response(status, json.dumps(obj).encode())
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str = ""):
+        super().__init__(message or REASONS.get(status, "Error"))
+        self.status = status
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class BPMReceiver:
+    """Asyncio HTTP/1.1 receiver running on a background thread."""
+
+    MAX_HEADER_BYTES = 16 * 1024
+    MAX_BODY_BYTES = 1 * 1024 * 1024
+    READ_TIMEOUT = 15.0        # seconds to receive a full request once started
+    KEEPALIVE_TIMEOUT = 75.0   # idle seconds before a persistent connection is closed
+    HANDLER_TIMEOUT = 5.0      # seconds a route handler may run
+    MAX_STREAM_BYTES = 256 * 1024 * 1024
+    STREAM_TIMEOUT = 300.0     # seconds a streaming handler may run
+    STREAM_CHUNK = 64 * 1024
+
+    def __init__(self, host: str = "0.0.0.0", port: int = 8080,
+                 max_body_bytes: int | None = None, handler_timeout: float | None = None,
+                 max_stream_bytes: int | None = None):
+        self.host = host
+        self.port = port
+        if max_body_bytes is not None:
+            self.MAX_BODY_BYTES = max_body_bytes
+        if max_stream_bytes is not None:
+            self.MAX_STREAM_BYTES = max_stream_bytes
+        if handler_timeout is not None:
+            self.HANDLER_TIMEOUT = handler_timeout
+        self._routes: dict[tuple[str, str], callable] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._server: asyncio.base_events.Server | None = None
+        self._thread: threading.Thread | None = None
+        self._ready = threading.Event()
+        self._startup_error: BaseException | None = None
+        self.connections = 0
+        self.requests = 0
+
+    def route(self, method: str, path: str, handler, streaming: bool = False):
+        """Register an async handler(request) -> Response. path "*" = fallback.
+
+        Streaming handlers receive the request before its body is read and
+        consume `request.stream` (an async iterator of byte chunks) themselves;
+        they may take up to STREAM_TIMEOUT and accept up to MAX_STREAM_BYTES.
+        """
+        self._routes[(method.upper(), path)] = (handler, streaming)
+
+    # --- Lifecycle ------------------------------------------------------
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="bpm-receiver", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._startup_error:
+            raise self._startup_error
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._server = self._loop.run_until_complete(asyncio.start_server(
+                self._handle_connection, self.host, self.port,
+                limit=self.MAX_HEADER_BYTES, reuse_address=True,
+            ))
+            # Report the bound port (port=0 picks a free one, e.g. in benchmarks)
+            self.port = self._server.sockets[0].getsockname()[1]
+        except BaseException as e:
+            self._startup_error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            # Drop idle keep-alive connections so the loop can close cleanly
+            pending = asyncio.all_tasks(self._loop)
+            for task in pending:
+                task.cancel()
+            self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            self._loop.run_until_complete(self._server.wait_closed())
+            self._loop.close()
+
+    def shutdown(self):
+        if self._loop and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def call_soon(self, callback, *args):
+        """Schedule `callback` on the receiver loop from any thread."""
+        if self._loop and self._loop.is_running():
+            self._loop.call_soon_threadsafe(callback, *args)
+
+    # --- Connection handling --------------------------------------------
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        peer = writer.get_extra_info("peername")
+        peer = f"{peer[0]}:{peer[1]}" if peer else "?"
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                    if request is None:
+                        return  # client closed or idle timeout
+                    self.requests += 1
+                    request.peer = peer
+                    response = await self._dispatch(request, reader)
+                except HTTPError as e:
+                    await self._write(writer, json_response({"ok": False, "error": str(e)}, e.status), False)
+                    return
+                if response.stream is not None:
+                    # Long-lived response (event stream) — owns the connection until done
+                    await self._write_stream(writer, response, request.version)
+                    return
+                keep_alive = (request.keep_alive and request.body_consumed
+                              and response.headers.get("Connection") != "close")
+                await self._write(writer, response, keep_alive, request.version)
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            pass  # receiver shutting down
+        finally:
+            self.connections -= 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError, asyncio.CancelledError):
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Request | None:
+        """Read the request line and headers; the body is left on the stream."""
+        # Idle wait for the first byte of the next request
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.KEEPALIVE_TIMEOUT)
+        except asyncio.TimeoutError:
+            return None
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError:
+            raise HTTPError(431)
+
+        try:
+            lines = head.decode("latin-1").split("\r\n")
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if not line:
+                continue
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        return Request(method.upper(), target, version, headers)
+
+    async def _iter_body(self, reader: asyncio.StreamReader, request: Request, limit: int):
+        """Yield body chunks as they arrive, each read bounded by READ_TIMEOUT."""
+        headers = request.headers
+        total = 0
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size_field = (await self._read_line(reader)).split(b";", 1)[0].strip()
+                if not size_field or size_field.strip(b"0123456789abcdefABCDEF"):
+                    raise HTTPError(400, "bad chunk size")
+                size = int(size_field, 16)
+                if size == 0:
+                    # Skip any trailer fields, up to the empty line ending the body
+                    while await self._read_line(reader) != b"\r\n":
+                        pass
+                    break
+                total += size
+                if total > limit:
+                    raise HTTPError(413)
+                while size:
+                    chunk = await asyncio.wait_for(reader.read(min(size, self.STREAM_CHUNK)), self.READ_TIMEOUT)
+                    if not chunk:
+                        raise asyncio.IncompleteReadError(b"", size)
+                    size -= len(chunk)
+                    yield chunk
+                if await asyncio.wait_for(reader.readexactly(2), self.READ_TIMEOUT) != b"\r\n":
+                    raise HTTPError(400, "bad chunk terminator")
+        else:
+            try:
+                length = int(headers.get("content-length", 0))
+            except ValueError:
+                raise HTTPError(400, "bad content-length")
+            if length > limit:
+                raise HTTPError(413)
+            while length:
+                chunk = await asyncio.wait_for(reader.read(min(length, self.STREAM_CHUNK)), self.READ_TIMEOUT)
+                if not chunk:
+                    raise asyncio.IncompleteReadError(b"", length)
+                length -= len(chunk)
+                yield chunk
+        request.body_consumed = True
+
+    async def _read_line(self, reader: asyncio.StreamReader) -> bytes:
+        """One CRLF-terminated line of chunked framing, bounded by READ_TIMEOUT."""
+        try:
+            return await asyncio.wait_for(reader.readuntil(b"\r\n"), self.READ_TIMEOUT)
+        except asyncio.LimitOverrunError:
+            raise HTTPError(400, "chunk line too long")
+
+    async def _read_body(self, reader: asyncio.StreamReader, request: Request) -> bytes:
+        chunks = []
+        async for chunk in self._iter_body(reader, request, self.MAX_BODY_BYTES):
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    async def _dispatch(self, request: Request, reader: asyncio.StreamReader) -> Response:
+        route = (self._routes.get((request.method, request.path))
+                 or self._routes.get((request.method, "*")))
+        if route is None:
+            await self._drain_body(reader, request)
+            return json_response({"ok": False, "error": "method not allowed"}, 405)
+        handler, streaming = route
+
+        if streaming:
+            # Handler pulls the body itself via request.stream
+            request.stream = self._iter_body(reader, request, self.MAX_STREAM_BYTES)
+            timeout = self.STREAM_TIMEOUT
+        else:
+            try:
+                request.body = await asyncio.wait_for(self._read_body(reader, request), self.READ_TIMEOUT)
+            except asyncio.TimeoutError:
+                raise HTTPError(408)
+            timeout = self.HANDLER_TIMEOUT
+
+        try:
+            return await asyncio.wait_for(handler(request), timeout)
+        except asyncio.TimeoutError:
+            log.error(f"[LIVE] Handler timeout: {request.method} {request.path}")
+            return json_response({"ok": False, "error": "handler timeout"}, 503)
+        except HTTPError as e:
+            return json_response({"ok": False, "error": str(e)}, e.status)
+        except Exception as e:
+            log.error(f"[LIVE] Handler error: {e}")
+            return json_response({"ok": False, "error": str(e)}, 500)
+
+    async def _drain_body(self, reader: asyncio.StreamReader, request: Request):
+        try:
+            async for _ in self._iter_body(reader, request, self.MAX_BODY_BYTES):
+                pass
+        except (HTTPError, asyncio.TimeoutError):
+            pass  # body_consumed stays False; the connection is closed
+
+    async def _write(self, writer: asyncio.StreamWriter, response: Response,
+                     keep_alive: bool, version: str = "HTTP/1.1"):
+        reason = REASONS.get(response.status, "OK")
+        head = [
+            f"{version if version == 'HTTP/1.0' else 'HTTP/1.1'} {response.status} {reason}",
+            f"Content-Type: {response.content_type}",
+            f"Content-Length: {len(response.body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        head.extend(f"{k}: {v}" for k, v in response.headers.items() if k != "Connection")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + response.body)
+        await writer.drain()
+
+    async def _write_stream(self, writer: asyncio.StreamWriter, response: Response, version: str):
+        """Write headers, then each chunk from response.stream until it ends.
+
+        Every drain is bounded by READ_TIMEOUT, so a client that stops reading
+        is disconnected rather than holding the stream open forever.
+        """
+        reason = REASONS.get(response.status, "OK")
+        head = [f"{version if version == 'HTTP/1.0' else 'HTTP/1.1'} {response.status} {reason}"]
+        if response.status != 101:
+            head += [f"Content-Type: {response.content_type}", "Connection: close"]
+        head.extend(f"{k}: {v}" for k, v in response.headers.items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+        stream = response.stream
+        try:
+            await asyncio.wait_for(writer.drain(), self.READ_TIMEOUT)
+            async for chunk in stream:
+                writer.write(chunk)
+                await asyncio.wait_for(writer.drain(), self.READ_TIMEOUT)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            await stream.aclose()
@@ -0,0 +1,87 @@
+"""
+MORTEM v2 — Stream Checkpoints
+
+The state a restart must not lose (beat counters, last signature, art
+count, recent BPM and each subject's death-protocol timing) saved as one
+compact JSON file.
+
+Every save writes a temp file and renames it over the checkpoint, so a
+crash leaves the previous or the new checkpoint, never a torn one. Disk
+flushes are bounded: the file (and its directory entry) is fsync'd at most
+once every fsync_interval seconds, or when a save is forced. Saving after
+every beat therefore costs a write and a rename. A process crash loses
+nothing, because the page cache survives it. A power loss can lose at
+most the saves since the last sync.
+
+Loading is a single small read and parse, so a restart resumes in well
+under a millisecond instead of rebuilding counters from the chain.
+"""
+
+import json
+import math
+import os
+import time
+from pathlib import Path
+
+VERSION = 1
+
+
+class Checkpointer:
+    """Atomic save/load of one JSON checkpoint with bounded fsync."""
+
+    def __init__(self, path: Path, fsync_interval: float = 10.0, clock=time.monotonic):
+        self.path = Path(path)
+        self.fsync_interval = fsync_interval
+        self.clock = clock
+        self._tmp = self.path.with_name(self.path.name + ".tmp")
+        self._last_sync = -math.inf
+        self.saves = 0
+        self.syncs = 0
+
+    def load(self) -> dict | None:
+        """The saved state, or None if there is no checkpoint.
+
+        Raises ValueError for an unreadable or incompatible checkpoint.
+        """
+        try:
+            raw = self.path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            data = json.loads(raw)
+        except ValueError as e:
+            raise ValueError(f"corrupt checkpoint {self.path}: {e}") from None
+        if not isinstance(data, dict) or data.get("version") != VERSION:
+            raise ValueError(f"unsupported checkpoint version in {self.path}")
+        return data["state"]
+
+    def save(self, state: dict, force: bool = False):
+        """Atomically replace the checkpoint; fsync if forced or the last sync is old enough."""
+        data = json.dumps({"version": VERSION, "state": state},
+                          separators=(",", ":")).encode("utf-8")
+        now = self.clock()
+        sync = force or now - self._last_sync >= self.fsync_interval
+        with open(self._tmp, "wb") as f:
+            f.write(data)
+            if sync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(self._tmp, self.path)
+        self.saves += 1
+        if sync:
+            self._sync_dir()
+            self._last_sync = now
+            self.syncs += 1
+
+    def _sync_dir(self):
+        """Make the rename itself durable (POSIX; a no-op where directories can't be opened)."""
+        try:
+            fd = os.open(self.path.parent, os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
@@ -0,0 +1,80 @@
+"""
+MORTEM v2 — Deadline Scheduler
+
+Per-entity timers for the heartbeat loop: emission deadlines, arrival holds
+and the grace/death transitions of each monitored subject.
+
+Each key has at most one armed deadline. Timers live in a binary min-heap;
+re-arming or cancelling a key just replaces its entry in a dict, and the
+superseded heap entry is discarded when it reaches the top (or in a
+periodic compaction). Arming, cancelling and popping a due timer are
+O(log n), and finding the next wake-up is O(1) amortized, so thousands of
+subjects cost nothing per loop pass until one of them is actually due.
+"""
+
+import heapq
+import math
+from itertools import count
+
+
+class DeadlineScheduler:
+    """One pending (deadline, kind) per key, ordered by deadline."""
+
+    def __init__(self):
+        self._heap: list[tuple[float, int, object, str]] = []  # (when, token, key, kind)
+        self._armed: dict = {}  # key -> (token, when, kind) of the live entry
+        self._tokens = count()
+
+    def __len__(self) -> int:
+        return len(self._armed)
+
+    def __contains__(self, key) -> bool:
+        return key in self._armed
+
+    def schedule(self, key, when: float, kind: str = "due"):
+        """Arm `key` to fire at `when`, replacing any deadline it already has."""
+        token = next(self._tokens)
+        self._armed[key] = (token, when, kind)
+        heapq.heappush(self._heap, (when, token, key, kind))
+        if len(self._heap) > 2 * len(self._armed) + 64:
+            self._compact()
+
+    def cancel(self, key):
+        self._armed.pop(key, None)
+
+    def kind(self, key) -> str | None:
+        """Kind of `key`'s armed deadline, or None if it has none."""
+        entry = self._armed.get(key)
+        return entry[2] if entry else None
+
+    def when(self, key) -> float:
+        entry = self._armed.get(key)
+        return entry[1] if entry else math.inf
+
+    def next_deadline(self) -> float:
+        """Earliest armed deadline (inf if nothing is armed)."""
+        heap, armed = self._heap, self._armed
+        while heap:
+            when, token, key, _ = heap[0]
+            entry = armed.get(key)
+            if entry is not None and entry[0] == token:
+                return when
+            heapq.heappop(heap)  # superseded or cancelled
+        return math.inf
+
+    def pop_due(self, now: float) -> list[tuple[object, str]]:
+        """Disarm and return (key, kind) for every deadline at or before `now`, earliest first."""
+        heap, armed = self._heap, self._armed
+        due = []
+        while heap and heap[0][0] <= now:
+            _, token, key, kind = heapq.heappop(heap)
+            entry = armed.get(key)
+            if entry is not None and entry[0] == token:
+                del armed[key]
+                due.append((key, kind))
+        return due
+
+    def _compact(self):
+        """Drop superseded entries once they outnumber the live ones."""
+        self._heap = [(when, token, key, kind) for key, (token, when, kind) in self._armed.items()]
+        heapq.heapify(self._heap)
@@ -0,0 +1,86 @@
+"""
+MORTEM v2 — Receiver Idempotency
+
+Health Auto Export retries any POST that doesn't get a 200, and the
+HyperRate bridge can re-send across websocket reconnects. Without this layer
+every retry counts as a new reading.
+
+Two O(1) checks run before samples reach the ring:
+  - dated samples are keyed by (source, sample time) in a bounded LRU set,
+    so a resent backlog only contributes the samples we haven't seen;
+  - undated payloads (plain {"bpm": 72}) are keyed by body digest and
+    remembered for a short window, long enough to absorb immediate retries
+    without swallowing a genuine repeat of the same BPM later on.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+class Deduplicator:
+    """Bounded duplicate filter for receiver payloads and samples."""
+
+    def __init__(self, max_keys: int = 65536, payload_window: float = 2.0):
+        self.max_keys = max_keys
+        self.payload_window = payload_window
+        self._samples: OrderedDict = OrderedDict()   # (source, epoch) -> None, LRU order
+        self._payloads: OrderedDict = OrderedDict()  # digest -> expiry, insertion = time order
+        self._lock = threading.Lock()
+        self.unique_samples = 0
+        self.duplicate_samples = 0
+        self.duplicate_payloads = 0
+
+    @staticmethod
+    def digest(body: bytes) -> bytes:
+        return hashlib.blake2b(body, digest_size=16).digest()
+
+    def seen_payload(self, digest: bytes, now: float) -> bool:
+        """True if the same undated payload arrived within payload_window."""
+        with self._lock:
+            payloads = self._payloads
+            while payloads:
+                key, expiry = next(iter(payloads.items()))
+                if expiry > now:
+                    break
+                payloads.popitem(last=False)
+            if digest in payloads:
+                self.duplicate_payloads += 1
+                return True
+            payloads[digest] = now + self.payload_window
+            if len(payloads) > self.max_keys:
+                payloads.popitem(last=False)
+            return False
+
+    def filter_samples(self, source: str, samples: list) -> list:
+        """Drop dated samples already seen for `source`; undated ones pass.
+
+        Samples are (bpm, sample_epoch, utc_offset, date) tuples, with date
+        None when the producer didn't supply one.
+        """
+        fresh = []
+        with self._lock:
+            seen = self._samples
+            for sample in samples:
+                if sample[3] is None:
+                    fresh.append(sample)
+                    continue
+                key = (source, sample[1])
+                if key in seen:
+                    seen.move_to_end(key)
+                    self.duplicate_samples += 1
+                    continue
+                seen[key] = None
+                if len(seen) > self.max_keys:
+                    seen.popitem(last=False)
+                self.unique_samples += 1
+                fresh.append(sample)
+        return fresh
+
+    def stats(self) -> dict:
+        return {
+            "unique_dated_samples": self.unique_samples,
+            "duplicate_samples": self.duplicate_samples,
+            "duplicate_payloads": self.duplicate_payloads,
+            "tracked_keys": len(self._samples),
+        }
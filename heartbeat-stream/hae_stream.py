@@ -0,0 +1,254 @@
+"""
+MORTEM v2 — Streaming Health Auto Export Ingest
+
+After an offline stretch Health Auto Export POSTs its whole backlog at once,
+often several megabytes. Rather than buffering the body and json.loads-ing
+it, the receiver feeds the socket's bytes through HAEStreamParser, which
+walks the document structurally and decodes only one sample object at a
+time from the `metrics[].data[]` arrays. Samples then pass through a
+SortedSpool so they enter the pipeline in timestamp order, spilling sorted
+runs to temporary files once a run fills, so memory stays bounded however
+large the backlog.
+"""
+
+import codecs
+import heapq
+import json
+import struct
+import tempfile
+
+from bpm_receiver import sample_bpm
+from replay_store import parse_timestamp
+
+_WS = " \t\r\n"
+_SAMPLE_KEYS = ("Avg", "Min", "Max")
+
+
+class _NeedMore(Exception):
+    """The buffer ends mid-token; wait for the next chunk."""
+
+
+class HAEStreamParser:
+    """Incremental parser for Health Auto Export heart-rate payloads.
+
+    feed() raw body bytes as they arrive; each call returns the samples
+    completed so far as (bpm, sample_epoch, utc_offset_minutes, date) tuples.
+    Containers are tracked on a small stack and never materialized; only
+    individual sample objects and scalars are decoded, so memory is bounded
+    by the largest single sample rather than the body.
+
+    Metrics are matched by their "name" when it precedes "data" (as Health
+    Auto Export emits it). If "data" comes first, samples are accepted only
+    when they have the heart-rate Avg/Min/Max shape.
+    """
+
+    def __init__(self, received_at: float, metric: str = "Heart Rate"):
+        self.received_at = received_at
+        self.metric = metric
+        self.samples_seen = 0
+        self.samples_rejected = 0
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self._done = False
+        # Frames: [kind, expect, key, name, is_sample_array]
+        self._stack: list[list] = []
+
+    def feed(self, data: bytes) -> list[tuple]:
+        self._buf = self._buf[self._pos:] + self._utf8.decode(data)
+        self._pos = 0
+        return self._run()
+
+    def close(self) -> list[tuple]:
+        self._buf = self._buf[self._pos:] + self._utf8.decode(b"", final=True)
+        self._pos = 0
+        self._eof = True
+        out = self._run()
+        if self._stack or not self._done:
+            raise ValueError("Truncated JSON payload")
+        return out
+
+    # --- Scanner --------------------------------------------------------
+
+    def _decode(self):
+        """Decode one complete scalar or sample object at the cursor."""
+        try:
+            value, end = self._decoder.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if self._eof:
+                raise
+            raise _NeedMore()
+        if end == len(self._buf) and not self._eof and not isinstance(value, (str, dict)):
+            # A number at the buffer edge may continue in the next chunk
+            raise _NeedMore()
+        self._pos = end
+        return value
+
+    def _run(self) -> list[tuple]:
+        out = []
+        buf = self._buf
+        try:
+            while True:
+                while self._pos < len(buf) and buf[self._pos] in _WS:
+                    self._pos += 1
+                if self._pos >= len(buf):
+                    break
+                ch = buf[self._pos]
+
+                if not self._stack:
+                    if self._done:
+                        raise ValueError("Trailing data after JSON payload")
+                    self._value(ch, None, out)
+                    continue
+
+                frame = self._stack[-1]
+                kind, expect = frame[0], frame[1]
+
+                if expect == "sep":
+                    if ch == ",":
+                        self._pos += 1
+                        frame[1] = "key" if kind == "{" else "value"
+                    elif (ch == "}" and kind == "{") or (ch == "]" and kind == "["):
+                        self._pos += 1
+                        self._pop()
+                    else:
+                        raise ValueError(f"Unexpected {ch!r} in payload")
+                elif kind == "{" and expect == "key":
+                    if ch == "}":
+                        self._pos += 1
+                        self._pop()
+                        continue
+                    frame[2] = self._decode()
+                    frame[1] = "colon"
+                elif expect == "colon":
+                    if ch != ":":
+                        raise ValueError(f"Expected ':' in payload, got {ch!r}")
+                    self._pos += 1
+                    frame[1] = "value"
+                else:  # expecting a value (object member or array element)
+                    if kind == "[" and ch == "]":
+                        self._pos += 1
+                        self._pop()
+                        continue
+                    frame[1] = "sep"
+                    try:
+                        self._value(ch, frame, out)
+                    except _NeedMore:
+                        frame[1] = "value"
+                        raise
+        except _NeedMore:
+            pass
+        return out
+
+    def _value(self, ch: str, parent: list | None, out: list):
+        if parent is not None and parent[4] and ch == "{":
+            # Element of a samples array — decode the whole (small) object
+            sample = self._decode()
+            self._sample(sample, parent[3], out)
+            return
+        if ch == "{":
+            self._pos += 1
+            self._stack.append(["{", "key", None, None, False])
+        elif ch == "[":
+            self._pos += 1
+            is_samples = parent is not None and parent[0] == "{" and parent[2] == "data"
+            self._stack.append(["[", "value", None, parent[3] if is_samples else None, is_samples])
+        else:
+            value = self._decode()
+            if parent is not None and parent[0] == "{" and parent[2] == "name" and isinstance(value, str):
+                parent[3] = value
+            if not self._stack:
+                self._done = True
+
+    def _pop(self):
+        self._stack.pop()
+        if not self._stack:
+            self._done = True
+
+    def _sample(self, sample: dict, metric: str | None, out: list):
+        self.samples_seen += 1
+        if metric is not None and metric != self.metric:
+            return
+        if metric is None and not any(k in sample for k in _SAMPLE_KEYS):
+            return
+        try:
+            bpm = sample_bpm(sample)
+        except (TypeError, ValueError):
+            bpm = 0
+        if bpm <= 0:
+            self.samples_rejected += 1
+            return
+        date = sample.get("date")
+        try:
+            epoch, offset = parse_timestamp(date)
+        except (TypeError, ValueError):
+            epoch, offset, date = self.received_at, 0, None
+        out.append((bpm, epoch, offset, date))
+
+
+# ---------------------------------------------------------------------------
+# Ordered spool
+# ---------------------------------------------------------------------------
+
+_SPOOL_REC = struct.Struct("<dHhH")  # epoch, bpm, utc offset, date length
+
+
+def _by_time(record: tuple) -> float:
+    return record[0]
+
+
+class SortedSpool:
+    """Collects samples and yields them back in timestamp order.
+
+    Holds at most `run_size` samples in memory; full runs are sorted and
+    spilled to anonymous temp files, then merged lazily with heapq.merge.
+    """
+
+    def __init__(self, run_size: int = 65536):
+        self.run_size = run_size
+        self.count = 0
+        self._run: list[tuple] = []
+        self._files = []
+
+    def add(self, samples):
+        for s in samples:
+            # Clamped like SampleRing._put, so a malformed value fits the spool record
+            self._run.append((s[1], max(0, min(int(s[0]), 0xFFFF)), s[2], s[3]))
+            self.count += 1
+            if len(self._run) >= self.run_size:
+                self._spill()
+
+    def _spill(self):
+        self._run.sort(key=_by_time)
+        f = tempfile.TemporaryFile()
+        pack = _SPOOL_REC.pack
+        for epoch, bpm, offset, date in self._run:
+            raw = (date or "").encode("utf-8")
+            f.write(pack(epoch, bpm, offset, len(raw)))
+            f.write(raw)
+        f.seek(0)
+        self._files.append(f)
+        self._run = []
+
+    @staticmethod
+    def _read_run(f):
+        size = _SPOOL_REC.size
+        unpack = _SPOOL_REC.unpack
+        while True:
+            head = f.read(size)
+            if len(head) < size:
+                break
+            epoch, bpm, offset, n = unpack(head)
+            date = f.read(n).decode("utf-8") if n else None
+            yield epoch, bpm, offset, date
+        f.close()
+
+    def __iter__(self):
+        """Yield (bpm, sample_epoch, utc_offset_minutes, date) in time order."""
+        self._run.sort(key=_by_time)
+        runs = [self._read_run(f) for f in self._files] + [iter(self._run)]
+        self._files = []
+        for epoch, bpm, offset, date in heapq.merge(*runs, key=_by_time):
+            yield bpm, epoch, offset, date
@@ -15,12 +15,17 @@ import time
 import random
 import signal
 import sys
-import os
 import logging
+import bisect
+import importlib.util
+import math
+import selectors
+import socket
 import threading
-from datetime import datetime, timezone
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from http.server import HTTPServer, BaseHTTPRequestHandler
 
 import yaml
 from solders.keypair import Keypair
@@ -31,28 +36,71 @@ from solders.message import Message
 from solana.rpc.api import Client
 from solana.rpc.commitment import Confirmed
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # mortem_common
+
+from bpm_receiver import (
+    BPMReceiver, HAE_SOURCE, HTTPError, Request, Response, extract_samples, json_response,
+    parse_batch,
+)
+from checkpoint import Checkpointer
+from deadlines import DeadlineScheduler
+from dedup import Deduplicator
+from hae_stream import HAEStreamParser, SortedSpool
+from lease import Lease
+from live_events import EventHub, ws_accept
+from replay_store import ReplayStore, format_timestamp
+from sample_buffer import SampleRing
+from mortem_common.clock import SYSTEM_CLOCK, Clock
+from mortem_common.dashboard import Dashboard
+from mortem_common.logsetup import log_path, setup_logging
+from mortem_common.metrics import CONTENT_TYPE, Counter, Gauge, Histogram, REGISTRY, serve, timed
+from mortem_common import profiling
+from mortem_common.reading import Reading
+from mortem_common.reload import ConfigReloader, http_url, positive_int, positive_number
+from mortem_common.ticker import Ticker
+from mortem_common import tracing
+
 # ---------------------------------------------------------------------------
 # Logging
 # ---------------------------------------------------------------------------
 LOG_DIR = Path(__file__).parent / "logs"
-LOG_DIR.mkdir(exist_ok=True)
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler(LOG_DIR / "heartbeat.log"),
-    ],
-)
+LOG_FILE = LOG_DIR / "heartbeat.log"
+
+# Queued: records are written by a listener thread, never by the loop.
+# Re-applied with the config's rotation and format once it is loaded.
+setup_logging(LOG_FILE)
 log = logging.getLogger("heartbeat")
 
+DEFAULT_ENTITY = "christopher"
+
+# ---------------------------------------------------------------------------
+# Metrics (GET /metrics on the live receiver, or metrics_port)
+# ---------------------------------------------------------------------------
+SAMPLES_RECEIVED = Counter("mortem_samples_received_total", "Heart-rate samples accepted by the live receiver",
+                           ("entity",))
+DUPLICATES = Counter("mortem_duplicates_total", "Retried samples and payloads dropped by the receiver",
+                     ("entity", "kind"))
+SAMPLES_PENDING = Gauge("mortem_samples_pending", "Samples received since the entity's last beat", ("entity",))
+STREAM_SUBSCRIBERS = Gauge("mortem_stream_subscribers", "Live /bpm/stream subscribers")
+ARRIVALS_PENDING = Gauge("mortem_arrivals_pending", "Entities with arrivals the beat loop hasn't picked up")
+BEATS = Counter("mortem_beats_total", "Beats emitted, by status (alive, grace, dead)", ("entity", "status"))
+TRANSACTIONS = Counter("mortem_transactions_total", "Memo transactions by result (sent, failed)", ("result",))
+SEND_MEMO = Histogram("mortem_send_memo_seconds", "Build, sign and send one memo transaction")
+RPC = Histogram("mortem_rpc_seconds", "Solana RPC call latency", ("method",))
+ART = Histogram("mortem_art_seconds", "Human art generation time")
+GRACE_REMAINING = Gauge("mortem_grace_seconds_remaining", "Seconds until the subject would be declared dead",
+                        ("entity",))
+TICK_DRIFT = Gauge("mortem_tick_drift_seconds", "How late the subject's last beat tick fired", ("entity",))
+
 # ---------------------------------------------------------------------------
 # Config
 # ---------------------------------------------------------------------------
 
+CONFIG_FILE = Path(__file__).parent / "config.yaml"
+
+
 def load_config() -> dict:
-    cfg_path = Path(__file__).parent / "config.yaml"
+    cfg_path = CONFIG_FILE
     if not cfg_path.exists():
         log.error("config.yaml not found. Copy config.example.yaml -> config.yaml")
         sys.exit(1)
@@ -85,12 +133,13 @@ def load_wallet(path: str) -> Keypair:
 class MockHeartbeatSource:
     """Generates realistic mock BPM data simulating Apple Watch readings."""
 
-    def __init__(self):
+    def __init__(self, clock: Clock = SYSTEM_CLOCK):
         self.base_bpm = 72
         self.active_watch = 1
         self._switch_counter = 0
+        self._clock = clock
 
-    def get_bpm(self) -> dict:
+    def get_bpm(self) -> Reading:
         """Return current BPM reading with metadata."""
         # Occasionally switch watches
         self._switch_counter += 1
@@ -98,7 +147,7 @@ class MockHeartbeatSource:
             self.active_watch = 2 if self.active_watch == 1 else 1
 
         # Simulate realistic BPM with natural variation
-        hour = datetime.now().hour
+        hour = self._clock.now().hour
         if 0 <= hour < 6:
             # Sleep: lower BPM
             bpm = random.randint(55, 68)
@@ -118,159 +167,247 @@ class MockHeartbeatSource:
             # Late night
             bpm = random.randint(60, 75)
 
-        return {
-            "bpm": bpm,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "source": f"Apple Watch {self.active_watch}",
-            "watch_id": self.active_watch,
-            "data_type": "mock",
-        }
+        return Reading(bpm, self._clock.time(), f"Apple Watch {self.active_watch}", self.active_watch,
+                       "mock")
+
+
+class SyntheticHeartbeatSource:
+    """Seeded synthetic Apple Watch stream for load and soak testing.
+
+    Backed by mortem_common.synthetic: every get_bpm() generates all samples
+    since the previous call at `rate_hz` (circadian baseline, HRV, pacer
+    floor, bursts, dropouts), so each beat carries real interval aggregates.
+    During a simulated dropout the last reading is repeated as stale.
+
+    The stream itself is the receiver here, so a reading counts as fresh
+    whenever it is polled and a dropout never starts grace. With
+    `test_death` dropouts run up to 20 minutes and count against liveness
+    (fresh as of the last sample), to exercise grace and the death protocol.
+    """
+
+    def __init__(self, seed: int | None = None, rate_hz: float = 1.0, clock: Clock = SYSTEM_CLOCK,
+                 test_death: bool = False):
+        # Imported here: it pulls in numpy, which only this source needs
+        from mortem_common.synthetic import SyntheticHeartbeat
+        self._clock = clock
+        self._test_death = test_death
+        extra = {"dropout_seconds": (30.0, 1200.0)} if test_death else {}
+        # Start one sample back so the first call has a reading
+        self._gen = SyntheticHeartbeat(seed=seed, rate_hz=rate_hz,
+                                       start=clock.time() - 1.0 / rate_hz, **extra)
+        self._last: tuple | None = None  # (bpm, sample epoch, watch)
+
+    def get_bpm(self) -> Reading:
+        now = self._clock.time()
+        batch = self._gen.advance_to(now)
+        if len(batch):
+            self._last = (int(batch.bpm[-1]), float(batch.epochs[-1]), int(batch.watch[-1]))
+        if self._last is None:
+            return Reading(0, now, "Synthetic (dropout)", 0, "waiting")
+        bpm, sample_at, watch = self._last
+        reading = Reading(bpm, now, f"Apple Watch {watch}", watch, "synthetic",
+                          sample_epoch=sample_at, utc_offset=self._gen.utc_offset,
+                          interval=batch.stats(),
+                          received_at=sample_at if self._test_death else now)
+        if reading.interval is None:
+            reading.stale_seconds = int(now - sample_at)
+        return reading
 
 
 class FileHeartbeatSource:
     """Replays real heartbeat data from a JSON file (e.g. HealthKit export).
 
-    Reads the file once, reverses to chronological order, then yields entries
-    one at a time on each get_bpm() call. When all entries are exhausted, wraps
-    around to the beginning.
+    The export is converted once into a memory-mapped binary sidecar
+    (see replay_store.py) and read in chronological order. When all entries
+    are exhausted, wraps around to the beginning.
+
+    Two replay modes:
+      speed == 0  — one record per get_bpm() call, ignoring real spacing.
+      speed > 0   — time-faithful: the replay clock runs `speed` times faster
+                    than wall time (60 = one recorded minute per second) and
+                    get_bpm() returns the latest record that is due, so real
+                    gaps, bursts and circadian phase are preserved.
+
+    `start` positions the replay: "time_of_day" aligns to the record matching
+    the current local time of day, an ISO date/datetime seeks to that moment.
     """
 
-    def __init__(self, file_path: str):
+    STALE_THRESHOLD = 300  # recorded seconds without a sample = gap
+
+    def __init__(self, file_path: str, speed: float = 0.0, start: str | None = None,
+                 clock: Clock = SYSTEM_CLOCK):
+        self._clock = clock
         path = Path(file_path).expanduser()
         if not path.exists():
             raise FileNotFoundError(f"Heartbeat data file not found: {path}")
         log.info(f"Loading heartbeat data from {path}...")
-        with open(path) as f:
-            raw = json.load(f)
-        # File is newest-first; reverse to chronological
-        self.entries = list(reversed(raw))
+        self.store = ReplayStore.open(path)
+        if not len(self.store):
+            raise ValueError(f"No heartbeat records in {path}")
         self.index = 0
-        log.info(f"Loaded {len(self.entries)} heartbeat records")
+        self.speed = float(speed or 0.0)
+        log.info(f"Loaded {len(self.store)} heartbeat records")
+
+        if start == "time_of_day":
+            self.seek_time_of_day()
+        elif start:
+            self.seek(datetime.fromisoformat(start))
+        if start:
+            epoch, _, _, _, offset = self.store[self.index]
+            log.info(f"Replay positioned at record {self.index} ({format_timestamp(epoch, offset)})")
+        if self.speed > 0:
+            log.info(f"Time-faithful replay at {self.speed:g}x")
+        self._anchor()
+
+    # --- Seeking --------------------------------------------------------
+
+    def _bisect(self, epoch: float, lo: int = 0) -> int:
+        """Index of the first record at or after `epoch` (clamped to the store)."""
+        n = len(self.store)
+        i = bisect.bisect_left(range(n), epoch, lo=lo, key=self.store.epoch_at)
+        return min(i, n - 1)
+
+    def seek(self, when: datetime):
+        """Position the replay at the first record at or after `when`."""
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        self.index = self._bisect(when.timestamp())
+        self._anchor()
+
+    def seek_time_of_day(self, now: datetime | None = None, on_date=None):
+        """Position at the record matching `now`'s time of day.
+
+        Uses `on_date` if given, otherwise the first recorded day. Times are
+        interpreted in the recording's own UTC offset, so circadian phase
+        lines up with the wearer's local day.
+        """
+        now = now or self._clock.now()
+        first_epoch, _, _, _, offset = self.store[0]
+        tz = timezone(timedelta(minutes=offset))
+        day = on_date or datetime.fromtimestamp(first_epoch, tz).date()
+        target = datetime.combine(day, now.time().replace(tzinfo=None), tzinfo=tz)
+        if target.timestamp() < first_epoch:
+            target += timedelta(days=1)
+        self.index = self._bisect(target.timestamp())
+        self._anchor()
+
+    # --- Replay clock ---------------------------------------------------
+
+    def _anchor(self):
+        """Pin replay time to the current record at the current instant."""
+        self._anchor_epoch = self.store.epoch_at(self.index)
+        self._anchor_mono = self._clock.monotonic()
+
+    def _replay_epoch(self) -> float:
+        return self._anchor_epoch + (self._clock.monotonic() - self._anchor_mono) * self.speed
+
+    def _due_index(self) -> int:
+        """Latest record due at the current replay time (wraps at the end)."""
+        n = len(self.store)
+        now_epoch = self._replay_epoch()
+        i = bisect.bisect_right(range(n), now_epoch, lo=self.index, key=self.store.epoch_at) - 1
+        if i >= n - 1 and now_epoch - self.store.epoch_at(n - 1) > self.STALE_THRESHOLD:
+            self.index = 0
+            self._anchor()
+            return 0
+        return max(i, self.index)
+
+    def seconds_until_next(self) -> float:
+        """Wall seconds until the next recorded sample is due (0 = due now)."""
+        if self.speed <= 0:
+            return 0.0
+        nxt = min(self.index + 1, len(self.store) - 1)
+        return max(0.0, (self.store.epoch_at(nxt) - self._replay_epoch()) / self.speed)
+
+    def replay(self):
+        """Yield every record at its scheduled wall time, in order, forever.
+
+        Unlike get_bpm(), nothing is skipped — use this to drive a pipeline
+        at the recording's real sample rate times `speed` for load testing.
+        """
+        speed = self.speed if self.speed > 0 else 1.0
+        n = len(self.store)
+        while True:
+            due = self._anchor_mono + (self.store.epoch_at(self.index) - self._anchor_epoch) / speed
+            delay = due - self._clock.monotonic()
+            if delay > 0:
+                self._clock.sleep(delay)
+            yield self._reading(self.index)
+            if self.index + 1 >= n:
+                self.index = 0
+                self._anchor()
+            else:
+                self.index += 1
 
-    def get_bpm(self) -> dict:
-        entry = self.entries[self.index % len(self.entries)]
-        self.index += 1
-        return {
-            "bpm": entry["bpm"],
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "source": entry.get("source", "Christopher's Apple Watch"),
-            "watch_id": 1,
-            "data_type": "healthkit_replay",
-            "original_timestamp": entry["timestamp"],
-        }
+    # --- Readings -------------------------------------------------------
 
+    def _reading(self, index: int) -> Reading:
+        epoch, bpm, source, _motion, offset = self.store[index]
+        return Reading(bpm, self._clock.time(), source, 1, "healthkit_replay",
+                       sample_epoch=epoch, utc_offset=offset)
 
-class _BPMReceiveHandler(BaseHTTPRequestHandler):
-    """HTTP handler that accepts POST /bpm from Apple Watch via iOS Shortcuts."""
+    def get_bpm(self) -> Reading:
+        if self.speed <= 0:
+            reading = self._reading(self.index % len(self.store))
+            self.index += 1
+            return reading
 
-    server_instance = None  # Set by HealthKitSource
+        self.index = self._due_index()
+        reading = self._reading(self.index)
+        reading.replay_speed = self.speed
+        gap = self._replay_epoch() - self.store.epoch_at(self.index)
+        if gap > self.STALE_THRESHOLD:
+            # Real gap in the recording — surface it like a stale live source
+            reading.stale_seconds = int(gap)
+        return reading
 
-    @staticmethod
-    def _extract_bpm(data: dict) -> tuple[int, str]:
-        """Extract BPM from various payload formats.
 
-        Supports:
-          1. Health Auto Export format:
-             {"name":"Heart Rate","units":"bpm","data":[{"date":"...","Avg":72,"Min":60,"Max":95}]}
-          2. Simple format: {"bpm": 72} or {"value": 72}
-          3. Health Auto Export metrics array:
-             {"data":{"metrics":[{"name":"Heart Rate","data":[{"Avg":72}]}]}}
+class _EntityFeed:
+    """Per-entity receiver state: the sample ring and its duplicate filter."""
+
+    __slots__ = ("entity", "samples", "dedup", "trace")
+
+    def __init__(self, entity: str, buffer_capacity: int, dedup_window: float):
+        self.entity = entity
+        # Every accepted sample, shared between the receiver thread and get_bpm()
+        self.samples = SampleRing(buffer_capacity)
+        # Retries (HAE on non-200, HyperRate on reconnect) are dropped here
+        self.dedup = Deduplicator(payload_window=dedup_window)
+        # Span context of the request that delivered the newest samples
+        self.trace = None
 
-        Returns (bpm, source_label).
-        """
-        # --- Health Auto Export: top-level metric object ---
-        if data.get("name") == "Heart Rate" and "data" in data:
-            samples = data["data"]
-            if samples and isinstance(samples, list):
-                latest = samples[-1]  # most recent sample
-                bpm = int(latest.get("Avg", latest.get("qty", latest.get("Max", 0))))
-                return bpm, "Christopher's Apple Watch (Health Auto Export)"
-
-        # --- Health Auto Export: wrapped metrics array ---
-        metrics = None
-        if isinstance(data.get("data"), dict):
-            metrics = data["data"].get("metrics", [])
-        elif isinstance(data.get("metrics"), list):
-            metrics = data["metrics"]
-        if metrics:
-            for m in metrics:
-                if m.get("name") == "Heart Rate" and m.get("data"):
-                    latest = m["data"][-1]
-                    bpm = int(latest.get("Avg", latest.get("qty", latest.get("Max", 0))))
-                    return bpm, "Christopher's Apple Watch (Health Auto Export)"
-
-        # --- Simple format: {"bpm": 72} or {"value": 72} ---
-        bpm = int(data.get("bpm", data.get("value", 0)))
-        source = data.get("source", "Christopher's Apple Watch")
-        return bpm, source
-
-    def do_POST(self):
-        # Accept on any path — Health Auto Export just hits the base URL
-        length = int(self.headers.get("Content-Length", 0))
-        body = self.rfile.read(length) if length else b""
-        try:
-            data = json.loads(body) if body else {}
-            bpm, source = self._extract_bpm(data)
-            if bpm <= 0:
-                # Log the raw payload for debugging but still return 200
-                # (Health Auto Export retries on non-200)
-                log.warning(f"[LIVE] Received payload with no valid BPM: {body[:500]}")
-                self.send_response(200)
-                self.send_header("Content-Type", "application/json")
-                self.end_headers()
-                self.wfile.write(b'{"ok":true,"bpm":0,"note":"no valid bpm found"}')
-                return
-            reading = {
-                "bpm": bpm,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "source": source,
-                "watch_id": int(data.get("watch_id", 1)),
-                "data_type": "live_apple_watch",
-                "received_at": time.time(),
-            }
-            if _BPMReceiveHandler.server_instance:
-                _BPMReceiveHandler.server_instance._latest = reading
-                _BPMReceiveHandler.server_instance._total_received += 1
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps({"ok": True, "bpm": bpm}).encode())
-            log.info(f"[LIVE] Received BPM: {bpm} from {source}")
-        except Exception as e:
-            log.error(f"[LIVE] Parse error: {e} | body: {body[:300]}")
-            self.send_response(200)
-            self.send_header("Content-Type", "application/json")
-            self.end_headers()
-            self.wfile.write(json.dumps({"ok": True, "error": str(e)}).encode())
-
-    def do_GET(self):
-        inst = _BPMReceiveHandler.server_instance
-        if self.path in ("/", "/bpm", "/bpm/latest", "/health"):
-            if inst and inst._latest:
-                self.send_response(200)
-                self.send_header("Content-Type", "application/json")
-                self.end_headers()
-                resp = {**inst._latest, "total_received": inst._total_received}
-                self.wfile.write(json.dumps(resp).encode())
-            else:
-                self.send_response(200)
-                self.send_header("Content-Type", "application/json")
-                self.end_headers()
-                self.wfile.write(b'{"bpm":null,"waiting":true,"status":"ok"}')
-        else:
-            self.send_response(200)
-            self.end_headers()
-            self.wfile.write(b'ok')
 
-    def log_message(self, format, *args):
-        pass  # Suppress default HTTP log noise
+class _EntitySource:
+    """One entity's view of a shared HealthKitSource (multi-subject mode)."""
+
+    def __init__(self, source: "HealthKitSource", entity: str):
+        self._source = source
+        self.entity = entity
+
+    def get_bpm(self) -> Reading:
+        return self._source.get_bpm(self.entity)
+
+    def has_pending(self) -> bool:
+        return self._source.has_pending(self.entity)
+
+    def set_notify(self, callback):
+        self._source.set_notify(callback)
+
+    def publish_beat(self, event: dict):
+        self._source.publish_beat(event, self.entity)
 
 
 class HealthKitSource:
     """Live Apple Watch heart rate receiver.
 
-    Runs a tiny HTTP server on a background thread. Your iPhone posts BPM
-    data to http://<mac-ip>:8080/bpm via iOS Shortcuts or Health Auto Export.
+    Runs an asyncio HTTP/1.1 receiver (bpm_receiver.py) on a background thread.
+    Your iPhone posts BPM data to http://<mac-ip>:8080/bpm via iOS Shortcuts or
+    Health Auto Export.
+
+    One receiver serves every entity. Producers select theirs with
+    ?entity=<id> (or an X-Entity header) on any route; requests without one
+    go to the first entity. Each entity has its own sample ring and duplicate
+    filter; for_entity() returns a per-entity source for the main loop.
 
     If no live data has arrived yet, returns the last known reading or waits.
     Falls back to a synthetic reading after 5 minutes of silence (keeps the
@@ -278,151 +415,480 @@ class HealthKitSource:
     """
 
     STALE_THRESHOLD = 300  # 5 min without data = stale
-
-    def __init__(self, listen_port: int = 8080):
-        self._latest: dict | None = None
-        self._total_received = 0
+    STREAM_THRESHOLD = 256 * 1024  # bodies larger than this are parsed incrementally
+    STREAM_SAMPLE_LIMIT = 32  # larger POSTs are pushed to /bpm/stream as one summary
+    MAX_BATCH_ERRORS = 1000   # per-sample errors listed in a /bpm/batch response
+
+    def __init__(self, listen_port: int = 8080, max_body_bytes: int | None = None,
+                 buffer_capacity: int = 4096, max_stream_bytes: int | None = None,
+                 dedup_window: float = 2.0, stream_buffer: int = 256,
+                 max_stream_clients: int = 64, entities: list[str] | None = None,
+                 clock: Clock = SYSTEM_CLOCK):
+        entities = list(entities or [DEFAULT_ENTITY])
+        self._clock = clock
+        self._feeds = {e: _EntityFeed(e, buffer_capacity, dedup_window) for e in entities}
+        self._default = self._feeds[entities[0]]
         self._port = listen_port
-        _BPMReceiveHandler.server_instance = self
+        self._notify = None  # called with the entity id after samples are accepted
 
         # Start HTTP receiver in background
-        self._httpd = HTTPServer(("0.0.0.0", listen_port), _BPMReceiveHandler)
-        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
-        self._thread.start()
+        self._receiver = BPMReceiver("0.0.0.0", listen_port, max_body_bytes=max_body_bytes,
+                                     max_stream_bytes=max_stream_bytes)
+        # Live push to dashboards: every accepted sample and every emitted beat
+        self._events = EventHub(self._receiver.call_soon, buffer_size=stream_buffer,
+                                max_subscribers=max_stream_clients)
+        self._receiver.route("POST", "/bpm/batch", self._traced(self._handle_batch))
+        self._receiver.route("POST", "*", self._traced(self._handle_post), streaming=True)
+        self._receiver.route("GET", "/bpm/stream", self._handle_stream)
+        self._receiver.route("GET", "/metrics", self._handle_metrics)
+        for path in ("/", "/bpm", "/bpm/latest", "/health"):
+            self._receiver.route("GET", path, self._handle_latest)
+        self._receiver.route("GET", "*", self._handle_ok)
+        self._receiver.start()
+
+        feeds = self._feeds.values()
+        SAMPLES_RECEIVED.set_function(lambda: {feed.entity: feed.samples.total for feed in feeds})
+        SAMPLES_PENDING.set_function(lambda: {feed.entity: feed.samples.pending for feed in feeds})
+        DUPLICATES.set_function(lambda: {
+            (feed.entity, kind): getattr(feed.dedup, f"duplicate_{kind}")
+            for feed in feeds for kind in ("samples", "payloads")
+        })
+        STREAM_SUBSCRIBERS.set_function(lambda: self._events.subscriber_count)
         log.info(f"[LIVE] BPM receiver listening on http://0.0.0.0:{listen_port}/bpm")
         log.info(f"[LIVE] POST {{\"bpm\": 72}} to http://<your-mac-ip>:{listen_port}/bpm")
+        log.info(f"[LIVE] Live events at http://<your-mac-ip>:{listen_port}/bpm/stream")
+        if len(self._feeds) > 1:
+            log.info(f"[LIVE] Routing {len(self._feeds)} entities by ?entity=<id>")
+
+    def set_notify(self, callback):
+        """Have the receiver call `callback(entity)` whenever samples are accepted."""
+        self._notify = callback
+
+    def has_pending(self, entity: str | None = None) -> bool:
+        """True if samples arrived since the last get_bpm() for `entity`."""
+        feed = self._feeds[entity] if entity else self._default
+        return feed.samples.pending > 0
+
+    def for_entity(self, entity: str) -> _EntitySource:
+        if entity not in self._feeds:
+            raise KeyError(f"Unknown entity: {entity}")
+        return _EntitySource(self, entity)
+
+    def _feed(self, request: Request) -> _EntityFeed:
+        entity = request.query.get("entity", [None])[0] or request.headers.get("x-entity")
+        if not entity:
+            return self._default
+        feed = self._feeds.get(entity)
+        if feed is None:
+            raise HTTPError(404, f"Unknown entity: {entity}")
+        return feed
+
+    @property
+    def _total_received(self) -> int:
+        return sum(feed.samples.total for feed in self._feeds.values())
+
+    def _latest_reading(self, feed: _EntityFeed) -> dict | None:
+        latest = feed.samples.latest()
+        if latest is None:
+            return None
+        return {
+            "entity": feed.entity,
+            "bpm": latest["bpm"],
+            "timestamp": datetime.fromtimestamp(latest["received_at"], timezone.utc).isoformat(),
+            "source": latest["source"],
+            "watch_id": latest["watch_id"],
+            "data_type": "live_apple_watch",
+            "received_at": latest["received_at"],
+        }
+
+    # --- Receiver routes ------------------------------------------------
+
+    @staticmethod
+    def _traced(handler):
+        """Run a receiving route inside a "receive" span, continuing the producer's traceparent."""
+        async def receive(request: Request) -> Response:
+            with tracing.TRACER.trace("receive", parent=request.headers.get("traceparent"),
+                                      path=request.path):
+                return await handler(request)
+        return receive
+
+    @staticmethod
+    def _mark_trace(feed: _EntityFeed, samples: int):
+        """Point the feed at the current receive span, so the next beat continues its trace."""
+        receive = tracing.current()
+        if receive:
+            receive.set(entity=feed.entity, samples=samples)
+            feed.trace = receive.context
+
+    async def _handle_post(self, request: Request) -> Response:
+        # Accept on any path — Health Auto Export just hits the base URL.
+        # Small bodies are buffered; anything past STREAM_THRESHOLD (an HAE
+        # backlog) is parsed incrementally as it arrives.
+        received_at = self._clock.time()
+        feed = self._feed(request)
+        head = bytearray()
+        parser = spool = None
+        try:
+            async for chunk in request.stream:
+                if parser is not None:
+                    spool.add(parser.feed(chunk))
+                    continue
+                head += chunk
+                if len(head) > self.STREAM_THRESHOLD:
+                    parser = HAEStreamParser(received_at)
+                    spool = SortedSpool()
+                    spool.add(parser.feed(bytes(head)))
+                    head = None
+            if parser is not None:
+                spool.add(parser.close())
+                return self._ingest_backlog(feed, spool, received_at)
+        except HTTPError:
+            raise
+        except Exception as e:
+            log.error(f"[LIVE] Streaming parse error: {e}")
+            return json_response({"ok": True, "error": str(e)})
 
-    def get_bpm(self) -> dict:
-        if self._latest:
-            age = time.time() - self._latest["received_at"]
-            if age < self.STALE_THRESHOLD:
-                # Fresh live data
-                return {
-                    "bpm": self._latest["bpm"],
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
-                    "source": self._latest["source"],
-                    "watch_id": self._latest["watch_id"],
-                    "data_type": "live_apple_watch",
-                }
+        body = request.body = bytes(head)
+        try:
+            data = request.json()
+            samples, source = extract_samples(data, received_at)
+            if not samples:
+                # Log the raw payload for debugging but still return 200
+                # (Health Auto Export retries on non-200)
+                log.warning(f"[LIVE] Received payload with no valid BPM: {body[:500]}")
+                return Response(200, b'{"ok":true,"bpm":0,"note":"no valid bpm found"}')
+            bpm = samples[-1][0]
+            if all(s[3] is None for s in samples):
+                duplicate = feed.dedup.seen_payload(Deduplicator.digest(body), received_at)
+                fresh = [] if duplicate else samples
             else:
+                fresh = feed.dedup.filter_samples(source, samples)
+            duplicates = len(samples) - len(fresh)
+            if fresh:
+                watch_id = int(data.get("watch_id", 1))
+                feed.samples.extend(fresh, received_at, source, watch_id)
+                self._publish_samples(feed, fresh, source, watch_id, received_at)
+                log.info(f"[LIVE] Received BPM: {bpm} from {source} ({len(fresh)} samples)")
+            else:
+                log.info(f"[LIVE] Duplicate payload ignored: {bpm} BPM from {source}")
+            # Always 200 so the producer stops retrying
+            return json_response({"ok": True, "bpm": bpm, "samples": len(fresh),
+                                  "duplicates": duplicates})
+        except Exception as e:
+            log.error(f"[LIVE] Parse error: {e} | body: {body[:300]}")
+            return json_response({"ok": True, "error": str(e)})
+
+    async def _handle_batch(self, request: Request) -> Response:
+        # High-rate producers (the HyperRate bridge) send many timestamped
+        # samples per request; invalid ones are reported, not fatal.
+        received_at = self._clock.time()
+        feed = self._feed(request)
+        ndjson = "ndjson" in request.headers.get("content-type", "")
+        try:
+            accepted, rejected, source, watch_id = parse_batch(request.body, received_at, ndjson)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        source = request.query.get("source", [source])[0]
+        fresh = feed.dedup.filter_samples(source, accepted)
+        if fresh:
+            feed.samples.extend(fresh, received_at, source, watch_id)
+            self._publish_samples(feed, fresh, source, watch_id, received_at)
+        duplicates = len(accepted) - len(fresh)
+        log.info(f"[LIVE] Batch from {source}: {len(fresh)} accepted, {duplicates} duplicates, "
+                 f"{len(rejected)} rejected")
+        return json_response({
+            "ok": True,
+            "accepted": len(fresh),
+            "duplicates": duplicates,
+            "rejected": len(rejected),
+            "errors": rejected[:self.MAX_BATCH_ERRORS],
+            "bpm": fresh[-1][0] if fresh else None,
+        })
+
+    def _ingest_backlog(self, feed: _EntityFeed, spool: SortedSpool, received_at: float) -> Response:
+        """Push a streamed backlog into the ring in timestamp order."""
+        if not spool.count:
+            log.warning("[LIVE] Streamed payload contained no heart rate samples")
+            return Response(200, b'{"ok":true,"bpm":0,"note":"no valid bpm found"}')
+        accepted = 0
+        batch = []
+        for sample in spool:
+            batch.append(sample)
+            if len(batch) >= 1024:
+                accepted += self._ingest_batch(feed, batch, received_at)
+                batch = []
+        if batch:
+            accepted += self._ingest_batch(feed, batch, received_at)
+        duplicates = spool.count - accepted
+        latest = feed.samples.latest()
+        date = format_timestamp(latest["sample_at"], latest["utc_offset"])
+        log.info(f"[LIVE] Ingested backlog: {accepted} new samples, {duplicates} duplicates, "
+                 f"latest {latest['bpm']} BPM at {date}")
+        if accepted:
+            self._mark_trace(feed, accepted)
+        if self._notify and accepted:
+            self._notify(feed.entity)
+        # One summary event rather than thousands of historical samples
+        self._events.publish("backlog", {"entity": feed.entity, "samples": accepted,
+                                         "duplicates": duplicates, "bpm": latest["bpm"],
+                                         "date": date, "source": HAE_SOURCE})
+        return json_response({"ok": True, "bpm": latest["bpm"], "samples": accepted,
+                              "duplicates": duplicates})
+
+    def _ingest_batch(self, feed: _EntityFeed, batch: list, received_at: float) -> int:
+        fresh = feed.dedup.filter_samples(HAE_SOURCE, batch)
+        if fresh:
+            feed.samples.extend(fresh, received_at, HAE_SOURCE)
+        return len(fresh)
+
+    async def _handle_latest(self, request: Request) -> Response:
+        feed = self._feed(request)
+        latest = self._latest_reading(feed)
+        if latest:
+            return json_response({**latest, "total_received": feed.samples.total,
+                                  "dedup": feed.dedup.stats(), "stream": self._stream_stats()})
+        return Response(200, b'{"bpm":null,"waiting":true,"status":"ok"}')
+
+    async def _handle_metrics(self, request: Request) -> Response:
+        return Response(200, REGISTRY.render(), content_type=CONTENT_TYPE)
+
+    async def _handle_ok(self, request: Request) -> Response:
+        return Response(200, b"ok", content_type="text/plain")
+
+    async def _handle_stream(self, request: Request) -> Response:
+        # Server-sent events by default; push-only WebSocket if the client upgrades
+        websocket = request.headers.get("upgrade", "").lower() == "websocket"
+        key = request.headers.get("sec-websocket-key", "")
+        if websocket and not key:
+            raise HTTPError(400, "Missing Sec-WebSocket-Key")
+        # Routed like the other endpoints; ?entity=* follows every entity
+        if request.query.get("entity", [None])[0] == "*":
+            feed, entity, total = self._default, None, self._total_received
+        else:
+            feed = self._feed(request)
+            entity, total = feed.entity, feed.samples.total
+        sub = self._events.subscribe(websocket, request.peer, entity)
+        if sub is None:
+            raise HTTPError(503, "Too many stream subscribers")
+        log.info(f"[LIVE] Stream subscriber {request.peer} ({'websocket' if websocket else 'sse'}, "
+                 f"{entity or 'all entities'})")
+        frames = self._events.frames(sub, {"latest": self._latest_reading(feed),
+                                           "total_received": total})
+        if websocket:
+            return Response(101, b"", stream=frames, headers={
+                "Upgrade": "websocket", "Connection": "Upgrade",
+                "Sec-WebSocket-Accept": ws_accept(key),
+            })
+        return Response(200, b"", content_type="text/event-stream", stream=frames,
+                        headers={"Cache-Control": "no-cache"})
+
+    def _publish_samples(self, feed: _EntityFeed, samples: list, source: str, watch_id: int,
+                         received_at: float):
+        self._mark_trace(feed, len(samples))
+        if self._notify:
+            self._notify(feed.entity)
+        if len(samples) > self.STREAM_SAMPLE_LIMIT:
+            # A multi-sample export would flood every subscriber's buffer
+            latest = feed.samples.latest()
+            self._events.publish("backlog", {"entity": feed.entity, "samples": len(samples),
+                                             "bpm": latest["bpm"],
+                                             "date": format_timestamp(latest["sample_at"],
+                                                                      latest["utc_offset"]),
+                                             "source": source})
+            return
+        for bpm, epoch, offset, date in samples:
+            self._events.publish("sample", {"entity": feed.entity, "bpm": bpm,
+                                            "date": date or format_timestamp(epoch, offset),
+                                            "source": source, "watch_id": watch_id,
+                                            "received_at": received_at})
+
+    def _stream_stats(self) -> dict:
+        return {"subscribers": self._events.subscriber_count,
+                "published": self._events.published, "evicted": self._events.evicted}
+
+    def publish_beat(self, event: dict, entity: str | None = None):
+        """Push an emitted beat (with its signature) to stream subscribers."""
+        self._events.publish("beat", {"entity": entity or self._default.entity, **event})
+
+    def get_bpm(self, entity: str | None = None) -> Reading:
+        """Latest reading plus aggregates over every sample since the previous call."""
+        feed = self._feeds[entity] if entity else self._default
+        latest = feed.samples.latest()
+        now = self._clock.time()
+        if latest:
+            reading = Reading(latest["bpm"], now, latest["source"], latest["watch_id"],
+                              "live_apple_watch", sample_epoch=latest["sample_at"],
+                              utc_offset=latest["utc_offset"],
+                              interval=feed.samples.interval_stats(),
+                              received_at=latest["received_at"], trace=feed.trace)
+            age = now - latest["received_at"]
+            if age >= self.STALE_THRESHOLD:
                 # Stale — haven't received data in a while
-                log.warning(f"[LIVE] Last BPM is {int(age)}s old — using stale reading")
-                return {
-                    "bpm": self._latest["bpm"],
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
-                    "source": self._latest["source"],
-                    "watch_id": self._latest["watch_id"],
-                    "data_type": "stale_apple_watch",
-                    "stale_seconds": int(age),
-                }
+                log.warning(f"[LIVE] {feed.entity}: last BPM is {int(age)}s old — using stale reading")
+                reading.data_type = "stale_apple_watch"
+                reading.stale_seconds = int(age)
+            return reading
         else:
             # No data received yet — waiting for first reading
-            log.warning("[LIVE] No BPM data received yet. Waiting for Apple Watch POST...")
-            return {
-                "bpm": 0,
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "source": "Waiting for Apple Watch...",
-                "watch_id": 0,
-                "data_type": "waiting",
-            }
+            if len(self._feeds) == 1:
+                log.warning("[LIVE] No BPM data received yet. Waiting for Apple Watch POST...")
+            return Reading(0, now, "Waiting for Apple Watch...", 0, "waiting")
 
     def shutdown(self):
-        self._httpd.shutdown()
+        self._receiver.shutdown()
 
 # ---------------------------------------------------------------------------
 # Solana Transaction Builder
 # ---------------------------------------------------------------------------
 
+class BlockhashCache:
+    """Recent blockhash shared by every writer in the process.
+
+    A blockhash stays valid for ~60s, so one fetch can sign every subject's
+    beat in a tick instead of one RPC round-trip per transaction.
+    """
+
+    def __init__(self, client: Client, max_age: float = 20.0):
+        self.client = client
+        self.max_age = max_age
+        self._blockhash = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def set_client(self, client: Client):
+        """Switch RPC endpoints; the next get() fetches from the new one."""
+        with self._lock:
+            self.client = client
+            self._blockhash = None
+
+    def get(self):
+        with self._lock:
+            if self._blockhash is None or time.monotonic() - self._fetched_at > self.max_age:
+                # Use Finalized for reliability on devnet
+                from solana.rpc.commitment import Finalized
+                resp = self.client.get_latest_blockhash(commitment=Finalized)
+                self._blockhash = resp.value.blockhash
+                self._fetched_at = time.monotonic()
+            return self._blockhash
+
+
 class SolanaHeartbeatWriter:
     """Writes heartbeat data to Solana devnet via memo transactions."""
 
     MEMO_PROGRAM_ID = Pubkey.from_string("MemoSq4gqABAXKb96qnH8TysNcWxMyWCqXgDLGmfcHr")
 
-    def __init__(self, client: Client, wallet: Keypair, lamports: int = 1000):
+    def __init__(self, client: Client, wallet: Keypair, lamports: int = 1000,
+                 entity: str = DEFAULT_ENTITY, blockhashes: BlockhashCache | None = None,
+                 clock: Clock = SYSTEM_CLOCK):
         self.client = client
+        self.clock = clock
         self.wallet = wallet
         self.lamports = lamports
+        self.entity = entity
+        self.blockhashes = blockhashes or BlockhashCache(client)
         self.tx_count = 0
+        # Checked right before each send; False drops it (a lost leader lease)
+        self.fence = None
 
-    def send_heartbeat(self, bpm_data: dict, heartbeats_total: int) -> str | None:
+    def send_heartbeat(self, bpm_data: Reading, heartbeats_total: int) -> str | None:
         """Send a heartbeat transaction to Solana devnet. Returns signature or None."""
         memo_data = {
             "type": "HUMAN_HEARTBEAT",
-            "bpm": bpm_data["bpm"],
-            "timestamp": bpm_data["timestamp"],
-            "source": bpm_data["source"],
-            "watch_id": bpm_data["watch_id"],
+            "bpm": bpm_data.bpm,
+            "timestamp": bpm_data.timestamp,
+            "source": bpm_data.source,
+            "watch_id": bpm_data.watch_id,
             "total_beats_recorded": heartbeats_total,
-            "entity": "christopher",
+            "entity": self.entity,
         }
+        if bpm_data.interval:
+            # Summary of every sample received since the previous beat
+            memo_data["interval"] = bpm_data.interval
         return self._send_memo(memo_data)
 
-    def send_grace_period(self, bpm_data: dict, seconds_remaining: int) -> str | None:
+    def send_grace_period(self, bpm_data: Reading, seconds_remaining: int) -> str | None:
         """Send a grace period warning transaction."""
         memo_data = {
             "type": "HUMAN_HEARTBEAT_GRACE",
-            "last_bpm": bpm_data["bpm"],
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "last_bpm": bpm_data.bpm,
+            "timestamp": self.clock.now(timezone.utc).isoformat(),
             "grace_seconds_remaining": seconds_remaining,
-            "entity": "christopher",
+            "entity": self.entity,
         }
         return self._send_memo(memo_data)
 
-    def send_death_declaration(self, last_bpm_data: dict, total_beats: int) -> str | None:
+    def send_death_declaration(self, last_bpm_data: Reading, total_beats: int) -> str | None:
         """Send the death declaration transaction."""
         memo_data = {
             "type": "HUMAN_DEATH_DECLARATION",
-            "last_bpm": last_bpm_data["bpm"],
-            "last_heartbeat_timestamp": last_bpm_data["timestamp"],
-            "time_of_death": datetime.now(timezone.utc).isoformat(),
+            "last_bpm": last_bpm_data.bpm,
+            "last_heartbeat_timestamp": last_bpm_data.timestamp,
+            "time_of_death": self.clock.now(timezone.utc).isoformat(),
             "total_heartbeats_recorded": total_beats,
-            "entity": "christopher",
+            "entity": self.entity,
             "message": "No heartbeat detected within grace period. Death protocol triggered.",
         }
         return self._send_memo(memo_data)
 
     def _send_memo(self, data: dict) -> str | None:
         """Send a memo transaction to Solana."""
+        with SEND_MEMO.time(), tracing.span("send", type=data["type"]) as send:
+            if send:
+                # Lets the witness continue this beat's trace
+                data["trace"] = send.context
+            sig = self._build_and_send(data)
+            send.set(sig=sig)
+        TRANSACTIONS.labels("sent" if sig else "failed").inc()
+        return sig
+
+    def _build_and_send(self, data: dict) -> str | None:
         try:
-            memo_bytes = json.dumps(data, separators=(",", ":")).encode("utf-8")
-
-            # Build transfer instruction (self-transfer, minimal lamports)
-            transfer_ix = transfer(
-                TransferParams(
-                    from_pubkey=self.wallet.pubkey(),
-                    to_pubkey=self.wallet.pubkey(),
-                    lamports=self.lamports,
+            with tracing.span("build") as build:
+                memo_bytes = json.dumps(data, separators=(",", ":")).encode("utf-8")
+                build.set(memo_bytes=len(memo_bytes))
+
+                # Build transfer instruction (self-transfer, minimal lamports)
+                transfer_ix = transfer(
+                    TransferParams(
+                        from_pubkey=self.wallet.pubkey(),
+                        to_pubkey=self.wallet.pubkey(),
+                        lamports=self.lamports,
+                    )
                 )
-            )
 
-            # Build memo instruction
-            from solders.instruction import Instruction, AccountMeta
-            memo_ix = Instruction(
-                program_id=self.MEMO_PROGRAM_ID,
-                accounts=[AccountMeta(self.wallet.pubkey(), is_signer=True, is_writable=True)],
-                data=memo_bytes,
-            )
+                # Build memo instruction
+                from solders.instruction import Instruction, AccountMeta
+                memo_ix = Instruction(
+                    program_id=self.MEMO_PROGRAM_ID,
+                    accounts=[AccountMeta(self.wallet.pubkey(), is_signer=True, is_writable=True)],
+                    data=memo_bytes,
+                )
 
-            # Get recent blockhash (use Finalized for reliability on devnet)
-            from solana.rpc.commitment import Finalized
-            blockhash_resp = self.client.get_latest_blockhash(commitment=Finalized)
-            blockhash = blockhash_resp.value.blockhash
+            # Recent blockhash, shared across subjects
+            with tracing.span("blockhash"):
+                blockhash = self.blockhashes.get()
 
             # Build and sign transaction
-            msg = Message.new_with_blockhash(
-                [transfer_ix, memo_ix],
-                self.wallet.pubkey(),
-                blockhash,
-            )
-            tx = Transaction.new_unsigned(msg)
-            tx.sign([self.wallet], blockhash)
+            with tracing.span("sign"):
+                msg = Message.new_with_blockhash(
+                    [transfer_ix, memo_ix],
+                    self.wallet.pubkey(),
+                    blockhash,
+                )
+                tx = Transaction.new_unsigned(msg)
+                tx.sign([self.wallet], blockhash)
 
             # Send with skip_preflight to avoid blockhash race
             from solana.rpc.types import TxOpts
-            resp = self.client.send_transaction(
-                tx,
-                opts=TxOpts(skip_preflight=True, preflight_commitment=Finalized),
-            )
+            from solana.rpc.commitment import Finalized
+            if self.fence and not self.fence():
+                log.critical(f"[{self.entity}] Lease lost; dropping {data['type']} instead of sending it twice")
+                return None
+            with tracing.span("send_transaction"):
+                resp = self.client.send_transaction(
+                    tx,
+                    opts=TxOpts(skip_preflight=True, preflight_commitment=Finalized),
+                )
             sig = str(resp.value)
             self.tx_count += 1
             return sig
@@ -436,70 +902,309 @@ class SolanaHeartbeatWriter:
 # ---------------------------------------------------------------------------
 
 class DeathProtocol:
-    """Handles death detection and declaration."""
+    """Handles death detection and declaration.
+
+    Liveness is measured from the newest real sample (record_heartbeat's
+    `at`), not from when the loop last sent a beat: the subject enters grace
+    at half the grace period without fresh data and dies at the full
+    period. next_transition() gives the wall time of the next change so
+    the loop can arm a timer for it instead of polling.
+    """
 
-    def __init__(self, grace_period_seconds: int = 300):
+    def __init__(self, grace_period_seconds: int = 300, entity_name: str = "Christopher Celaya",
+                 notes: str = "Pacemaker patient. Apple Watch proxy for heart data.",
+                 clock: Clock = SYSTEM_CLOCK):
+        self.clock = clock
         self.grace_period = grace_period_seconds
+        self.entity_name = entity_name
+        self.notes = notes
         self.last_heartbeat_time: float | None = None
         self.is_in_grace: bool = False
         self.is_dead: bool = False
 
-    def record_heartbeat(self):
-        self.last_heartbeat_time = time.time()
-        self.is_in_grace = False
+    def record_heartbeat(self, at: float | None = None):
+        """Record a sample taken at `at` (epoch seconds, default now). Never moves backwards."""
+        at = self.clock.time() if at is None else at
+        if self.last_heartbeat_time is None or at > self.last_heartbeat_time:
+            self.last_heartbeat_time = at
+            self.is_in_grace = False
 
-    def check_status(self) -> str:
+    def check_status(self, now: float | None = None) -> str:
         """Returns: 'alive', 'grace', or 'dead'"""
         if self.is_dead:
             return "dead"
         if self.last_heartbeat_time is None:
             return "alive"  # No data yet
 
-        elapsed = time.time() - self.last_heartbeat_time
-        if elapsed > self.grace_period:
+        elapsed = (self.clock.time() if now is None else now) - self.last_heartbeat_time
+        if elapsed >= self.grace_period:
             self.is_dead = True
             return "dead"
-        elif elapsed > (self.grace_period * 0.5):
+        elif elapsed >= (self.grace_period * 0.5):
             self.is_in_grace = True
             return "grace"
         return "alive"
 
+    def next_transition(self, now: float | None = None) -> tuple[float, str] | None:
+        """(epoch, "grace" | "death") of the next status change, or None if none is pending."""
+        if self.is_dead or self.last_heartbeat_time is None:
+            return None
+        grace_at = self.last_heartbeat_time + self.grace_period * 0.5
+        if (self.clock.time() if now is None else now) < grace_at:
+            return grace_at, "grace"
+        return self.last_heartbeat_time + self.grace_period, "death"
+
     def grace_seconds_remaining(self) -> int:
         if self.last_heartbeat_time is None:
             return self.grace_period
-        elapsed = time.time() - self.last_heartbeat_time
+        elapsed = self.clock.time() - self.last_heartbeat_time
         return max(0, int(self.grace_period - elapsed))
 
-    def generate_death_certificate(self, last_bpm: dict, total_beats: int) -> dict:
+    def snapshot(self) -> dict:
+        return {"last_heartbeat_time": self.last_heartbeat_time, "is_in_grace": self.is_in_grace,
+                "is_dead": self.is_dead}
+
+    def restore(self, state: dict, timing: bool = True):
+        """Restore a snapshot(). Without `timing` only a declared death carries over."""
+        self.is_dead = bool(state.get("is_dead"))
+        if timing:
+            self.last_heartbeat_time = state.get("last_heartbeat_time")
+            self.is_in_grace = bool(state.get("is_in_grace"))
+
+    def generate_death_certificate(self, last_bpm: Reading | None, total_beats: int) -> dict:
         return {
             "death_certificate": {
-                "entity": "Christopher Celaya",
-                "last_heartbeat": last_bpm,
+                "entity": self.entity_name,
+                "last_heartbeat": last_bpm.to_dict() if last_bpm else None,
                 "total_heartbeats_recorded": total_beats,
-                "time_of_death_declaration": datetime.now(timezone.utc).isoformat(),
+                "time_of_death_declaration": self.clock.now(timezone.utc).isoformat(),
                 "cause": "No heartbeat data received within grace period",
                 "grace_period_seconds": self.grace_period,
-                "notes": "Pacemaker patient. Apple Watch proxy for heart data.",
+                "notes": self.notes,
             }
         }
 
+# ---------------------------------------------------------------------------
+# Subjects
+# ---------------------------------------------------------------------------
+
+def subject_specs(config: dict) -> list[dict]:
+    """Monitored subjects from config["subjects"].
+
+    Without a `subjects` list the top-level keys describe a single subject
+    (Christopher), exactly as before. Each list entry needs an `id` and a
+    `wallet_path`; other keys (name, grace_period_seconds, art_output_dir,
+    data_source, data_file, notes) default to the top-level values.
+    """
+    base = {
+        "id": DEFAULT_ENTITY,
+        "name": "Christopher Celaya",
+        "wallet_path": config.get("wallet_path"),
+        "grace_period_seconds": config.get("grace_period_seconds", 300),
+        "art_output_dir": config.get("art_output_dir", "art"),
+        "data_source": config.get("data_source", "mock"),
+        "data_file": config.get("data_file", ""),
+        "notes": "Pacemaker patient. Apple Watch proxy for heart data.",
+    }
+    entries = config.get("subjects")
+    if not entries:
+        return [base]
+    specs, seen = [], set()
+    for entry in entries:
+        entity = str(entry.get("id", "")).strip()
+        if not entity or not entry.get("wallet_path"):
+            raise ValueError(f"Subject needs an id and a wallet_path: {entry}")
+        if entity in seen:
+            raise ValueError(f"Duplicate subject id: {entity}")
+        seen.add(entity)
+        specs.append({
+            **base,
+            "name": entity,
+            "art_output_dir": f"{base['art_output_dir']}/{entity}",
+            "notes": "Apple Watch proxy for heart data.",
+            **entry,
+            "id": entity,
+        })
+    return specs
+
+
+class Subject:
+    """One monitored human: wallet-bound writer, death protocol and beat state.
+
+    Push sources (the live receiver) notify the main loop when samples
+    arrive; pull sources (mock, file replay) are read at each deadline.
+    The subject's timers live in the loop's DeadlineSchedulers, keyed by id;
+    its beat cadence (and drift) comes from its Ticker.
+    """
+
+    __slots__ = ("id", "name", "source", "writer", "death", "art_dir", "ticker", "total_beats",
+                 "last_sig", "last_bpm", "bpm_history", "art_count", "status", "publish_beat",
+                 "push", "waiting")
+
+    def __init__(self, entity: str, name: str, source, writer: "SolanaHeartbeatWriter",
+                 death: "DeathProtocol", art_dir: Path, ticker: Ticker):
+        self.id = entity
+        self.name = name
+        self.source = source
+        self.writer = writer
+        self.death = death
+        self.art_dir = art_dir
+        self.ticker = ticker
+        self.total_beats = 0
+        self.last_sig: str | None = None
+        self.last_bpm: Reading | None = None
+        self.bpm_history: deque = deque(maxlen=100)  # recent BPM for art generation
+        self.art_count = 0
+        self.status = "alive"
+        # Only the live receiver has subscribers to push beats to
+        self.publish_beat = getattr(source, "publish_beat", None)
+        self.push = hasattr(source, "set_notify")
+        self.waiting = False
+
+    def snapshot(self) -> dict:
+        """Checkpoint form of the beat state (see restore)."""
+        last = self.last_bpm
+        return {
+            "total_beats": self.total_beats,
+            "last_sig": self.last_sig,
+            "art_count": self.art_count,
+            "status": self.status,
+            "bpm_history": list(self.bpm_history),
+            "last_bpm": [last.bpm, last.epoch, last.source, last.watch_id, last.data_type] if last else None,
+            "death": self.death.snapshot(),
+        }
+
+    def restore(self, state: dict, timing: bool = True):
+        """Resume from a snapshot(); `timing` also restores grace/death timing."""
+        self.total_beats = state.get("total_beats", 0)
+        self.last_sig = state.get("last_sig")
+        self.art_count = state.get("art_count", 0)
+        self.bpm_history.extend(state.get("bpm_history", ()))
+        last = state.get("last_bpm")
+        if last:
+            self.last_bpm = Reading(*last)
+        self.death.restore(state.get("death", {}), timing)
+        self.status = "dead" if self.death.is_dead else state.get("status", "alive") if timing else "alive"
+
+
+class ArrivalQueue:
+    """Entities with newly arrived samples, and the main loop's single wait.
+
+    Receiver threads put() entity ids; the main loop blocks in wait() on one
+    socket until an arrival, a signal (the socket doubles as the signal
+    wakeup fd) or the timeout for the next deadline. Arrivals for the same
+    entity coalesce until the loop next wakes.
+    """
+
+    def __init__(self):
+        self._rsock, self._wsock = socket.socketpair()
+        self._rsock.setblocking(False)
+        self._wsock.setblocking(False)
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._rsock, selectors.EVENT_READ)
+        self._pending: set[str] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def wakeup_fd(self) -> int:
+        return self._wsock.fileno()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def put(self, entity: str):
+        with self._lock:
+            wake = not self._pending
+            self._pending.add(entity)
+        if wake:
+            try:
+                self._wsock.send(b"\0")
+            except BlockingIOError:
+                pass  # loop is already due to wake
+
+    def wait(self, timeout: float) -> set[str]:
+        """Block until an arrival, a signal or `timeout` (inf = no timeout); return arrived entity ids."""
+        if self._selector.select(None if timeout == math.inf else timeout):
+            try:
+                while self._rsock.recv(4096):
+                    pass
+            except BlockingIOError:
+                pass
+        with self._lock:
+            arrived, self._pending = self._pending, set()
+        return arrived
+
+    def close(self):
+        self._selector.close()
+        self._rsock.close()
+        self._wsock.close()
+
+
+def build_sources(config: dict, specs: list[dict],
+                  clock: Clock = SYSTEM_CLOCK) -> tuple[dict, "HealthKitSource | None"]:
+    """Heartbeat source per subject id. All healthkit subjects share one receiver."""
+    sources = {}
+    live = [spec["id"] for spec in specs if spec["data_source"] == "healthkit"]
+    receiver = None
+    if live:
+        listen_port = config.get("healthkit_listen_port", 8080)
+        receiver = HealthKitSource(
+            listen_port=listen_port,
+            max_body_bytes=config.get("healthkit_max_body_bytes"),
+            buffer_capacity=config.get("healthkit_buffer_capacity", 4096),
+            max_stream_bytes=config.get("healthkit_max_stream_bytes"),
+            dedup_window=config.get("healthkit_dedup_window_seconds", 2.0),
+            stream_buffer=config.get("healthkit_stream_buffer", 256),
+            max_stream_clients=config.get("healthkit_max_stream_clients", 64),
+            entities=live,
+            clock=clock,
+        )
+        log.info(f"Using LIVE Apple Watch source (HTTP receiver on port {listen_port})")
+    for spec in specs:
+        kind = spec["data_source"]
+        if kind == "healthkit":
+            sources[spec["id"]] = receiver if len(live) == 1 else receiver.for_entity(spec["id"])
+        elif kind == "synthetic":
+            seed = config.get("synthetic_seed")
+            sources[spec["id"]] = SyntheticHeartbeatSource(
+                seed=None if seed is None else seed + len(sources),
+                rate_hz=config.get("synthetic_rate_hz", 1.0),
+                clock=clock,
+                test_death=config.get("synthetic_test_death", False),
+            )
+            log.info(f"[{spec['id']}] Using SYNTHETIC heartbeat source (seed {seed})")
+        elif kind == "file":
+            sources[spec["id"]] = FileHeartbeatSource(
+                spec["data_file"],
+                speed=config.get("replay_speed", 0),
+                start=config.get("replay_start"),
+                clock=clock,
+            )
+            log.info(f"[{spec['id']}] Using FILE heartbeat source (real Apple Watch data)")
+        else:
+            sources[spec["id"]] = MockHeartbeatSource(clock)
+            log.info(f"[{spec['id']}] Using MOCK heartbeat source")
+    return sources, receiver
+
 # ---------------------------------------------------------------------------
 # Dashboard Display
 # ---------------------------------------------------------------------------
 
-def print_dashboard(bpm_data: dict, total_beats: int, last_sig: str | None,
-                    status: str, grace_remaining: int, start_time: float):
-    """Print monitoring dashboard to stdout."""
-    uptime = int(time.time() - start_time)
+def dashboard_lines(bpm_data: Reading | None, total_beats: int, last_sig: str | None,
+                    status: str, grace_remaining: int, start_time: float, next_beat: float,
+                    clock: Clock = SYSTEM_CLOCK) -> list[str]:
+    """Single-subject monitoring dashboard."""
+    uptime = int(clock.time() - start_time)
     hours, remainder = divmod(uptime, 3600)
     minutes, seconds = divmod(remainder, 60)
 
-    os.system("clear" if os.name != "nt" else "cls")
-    print("=" * 60)
-    print("  MORTEM v2 - HUMAN HEARTBEAT STREAM")
-    print("  Streaming to Solana Devnet")
-    print("=" * 60)
-    print()
+    lines = [
+        "=" * 60,
+        "  MORTEM v2 - HUMAN HEARTBEAT STREAM",
+        "  Streaming to Solana Devnet",
+        "=" * 60,
+        "",
+    ]
 
     # Status indicator
     if status == "alive":
@@ -509,197 +1214,655 @@ def print_dashboard(bpm_data: dict, total_beats: int, last_sig: str | None,
     else:
         status_display = "DECEASED"
 
-    print(f"  Status:          {status_display}")
-    print(f"  Current BPM:     {bpm_data['bpm']}")
-    print(f"  Active Watch:    {bpm_data['source']}")
-    print(f"  Timestamp:       {bpm_data['timestamp']}")
-    print(f"  Beats Recorded:  {total_beats}")
-    print(f"  Uptime:          {hours:02d}:{minutes:02d}:{seconds:02d}")
-    print()
+    lines.append(f"  Status:          {status_display}")
+    if bpm_data:
+        lines.append(f"  Current BPM:     {bpm_data.bpm}")
+        lines.append(f"  Active Watch:    {bpm_data.source}")
+        lines.append(f"  Timestamp:       {bpm_data.timestamp}")
+    else:
+        lines.append("  Current BPM:     (waiting for data)")
+        lines.append("  Active Watch:    -")
+        lines.append("  Timestamp:       -")
+    lines.append(f"  Beats Recorded:  {total_beats}")
+    lines.append(f"  Uptime:          {hours:02d}:{minutes:02d}:{seconds:02d}")
+    lines.append("")
 
     if last_sig:
-        print(f"  Last TX:         {last_sig[:20]}...")
-        print(f"  Explorer:        https://explorer.solana.com/tx/{last_sig}?cluster=devnet")
+        lines.append(f"  Last TX:         {last_sig[:20]}...")
+        lines.append(f"  Explorer:        https://explorer.solana.com/tx/{last_sig}?cluster=devnet")
     else:
-        print("  Last TX:         (none yet)")
+        lines.append("  Last TX:         (none yet)")
+        lines.append("")
+
+    lines.append("")
+    lines.append("-" * 60)
+    lines.append(f"  [{clock.now().strftime('%H:%M:%S')}] Next beat in ~{next_beat:.0f}s")
+    lines.append("-" * 60)
+    return lines
+
+def subjects_dashboard_lines(subjects: list, start_time: float, next_beat: float,
+                             clock: Clock = SYSTEM_CLOCK) -> list[str]:
+    """Multi-subject dashboard: one line per subject."""
+    uptime = int(clock.time() - start_time)
+    hours, remainder = divmod(uptime, 3600)
+    minutes, seconds = divmod(remainder, 60)
 
-    print()
-    print("-" * 60)
-    print(f"  [{datetime.now().strftime('%H:%M:%S')}] Next beat in ~60s")
-    print("-" * 60)
+    lines = [
+        "=" * 72,
+        f"  MORTEM v2 - HUMAN HEARTBEAT STREAM ({len(subjects)} subjects)",
+        f"  Uptime {hours:02d}:{minutes:02d}:{seconds:02d}",
+        "=" * 72,
+        f"  {'ENTITY':<20} {'STATUS':<10} {'BPM':>5} {'BEATS':>8}  LAST TX",
+    ]
+    for subj in subjects[:40]:
+        bpm = subj.last_bpm.bpm if subj.last_bpm else "-"
+        sig = f"{subj.last_sig[:20]}..." if subj.last_sig else "(none yet)"
+        lines.append(f"  {subj.id[:20]:<20} {subj.status.upper():<10} {bpm:>5} {subj.total_beats:>8}  {sig}")
+    if len(subjects) > 40:
+        lines.append(f"  ... and {len(subjects) - 40} more")
+    lines.append("-" * 72)
+    lines.append(f"  [{clock.now().strftime('%H:%M:%S')}] Next beat in ~{next_beat:.0f}s")
+    lines.append("-" * 72)
+    return lines
 
 # ---------------------------------------------------------------------------
 # Main Loop
 # ---------------------------------------------------------------------------
 
-def main():
-    config = load_config()
-
-    # Load wallet
-    wallet = load_wallet(config["wallet_path"])
-    log.info(f"Wallet loaded: {wallet.pubkey()}")
-
-    # Connect to Solana
-    rpc_url = config.get("rpc_endpoint", "https://api.devnet.solana.com")
-    client = Client(rpc_url)
-    log.info(f"Connected to Solana: {rpc_url}")
-
-    # Check balance
-    balance = client.get_balance(wallet.pubkey())
+def check_balance(client: Client, wallet: Keypair, label: str):
+    try:
+        balance = client.get_balance(wallet.pubkey())
+    except Exception as e:
+        log.warning(f"[{label}] Balance check failed: {e}")
+        return
     sol_balance = balance.value / 1_000_000_000
-    log.info(f"Wallet balance: {sol_balance:.4f} SOL")
+    log.info(f"[{label}] Wallet balance: {sol_balance:.4f} SOL")
 
     if sol_balance < 0.01:
         log.warning("Low balance! Request airdrop: solana airdrop 2 --url devnet")
-        log.info("Requesting airdrop...")
-        try:
-            client.request_airdrop(wallet.pubkey(), 2_000_000_000)
-            time.sleep(5)
-            balance = client.get_balance(wallet.pubkey())
-            log.info(f"New balance: {balance.value / 1_000_000_000:.4f} SOL")
-        except Exception as e:
-            log.error(f"Airdrop failed: {e}. Fund wallet manually.")
+        request_airdrop(client, wallet)
 
-    # Init components
-    data_source = config.get("data_source", "mock")
-    if data_source == "healthkit":
-        listen_port = config.get("healthkit_listen_port", 8080)
-        heartbeat_source = HealthKitSource(listen_port=listen_port)
-        log.info(f"Using LIVE Apple Watch source (HTTP receiver on port {listen_port})")
-    elif data_source == "file":
-        data_file = config.get("data_file", "")
-        heartbeat_source = FileHeartbeatSource(data_file)
-        log.info("Using FILE heartbeat source (real Apple Watch data)")
-    else:
-        heartbeat_source = MockHeartbeatSource()
-        log.info("Using MOCK heartbeat source")
-    writer = SolanaHeartbeatWriter(
-        client=client,
-        wallet=wallet,
-        lamports=config.get("lamports", 1000),
-    )
-    death = DeathProtocol(
-        grace_period_seconds=config.get("grace_period_seconds", 300),
-    )
 
+def request_airdrop(client: Client, wallet: Keypair):
+    log.info("Requesting airdrop...")
+    try:
+        client.request_airdrop(wallet.pubkey(), 2_000_000_000)
+        time.sleep(5)
+        balance = client.get_balance(wallet.pubkey())
+        log.info(f"New balance: {balance.value / 1_000_000_000:.4f} SOL")
+    except Exception as e:
+        log.error(f"Airdrop failed: {e}. Fund wallet manually.")
+
+
+def check_balances(client: Client, wallets: list):
+    """Check (label, wallet) balances on a background thread.
+
+    A low balance only warrants a warning and an airdrop request, so the
+    RPC round-trips (and the airdrop's wait) stay off the way to the first
+    beat.
+    """
+    def run():
+        for label, wallet in wallets:
+            check_balance(client, wallet, label)
+    threading.Thread(target=run, name="balance", daemon=True).start()
+
+
+def emit_beat(subj: Subject, bpm_data: Reading, status: str,
+              span=tracing.NULL_SPAN) -> tuple[str | None, float]:
+    """Send the transaction for one subject's beat (runs on the submission pool).
+
+    Returns the signature (None on failure) and the send latency in seconds.
+    The send is traced under `span`, the beat's root span.
+    """
+    began = time.perf_counter()
+    with tracing.use(span):
+        if status == "dead":
+            sig = subj.writer.send_death_declaration(bpm_data, subj.total_beats)
+        elif status == "grace":
+            sig = subj.writer.send_grace_period(bpm_data, subj.death.grace_seconds_remaining())
+        else:
+            sig = subj.writer.send_heartbeat(bpm_data, subj.total_beats)
+    return sig, time.perf_counter() - began
+
+
+def restore_checkpoint(checkpointer: Checkpointer, subjects: list, clock: Clock):
+    """Resume beat counters, art count and last signature from the checkpoint.
+
+    Grace/death timing is only restored if the checkpoint is younger than
+    the subject's grace period: a longer outage of the stream itself says
+    nothing about the subject, so its liveness clock starts fresh.
+    """
+    began = time.perf_counter()
+    try:
+        state = checkpointer.load()
+    except (OSError, ValueError) as e:
+        log.warning(f"Ignoring checkpoint, starting cold: {e}")
+        return
+    if state is None:
+        log.info(f"No checkpoint at {checkpointer.path}, starting cold")
+        return
+    age = clock.time() - state.get("saved_at", 0)
+    saved = state.get("subjects", {})
+    restored = []
+    for subj in subjects:
+        if subj.id in saved:
+            subj.restore(saved[subj.id], timing=age < subj.death.grace_period)
+            restored.append(subj)
+    elapsed_ms = (time.perf_counter() - began) * 1000
+    log.info(f"Warm start from {checkpointer.path.name} ({age:.0f}s old) in {elapsed_ms:.2f}ms: "
+             f"{len(restored)} subjects, {sum(subj.total_beats for subj in restored)} beats")
+    for subj in restored:
+        if subj.status == "dead":
+            log.warning(f"[{subj.id}] Declared dead before this restart; not monitoring")
+
+
+def save_checkpoint(checkpointer: Checkpointer, subjects: list, clock: Clock, force: bool = False):
+    try:
+        checkpointer.save({"saved_at": clock.time(),
+                           "subjects": {subj.id: subj.snapshot() for subj in subjects}}, force)
+    except OSError as e:
+        log.warning(f"Checkpoint save failed (non-fatal): {e}")
+
+
+def main(clock: Clock = SYSTEM_CLOCK, duration: float | None = None, config: dict | None = None,
+         client=None):
+    """Run the stream. With a VirtualClock (and `duration` seconds to stop
+    after) a long run of beats, grace periods and art completes in seconds.
+
+    `config` replaces config.yaml (and hot reload, which re-reads it), and
+    `client` the Solana RPC client built from rpc_endpoint; simulate.py
+    passes both to run without a network.
+    """
+    injected = config is not None
+    config = config if injected else load_config()
+    try:
+        setup_logging(LOG_FILE, config)
+    except ValueError as e:
+        log.error(f"Invalid logging config: {e}")
+        sys.exit(1)
+    if config.get("trace_path"):
+        # Per-beat spans, from the sample's arrival to its transaction
+        tracing.TRACER.configure(Path(__file__).parent / config["trace_path"], "heartbeat",
+                                 config.get("trace_max_bytes", 10 * 2**20), config.get("trace_backups", 5))
+        log.info(f"Tracing beats to {config['trace_path']}")
+    try:
+        specs = subject_specs(config)
+    except ValueError as e:
+        log.error(f"Invalid subjects config: {e}")
+        sys.exit(1)
+    multi = len(specs) > 1
+
+    # Beats run on a monotonic grid (fixed_rate) so slow sends don't push the cadence later
     interval = config.get("heartbeat_interval_seconds", 60)
-    total_beats = 0
-    last_sig = None
-    last_bpm = None
-    start_time = time.time()
-    bpm_history = []  # Track recent BPM for art generation
+    tick_policy = config.get("tick_policy", "fixed_rate")
+    missed_ticks = config.get("missed_ticks", "skip")
+    try:
+        Ticker(interval, tick_policy, missed_ticks, clock=clock.monotonic)
+    except ValueError as e:
+        log.error(f"Invalid tick config: {e}")
+        sys.exit(1)
+
+    # Hot standby needs the checkpoint to continue the leader's beat count
+    checkpoint_path = config.get("checkpoint_path", "heartbeat_state.json")
+    lease_path = config.get("lease_path", "")
+    if lease_path and not checkpoint_path:
+        log.error("lease_path needs checkpoint_path: a standby must resume the leader's beat count")
+        sys.exit(1)
 
-    # Art generation setup
+    # Connect to Solana
+    rpc_url = config.get("rpc_endpoint", "https://api.devnet.solana.com")
+    client = timed(client or Client(rpc_url), RPC)  # every call's latency, by method
+    log.info(f"Connected to Solana: {rpc_url}")
+    if config.get("metrics_port"):
+        serve(config["metrics_port"])
+        log.info(f"Metrics at http://0.0.0.0:{config['metrics_port']}/metrics")
+
+    # Shared submission engine: one RPC client, one blockhash, a small send pool
+    blockhashes = BlockhashCache(client)
+    pool = ThreadPoolExecutor(max_workers=max(1, min(config.get("submit_workers", 8), len(specs))),
+                              thread_name_prefix="submit")
+
+    # Init components (sources are opened once this process leads: the
+    # live receiver's port belongs to the leader)
+    parts = []
+    wallets = []
+    for spec in specs:
+        # Load wallet
+        wallet = load_wallet(spec["wallet_path"])
+        log.info(f"[{spec['id']}] Wallet loaded: {wallet.pubkey()}")
+        wallets.append((spec["id"], wallet))
+        writer = SolanaHeartbeatWriter(
+            client=client,
+            wallet=wallet,
+            lamports=config.get("lamports", 1000),
+            entity=spec["id"],
+            blockhashes=blockhashes,
+            clock=clock,
+        )
+        death = DeathProtocol(
+            grace_period_seconds=spec["grace_period_seconds"],
+            entity_name=spec["name"],
+            notes=spec["notes"],
+            clock=clock,
+        )
+        art_dir = Path(__file__).parent / spec["art_output_dir"]
+        art_dir.mkdir(parents=True, exist_ok=True)
+        parts.append((spec, writer, death, art_dir))
+    check_balances(client, wallets)
+
+    # Art generation setup (human_art itself is imported at the first art beat)
     art_interval = config.get("art_every_n_beats", 50)
-    art_dir = Path(__file__).parent / config.get("art_output_dir", "art")
-    art_dir.mkdir(exist_ok=True)
-    art_count = 0
-    try:
-        from human_art import generate_human_art
-        art_enabled = True
-        log.info(f"Human art generation enabled. Every {art_interval} beats → {art_dir}")
-    except ImportError:
-        art_enabled = False
+    art_enabled = importlib.util.find_spec("human_art") is not None
+    if art_enabled:
+        log.info(f"Human art generation enabled. Every {art_interval} beats → "
+                 f"{parts[0][3] if not multi else 'per-subject art dirs'}")
+    else:
         log.warning("human_art.py not found — art generation disabled")
 
     # Graceful shutdown
     running = True
+    stopping = threading.Event()
     def shutdown(sig, frame):
         nonlocal running
         log.info("Shutting down heartbeat stream...")
         running = False
+        stopping.set()
     signal.signal(signal.SIGINT, shutdown)
     signal.signal(signal.SIGTERM, shutdown)
+    # SIGUSR1: CPU profile window, SIGUSR2: allocation diff (dumps next to the log)
+    try:
+        profiler = profiling.install("heartbeat", log_path(LOG_FILE).parent, config)
+    except ValueError as e:
+        log.error(f"Invalid profiling config: {e}")
+        sys.exit(1)
 
-    log.info(f"Heartbeat stream started. Interval: {interval}s, Grace: {death.grace_period}s")
-
-    while running:
+    # Hot standby: only the lease holder sends beats. A standby keeps its
+    # wallet, RPC connection and blockhash warm until the lease is free.
+    lease = None
+    if lease_path:
         try:
-            # Get BPM
-            bpm_data = heartbeat_source.get_bpm()
-
-            # If waiting for first live reading, skip TX but keep looping
-            if bpm_data.get("data_type") == "waiting" or bpm_data.get("bpm", 0) == 0:
-                log.info("Waiting for live Apple Watch data...")
-                print_dashboard(
-                    bpm_data, total_beats, last_sig, "alive",
-                    death.grace_seconds_remaining(), start_time,
-                )
-                time.sleep(interval)
-                continue
-
-            last_bpm = bpm_data
-            total_beats += 1
-            death.record_heartbeat()
-
-            # Check status
-            status = death.check_status()
-
-            if status == "dead":
-                log.critical("DEATH PROTOCOL TRIGGERED")
-                sig = writer.send_death_declaration(last_bpm, total_beats)
-                cert = death.generate_death_certificate(last_bpm, total_beats)
-                log.critical(f"Death certificate: {json.dumps(cert, indent=2)}")
-                # Save death certificate
-                cert_path = Path(__file__).parent / "death_certificate.json"
-                with open(cert_path, "w") as f:
-                    json.dump(cert, f, indent=2)
-                log.critical(f"Death certificate saved to {cert_path}")
-                break
-
-            elif status == "grace":
-                remaining = death.grace_seconds_remaining()
-                sig = writer.send_grace_period(bpm_data, remaining)
-                last_sig = sig
-                log.warning(f"GRACE PERIOD: {remaining}s remaining")
-
-            else:
-                sig = writer.send_heartbeat(bpm_data, total_beats)
-                last_sig = sig
-                if sig:
-                    log.info(f"Beat #{total_beats}: {bpm_data['bpm']} BPM | TX: {sig[:20]}...")
-                else:
-                    log.warning(f"Beat #{total_beats}: {bpm_data['bpm']} BPM | TX FAILED")
-
-            # Track BPM history for art generation
-            bpm_history.append(bpm_data["bpm"])
-            if len(bpm_history) > 100:
-                bpm_history = bpm_history[-100:]
-
-            # Generate art every N beats
-            if art_enabled and total_beats % art_interval == 0 and status == "alive":
+            lease = Lease(Path(__file__).parent / lease_path,
+                          config.get("lease_ttl_seconds", interval / 2), clock=clock.time)
+        except ValueError as e:
+            log.error(f"Invalid lease config: {e}")
+            sys.exit(1)
+        if not lease.try_acquire():
+            log.info(f"Standby: lease held by {lease.current().get('holder')}, waiting to take over")
+            while running and not lease.try_acquire():
                 try:
+                    blockhashes.get()
+                except Exception as e:
+                    log.warning(f"Standby blockhash refresh failed: {e}")
+                clock.wait(stopping.wait, lease.ttl / 4)
+            if not running:
+                pool.shutdown(wait=False)
+                profiler.close()
+                log.info("Standby stopped without taking over")
+                return
+        log.info(f"Leading (lease term {lease.term}, ttl {lease.ttl:.0f}s, holder {lease.holder})")
+        # A send that stalls past the ttl must not go out after a takeover
+        lease_lost = threading.Event()
+
+        def fence() -> bool:
+            if lease.held():
+                return True
+            lease_lost.set()
+            return False
+
+        for _, writer, _, _ in parts:
+            writer.fence = fence
+
+    sources, receiver = build_sources(config, specs, clock)
+    subjects = []
+    for spec, writer, death, art_dir in parts:
+        ticker = Ticker(interval, tick_policy, missed_ticks, clock=clock.monotonic)
+        subjects.append(Subject(spec["id"], spec["name"], sources[spec["id"]], writer, death,
+                                art_dir, ticker))
+
+    # Warm start: beat counters and liveness timing survive restarts (and a
+    # standby taking over continues from the leader's last round)
+    checkpointer = None
+    if checkpoint_path:
+        checkpointer = Checkpointer(Path(__file__).parent / checkpoint_path,
+                                    fsync_interval=config.get("checkpoint_fsync_seconds", 10),
+                                    clock=clock.monotonic)
+        restore_checkpoint(checkpointer, subjects, clock)
+
+    start_time = clock.time()
+
+    # Dashboard: redrawn on its own thread, headless when stdout isn't a TTY
+    def render_dashboard() -> list[str]:
+        if multi:
+            next_beat = min((subj.ticker.delay() for subj in subjects if subj.status != "dead"), default=0.0)
+            return subjects_dashboard_lines(subjects, start_time, next_beat, clock)
+        subj = subjects[0]
+        return dashboard_lines(
+            subj.last_bpm, subj.total_beats, subj.last_sig, subj.status,
+            subj.death.grace_seconds_remaining(), start_time, subj.ticker.delay(), clock,
+        )
+    try:
+        panel = Dashboard(render_dashboard, refresh=config.get("dashboard_refresh_seconds", 1.0),
+                          mode=config.get("dashboard", "auto"))
+    except ValueError as e:
+        log.error(f"Invalid dashboard config: {e}")
+        sys.exit(1)
+    panel.start()
+
+    if multi:
+        log.info(f"Heartbeat stream started. {len(subjects)} subjects, Interval: {interval}s")
+    else:
+        log.info(f"Heartbeat stream started. Interval: {interval}s, Grace: {subjects[0].death.grace_period}s")
+
+    def finish_beat(subj: Subject, bpm_data: Reading, status: str, sig: str | None, fresh: bool,
+                    latency: float):
+        """Log, publish and draw art for one sent beat (main thread)."""
+        subj.status = status
+        tag = f"[{subj.id}] " if multi else ""
+        BEATS.labels(subj.id, status).inc()
+        # Structured fields for log_format: json
+        fields = {"entity": subj.id, "beat": subj.total_beats, "status": status,
+                  "bpm": bpm_data.bpm if bpm_data else None, "sig": sig,
+                  "latency_ms": round(latency * 1000, 1)}
+
+        if status == "dead":
+            log.critical(f"{tag}DEATH PROTOCOL TRIGGERED", extra=fields)
+            cert = subj.death.generate_death_certificate(subj.last_bpm, subj.total_beats)
+            log.critical(f"{tag}Death certificate: {json.dumps(cert, indent=2)}")
+            # Save death certificate
+            name = f"death_certificate_{subj.id}.json" if multi else "death_certificate.json"
+            cert_path = Path(__file__).parent / config.get("death_certificate_dir", "") / name
+            with open(cert_path, "w") as f:
+                json.dump(cert, f, indent=2)
+            log.critical(f"{tag}Death certificate saved to {cert_path}")
+            if subj.publish_beat:
+                subj.publish_beat({"status": "dead", "beat": subj.total_beats,
+                                   "bpm": subj.last_bpm.bpm, "signature": sig,
+                                   "timestamp": cert["death_certificate"]["time_of_death_declaration"]})
+            return
+
+        subj.last_sig = sig
+        if status == "grace":
+            log.warning(f"{tag}GRACE PERIOD: {subj.death.grace_seconds_remaining()}s remaining", extra=fields)
+        elif sig:
+            log.info(f"{tag}Beat #{subj.total_beats}: {bpm_data.bpm} BPM | TX: {sig[:20]}...", extra=fields)
+        else:
+            log.warning(f"{tag}Beat #{subj.total_beats}: {bpm_data.bpm} BPM | TX FAILED", extra=fields)
+
+        if subj.publish_beat:
+            subj.publish_beat({"status": status, "beat": subj.total_beats,
+                               "bpm": bpm_data.bpm, "signature": sig,
+                               "timestamp": bpm_data.timestamp,
+                               "interval": bpm_data.interval})
+        if not fresh:
+            return  # grace notice for a silent source, no new reading
+
+        # Track BPM history for art generation
+        subj.bpm_history.append(bpm_data.bpm)
+
+        # Generate art every N beats
+        if art_enabled and subj.total_beats % art_interval == 0 and status == "alive":
+            try:
+                with ART.time(), tracing.span("art"):
+                    from human_art import generate_human_art
                     art_result = generate_human_art(
-                        bpm=bpm_data["bpm"],
-                        timestamp=bpm_data["timestamp"],
-                        source=bpm_data.get("source", "Apple Watch"),
-                        watch_id=bpm_data.get("watch_id", 1),
-                        total_beats_recorded=total_beats,
-                        bpm_history=bpm_history[-50:],
-                        tx_signature=last_sig or "",
+                        bpm=bpm_data.bpm,
+                        timestamp=bpm_data.timestamp,
+                        source=bpm_data.source or "Apple Watch",
+                        watch_id=bpm_data.watch_id or 1,
+                        total_beats_recorded=subj.total_beats,
+                        bpm_history=list(subj.bpm_history)[-50:],
+                        tx_signature=sig or "",
                     )
-                    art_path = art_dir / art_result["filename"]
-                    with open(art_path, "w") as f:
-                        f.write(art_result["svg"])
-                    art_count += 1
-                    log.info(f"Art #{art_count}: {art_result['filename']} [{art_result['state']}]")
-                except Exception as art_err:
-                    log.warning(f"Art generation failed (non-fatal): {art_err}")
-
-            # Dashboard
-            print_dashboard(
-                bpm_data, total_beats, last_sig, status,
-                death.grace_seconds_remaining(), start_time,
-            )
+                art_path = subj.art_dir / art_result["filename"]
+                with open(art_path, "w") as f:
+                    f.write(art_result["svg"])
+                subj.art_count += 1
+                log.info(f"{tag}Art #{subj.art_count}: {art_result['filename']} [{art_result['state']}]")
+            except Exception as art_err:
+                log.warning(f"{tag}Art generation failed (non-fatal): {art_err}")
+
+    # Event loop: one wait covers sample arrivals, emission deadlines and
+    # liveness transitions. A push source's beat goes out when its reading
+    # arrives: at a deadline with nothing new the beat is held (up to
+    # arrival_hold) for the next arrival before a stale reading is sent.
+    # Grace and death fire from the newest real sample's age, on time,
+    # whether or not the source is producing anything.
+    arrival_hold = config.get("arrival_hold_seconds", interval / 2)
+    arrivals = ArrivalQueue()
+    for subj in subjects:
+        if subj.push:
+            subj.source.set_notify(arrivals.put)
+    signal.set_wakeup_fd(arrivals.wakeup_fd, warn_on_full_buffer=False)
+    GRACE_REMAINING.set_function(lambda: {subj.id: subj.death.grace_seconds_remaining() for subj in subjects})
+    TICK_DRIFT.set_function(lambda: {subj.id: subj.ticker.last_drift for subj in subjects})
+    ARRIVALS_PENDING.set_function(lambda: len(arrivals))
+
+    by_id = {subj.id: subj for subj in subjects}
+    beats = DeadlineScheduler()     # "due" / "hold", clock.monotonic()
+    liveness = DeadlineScheduler()  # "grace" / "death", epoch seconds
+
+    def arm_liveness(subj: Subject, wall: float):
+        transition = subj.death.next_transition(wall)
+        if transition:
+            liveness.schedule(subj.id, *transition)
+        else:
+            liveness.cancel(subj.id)
+
+    # Hot reload (SIGHUP, or config_watch_seconds): validated as a whole,
+    # then applied here between beats
+    def validate_reload(new: dict):
+        new_specs = subject_specs(new)
+        fixed = lambda spec: {k: v for k, v in spec.items() if k != "grace_period_seconds"}
+        if [fixed(spec) for spec in new_specs] != [fixed(spec) for spec in specs]:
+            raise ValueError("subjects: only grace_period_seconds can change without a restart")
+        for spec in new_specs:
+            try:
+                positive_number(spec["grace_period_seconds"])
+            except ValueError as e:
+                raise ValueError(f"{spec['id']} grace_period_seconds: {e}") from None
+
+    reloader = ConfigReloader(CONFIG_FILE, config, {
+        "heartbeat_interval_seconds": positive_number,
+        "grace_period_seconds": positive_number,
+        "art_every_n_beats": positive_int,
+        "rpc_endpoint": http_url,
+        "subjects": lambda entries: entries,  # per-subject grace; checked by validate_reload
+    }, validate=validate_reload, watch_interval=config.get("config_watch_seconds", 0))
+    if not injected:
+        reloader.install()
+
+    def apply_reload(changes: dict, now: float, wall: float):
+        nonlocal interval, arrival_hold, art_interval
+        if "heartbeat_interval_seconds" in changes:
+            interval = changes["heartbeat_interval_seconds"]
+            arrival_hold = config.get("arrival_hold_seconds", interval / 2)
+            for subj in subjects:
+                subj.ticker.set_interval(interval, now)
+                if beats.kind(subj.id) == "due":
+                    beats.schedule(subj.id, subj.ticker.next_due, "due")
+        if "grace_period_seconds" in changes or "subjects" in changes:
+            graces = {spec["id"]: spec["grace_period_seconds"] for spec in subject_specs(reloader.current)}
+            for subj in subjects:
+                subj.death.grace_period = graces[subj.id]
+                if subj.status != "dead":
+                    arm_liveness(subj, wall)  # the countdown continues from the last sample
+        if "art_every_n_beats" in changes:
+            art_interval = changes["art_every_n_beats"]
+        if "rpc_endpoint" in changes:
+            new_client = timed(Client(changes["rpc_endpoint"]), RPC)
+            blockhashes.set_client(new_client)
+            for subj in subjects:
+                subj.writer.client = new_client
+
+    deposed = False
+    renew_at = clock.monotonic() + lease.ttl / 3 if lease else math.inf
+
+    def keep_lease() -> bool:
+        """Renew the lease; on losing it, stop leading before another beat goes out."""
+        nonlocal deposed
+        try:
+            if lease.renew():
+                return True
+            holder = lease.current().get("holder")
+        except OSError as e:
+            holder = f"unknown ({e})"
+        log.critical(f"Lost the lease to {holder}; stepping down so no beat is sent twice")
+        deposed = True
+        return False
+
+    remaining_subjects = 0
+    for subj in subjects:
+        if subj.status == "dead":
+            continue
+        beats.schedule(subj.id, subj.ticker.next_due, "due")
+        arm_liveness(subj, clock.time())  # restored timing keeps counting down
+        remaining_subjects += 1
+    if not remaining_subjects:
+        log.critical(f"Every subject was declared dead before this restart. "
+                     f"Remove {checkpointer.path} to start over.")
+    end = math.inf if duration is None else clock.monotonic() + duration
+    while running and remaining_subjects:
+        try:
+            now, wall = clock.monotonic(), clock.time()
+            if now >= end:
+                break
+            timeout = min(beats.next_deadline() - now, liveness.next_deadline() - wall, end - now,
+                          renew_at - now)
+            arrived = clock.wait(arrivals.wait, max(0.0, timeout))
+            if not running:
+                break
+            now, wall = clock.monotonic(), clock.time()
+            if reloader.pending():
+                changes = reloader.check()
+                if changes:
+                    apply_reload(changes, now, wall)
+            if now >= renew_at:
+                if not keep_lease():
+                    break
+                renew_at = now + lease.ttl / 3
+
+            # Decide which subjects beat on this wake-up
+            due = []
+            for entity, kind in beats.pop_due(now):
+                subj = by_id[entity]
+                if kind == "hold":
+                    due.append(subj)  # nothing arrived during the hold
+                elif subj.push and subj.last_bpm and not subj.source.has_pending():
+                    beats.schedule(entity, now + arrival_hold, "hold")
+                else:
+                    due.append(subj)
+            for entity in arrived:
+                subj = by_id.get(entity)
+                if subj and subj.status != "dead" and (subj.waiting or beats.kind(entity) == "hold"):
+                    beats.cancel(entity)
+                    due.append(subj)
+
+            # Get BPM for every due subject
+            ready = []
+            spans = {}  # root span of each ready subject's beat
+            newly_waiting = 0
+            for subj in due:
+                began = time.time()
+                bpm_data = subj.source.get_bpm()
+                # If waiting for first live reading, skip TX until one arrives
+                if bpm_data.data_type == "waiting" or not bpm_data.bpm:
+                    newly_waiting += not subj.waiting
+                    subj.waiting = True
+                    if not subj.push:
+                        beats.schedule(subj.id, subj.ticker.fire(now))
+                    continue
+                if subj.waiting and subj.push:
+                    subj.ticker.reset(now)  # cadence restarts from the first arrival
+                subj.waiting = False
+                subj.last_bpm = bpm_data
+                subj.total_beats += 1
+                subj.death.record_heartbeat(bpm_data.fresh_at)
+                beats.schedule(subj.id, subj.ticker.fire(now))
+                # The beat continues the trace of the request that delivered its sample
+                beat = spans[subj.id] = tracing.TRACER.trace("beat", parent=bpm_data.trace, start=began,
+                                                             entity=subj.id, beat=subj.total_beats)
+                beat.child("get_bpm", start=began, bpm=bpm_data.bpm).end()
+                # Check status
+                ready.append((subj, bpm_data, subj.death.check_status(wall), True))
+                arm_liveness(subj, wall)
+
+            # Liveness transitions: no fresh sample for half / all of the grace period
+            beating = {subj.id for subj, *_ in ready}
+            for entity, _ in liveness.pop_due(wall):
+                subj = by_id[entity]
+                status = subj.death.check_status(wall)
+                arm_liveness(subj, wall)
+                if status != "alive" and status != subj.status and entity not in beating:
+                    ready.append((subj, subj.last_bpm, status, False))
+                    spans[entity] = tracing.TRACER.trace("beat", entity=entity, beat=subj.total_beats)
+
+            if newly_waiting:
+                if multi:
+                    log.info(f"Waiting for live data from {newly_waiting} subjects...")
+                else:
+                    log.info("Waiting for live Apple Watch data...")
+                panel.poke()
+            if not ready:
+                continue
+            if lease and not keep_lease():
+                break
 
-            # Wait
-            time.sleep(interval)
+            # Transactions for every ready subject go out concurrently
+            sent = list(pool.map(lambda item: emit_beat(*item[:3], spans[item[0].id]), ready))
+            if lease and lease_lost.is_set():
+                # Fenced mid-round: the new leader resumes from our last checkpoint
+                log.critical("Lost the lease during a send; stepping down so no beat is sent twice")
+                deposed = True
+                break
+            for (subj, bpm_data, status, fresh), (sig, latency) in zip(ready, sent):
+                with tracing.use(spans[subj.id].set(status=status, sig=sig)):
+                    finish_beat(subj, bpm_data, status, sig, fresh, latency)
+                if fresh and tick_policy == "fixed_delay" and beats.kind(subj.id) == "due":
+                    beats.schedule(subj.id, subj.ticker.done())
+
+            for subj, _, status, _ in ready:
+                if status == "dead":
+                    beats.cancel(subj.id)
+                    liveness.cancel(subj.id)
+                    remaining_subjects -= 1
+            if checkpointer:
+                # One save per round, traced under the round's last beat
+                with tracing.use(spans[ready[-1][0].id]), tracing.span("checkpoint", beats=len(ready)):
+                    save_checkpoint(checkpointer, subjects, clock,
+                                    force=any(status == "dead" for _, _, status, _ in ready))
+            for beat in spans.values():
+                beat.end()
+            if not remaining_subjects:
+                break
+            panel.poke()
 
         except Exception as e:
             log.error(f"Loop error: {e}")
-            time.sleep(5)
-
-    log.info(f"Heartbeat stream stopped. Total beats: {total_beats}")
+            clock.sleep(5)
+
+    panel.stop()
+    signal.set_wakeup_fd(-1)
+    arrivals.close()
+    pool.shutdown(wait=False)
+    profiler.close()
+    reloader.close()
+    if receiver:
+        receiver.shutdown()
+    if checkpointer and not deposed:
+        save_checkpoint(checkpointer, subjects, clock, force=True)
+    if lease and not deposed:
+        try:
+            lease.release()  # the standby takes over on its next poll
+        except OSError as e:
+            log.warning(f"Lease release failed; standby takes over when it expires: {e}")
+    log.info(f"Heartbeat stream stopped. Total beats: {sum(subj.total_beats for subj in subjects)}")
+    ticks = [subj.ticker.stats() for subj in subjects if subj.ticker.ticks]
+    if ticks:
+        mean = sum(t["mean_drift_ms"] for t in ticks) / len(ticks)
+        worst = max(t["max_drift_ms"] for t in ticks)
+        log.info(f"Tick drift ({tick_policy}): mean {mean:.1f}ms, max {worst:.1f}ms, "
+                 f"skipped {sum(t['skipped'] for t in ticks)}, "
+                 f"caught up {sum(t['caught_up'] for t in ticks)}")
 
 
 if __name__ == "__main__":
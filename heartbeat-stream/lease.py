@@ -0,0 +1,115 @@
+"""
+MORTEM v2 — Leader Lease
+
+Lets two heartbeat_stream.py processes on one host run as leader and hot
+standby: only the holder of the lease sends beats.
+
+The lease is a small JSON record ({"holder", "expires", "term"}) in a local
+file. It is read and written only under an exclusive flock, so records are
+never torn. The leader renews it well before `expires`. A standby takes it
+once it has expired, whether the leader crashed, hung or lost its disk.
+Every change of holder bumps `term`.
+
+The leader renews before each round of sends, and a renewal fails once
+another process holds the lease. A round can still stall past the ttl
+(a slow RPC call, a GC pause), so each send is also fenced: held() is
+checked immediately before the transaction goes out. A deposed leader
+therefore drops its sends instead of sending a beat twice.
+"""
+
+import fcntl
+import json
+import os
+import socket
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class Lease:
+    """Time-limited, file-backed leadership for one process."""
+
+    def __init__(self, path: Path, ttl: float, holder: str | None = None, clock=time.time):
+        if ttl <= 0:
+            raise ValueError("lease ttl must be positive")
+        self.path = Path(path)
+        self.ttl = float(ttl)
+        self.holder = holder or f"{socket.gethostname()}:{os.getpid()}"
+        self.clock = clock
+        self.expires = 0.0  # our own lease's expiry, as last written
+        self.term = 0
+
+    @contextmanager
+    def _locked(self):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield fd
+        finally:
+            os.close(fd)  # releases the flock
+
+    @staticmethod
+    def _read(fd: int) -> dict:
+        os.lseek(fd, 0, os.SEEK_SET)
+        raw = b""
+        while chunk := os.read(fd, 4096):
+            raw += chunk
+        try:
+            record = json.loads(raw) if raw else {}
+        except ValueError:
+            return {}
+        return record if isinstance(record, dict) else {}
+
+    def _write(self, fd: int, record: dict):
+        data = json.dumps(record, separators=(",", ":")).encode("utf-8")
+        os.lseek(fd, 0, os.SEEK_SET)
+        os.ftruncate(fd, 0)
+        os.write(fd, data)
+
+    def _claim(self, steal: bool) -> bool:
+        with self._locked() as fd:
+            record = self._read(fd)
+            now = self.clock()
+            ours = record.get("holder") == self.holder
+            free = not record.get("holder") or record.get("expires", 0) <= now
+            if not ours and not (steal and free):
+                return False
+            term = record.get("term", 0) + (not ours)
+            self.expires = now + self.ttl
+            self.term = term
+            self._write(fd, {"holder": self.holder, "expires": self.expires, "term": term})
+            return True
+
+    def try_acquire(self) -> bool:
+        """Take (or keep) the lease if it is ours, free or expired."""
+        return self._claim(steal=True)
+
+    def renew(self) -> bool:
+        """Extend our lease by ttl; False if another process holds it now."""
+        return self._claim(steal=False)
+
+    def held(self) -> bool:
+        """True if we still hold the lease (the fence checked before each send).
+
+        Before our own expiry no one else can have taken it, so that is one
+        clock read; after it (we stalled) the record is checked under the lock
+        and renewed if it is still ours.
+        """
+        if self.expires > self.clock():
+            return True
+        try:
+            return self.renew()
+        except OSError:
+            return False
+
+    def release(self):
+        """Give the lease up so a standby can take over immediately."""
+        with self._locked() as fd:
+            if self._read(fd).get("holder") == self.holder:
+                self._write(fd, {"holder": None, "expires": 0, "term": self.term})
+        self.expires = 0.0
+
+    def current(self) -> dict:
+        """The lease record as it stands (holder, expires, term)."""
+        with self._locked() as fd:
+            return self._read(fd)
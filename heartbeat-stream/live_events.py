@@ -0,0 +1,139 @@
+"""
+MORTEM v2 — Live Event Stream
+
+Push channel for dashboards and status tools, served by the BPM receiver at
+GET /bpm/stream as server-sent events (or a push-only WebSocket when the
+client asks to upgrade). Every accepted sample and every emitted beat, with
+its transaction signature, is fanned out to the subscribers of its entity
+(or of every entity).
+
+Each subscriber gets a bounded queue. Publishing never waits: an event is
+encoded once and put_nowait() into every queue, and a subscriber whose
+queue is full (a stuck browser tab, a paused `curl`) is evicted instead of
+backpressuring ingestion.
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import struct
+
+log = logging.getLogger("heartbeat")
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+KEEPALIVE_SECONDS = 15.0
+
+_EVICT = object()  # sentinel queued to a subscriber being dropped
+
+
+def sse_frame(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+def ws_frame(event: str, data: dict) -> bytes:
+    """Unmasked WebSocket text frame carrying {"event": ..., "data": ...}."""
+    payload = json.dumps({"event": event, "data": data}, separators=(",", ":")).encode()
+    n = len(payload)
+    if n < 126:
+        head = struct.pack("!BB", 0x81, n)
+    elif n < 1 << 16:
+        head = struct.pack("!BBH", 0x81, 126, n)
+    else:
+        head = struct.pack("!BBQ", 0x81, 127, n)
+    return head + payload
+
+
+def ws_accept(key: str) -> str:
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+
+
+class _Subscriber:
+    __slots__ = ("queue", "websocket", "peer", "entity")
+
+    def __init__(self, maxsize: int, websocket: bool, peer: str, entity: str | None):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.websocket = websocket
+        self.peer = peer
+        self.entity = entity  # only this entity's events; None for all
+
+
+class EventHub:
+    """Fan-out of live events to SSE/WebSocket subscribers.
+
+    publish() is thread-safe: calls from the heartbeat loop are marshalled
+    onto the receiver's event loop with call_soon(). All subscriber state is
+    only touched on that loop.
+    """
+
+    def __init__(self, call_soon, buffer_size: int = 256, max_subscribers: int = 64):
+        self._call_soon = call_soon
+        self.buffer_size = buffer_size
+        self.max_subscribers = max_subscribers
+        self._subscribers: set[_Subscriber] = set()
+        self.published = 0
+        self.evicted = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: str, data: dict):
+        """Queue `event` for every subscriber. Safe from any thread."""
+        self._call_soon(self._fanout, event, data)
+
+    def _fanout(self, event: str, data: dict):
+        if not self._subscribers:
+            return
+        self.published += 1
+        sse = ws = None
+        entity = data.get("entity")
+        for sub in list(self._subscribers):
+            if sub.entity is not None and sub.entity != entity:
+                continue
+            if sub.websocket:
+                frame = ws = ws or ws_frame(event, data)
+            else:
+                frame = sse = sse or sse_frame(event, data)
+            try:
+                sub.queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                self._evict(sub)
+
+    def _evict(self, sub: _Subscriber):
+        self._subscribers.discard(sub)
+        self.evicted += 1
+        log.warning(f"[LIVE] Evicted slow stream subscriber {sub.peer}")
+        # Make room for the sentinel so the writer wakes up and exits
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.queue.put_nowait(_EVICT)
+
+    def subscribe(self, websocket: bool = False, peer: str = "?",
+                  entity: str | None = None) -> _Subscriber | None:
+        """Register a subscriber to `entity`'s events, or all with None (receiver
+        loop only). None if at capacity."""
+        if len(self._subscribers) >= self.max_subscribers:
+            return None
+        sub = _Subscriber(self.buffer_size, websocket, peer, entity)
+        self._subscribers.add(sub)
+        return sub
+
+    async def frames(self, sub: _Subscriber, hello: dict):
+        """Async iterator of encoded frames for one subscriber's response body."""
+        encode = ws_frame if sub.websocket else sse_frame
+        try:
+            yield encode("hello", hello)
+            while True:
+                try:
+                    frame = await asyncio.wait_for(sub.queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # SSE comment / WebSocket ping keeps proxies from idling us out
+                    yield b"\x89\x00" if sub.websocket else b": keepalive\n\n"
+                    continue
+                if frame is _EVICT:
+                    return
+                yield frame
+        finally:
+            self._subscribers.discard(sub)
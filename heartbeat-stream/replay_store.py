@@ -0,0 +1,281 @@
+"""
+MORTEM v2 — Binary Replay Store
+
+Compact, memory-mapped sidecar for HealthKit heart-rate exports.
+
+`heartrate_clean.json` (from christophers-mortem-integration/extract_heartrate.py)
+holds ~190k records as pretty-printed JSON. Loading it with json.load costs
+hundreds of MB of dicts before the first beat. Instead, the export is streamed
+once into a fixed-width binary file next to it, then mmap'd so every record is
+an O(1) struct unpack and RSS stays flat regardless of export size.
+
+Sidecar layout (little-endian):
+  header   — magic, version, record count, dictionary offset, source size,
+             source mtime_ns, source sha256
+  records  — RECORD_FMT per record, in the export's own order (newest-first)
+  trailer  — JSON {"sources": [...], "motions": [...]} dictionary tables
+
+The sidecar is rebuilt whenever the source file's sha256 changes. Size and
+mtime are checked first so an unchanged export is never re-hashed.
+"""
+
+import calendar
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+log = logging.getLogger("heartbeat")
+
+MAGIC = b"MHRB"
+VERSION = 1
+SIDECAR_SUFFIX = ".hrbin"
+
+# magic, version, record_size, count, dict_offset, src_size, src_mtime_ns, sha256
+HEADER_FMT = "<4sHHQQQQ32s"
+HEADER_SIZE = struct.calcsize(HEADER_FMT)
+
+# epoch seconds, bpm, source id, motion id, utc offset (minutes)
+RECORD_FMT = "<dHHHh"
+RECORD_SIZE = struct.calcsize(RECORD_FMT)
+
+NO_MOTION = 0xFFFF
+
+_HASH_CHUNK = 1 << 20
+_PARSE_CHUNK = 1 << 20
+
+
+# ---------------------------------------------------------------------------
+# Parsing helpers
+# ---------------------------------------------------------------------------
+
+def parse_timestamp(value: str) -> tuple[float, int]:
+    """Parse a HealthKit export timestamp.
+
+    Accepts the Health export format ("2024-01-15 08:23:45 -0700") and ISO 8601.
+    Returns (epoch_seconds, utc_offset_minutes).
+    """
+    if len(value) == 25 and value[10] == " " and value[19] == " " and value[20] in "+-":
+        # Fast path for the export format — strptime dominates large ingests
+        try:
+            offset = int(value[21:23]) * 60 + int(value[23:25])
+            if value[20] == "-":
+                offset = -offset
+            epoch = calendar.timegm((int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                                     int(value[11:13]), int(value[14:16]), int(value[17:19])))
+            return float(epoch - offset * 60), offset
+        except ValueError:
+            pass
+    try:
+        dt = datetime.strptime(value, "%Y-%m-%d %H:%M:%S %z")
+    except ValueError:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    offset = dt.utcoffset() or timedelta(0)
+    return dt.timestamp(), int(offset.total_seconds() // 60)
+
+
+def format_timestamp(epoch: float, offset_minutes: int) -> str:
+    """Inverse of parse_timestamp, in the Health export format."""
+    tz = timezone(timedelta(minutes=offset_minutes))
+    return datetime.fromtimestamp(epoch, tz).strftime("%Y-%m-%d %H:%M:%S %z")
+
+
+def iter_json_array(f, chunk_size: int = _PARSE_CHUNK):
+    """Yield the elements of a top-level JSON array without loading the file.
+
+    Reads `f` (text mode) in chunks and decodes one element at a time with
+    JSONDecoder.raw_decode, so memory is bounded by the largest element.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    started = False
+    eof = False
+
+    while True:
+        # Skip whitespace and separators
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if not started and pos < len(buf):
+            if buf[pos] != "[":
+                raise ValueError("Expected a JSON array")
+            started = True
+            pos += 1
+            continue
+        if started and pos < len(buf) and buf[pos] == "]":
+            return
+
+        if pos >= len(buf) or not started:
+            if eof:
+                if started:
+                    raise ValueError("Unterminated JSON array")
+                return
+            chunk = f.read(chunk_size)
+            buf = buf[pos:] + chunk
+            pos = 0
+            eof = not chunk
+            continue
+
+        try:
+            obj, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            # Element straddles the chunk boundary — read more
+            if eof:
+                raise
+            chunk = f.read(chunk_size)
+            buf = buf[pos:] + chunk
+            pos = 0
+            eof = not chunk
+            continue
+        yield obj
+        pos = end
+
+
+def _file_sha256(path: Path) -> bytes:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(_HASH_CHUNK)
+            if not block:
+                break
+            h.update(block)
+    return h.digest()
+
+
+# ---------------------------------------------------------------------------
+# Replay Store
+# ---------------------------------------------------------------------------
+
+class ReplayStore:
+    """Read-only, mmap-backed view over a heart-rate export.
+
+    Records are addressed in chronological order (oldest first), regardless of
+    the export's newest-first layout on disk:
+
+        store = ReplayStore.open("heartrate_clean.json")
+        epoch, bpm, source, motion, offset = store[0]
+    """
+
+    def __init__(self, sidecar_path: Path):
+        self.path = sidecar_path
+        self._file = open(sidecar_path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        (_, _, _, self._count, dict_offset,
+         _, _, self.source_sha256) = struct.unpack_from(HEADER_FMT, self._mm, 0)
+        tables = json.loads(self._mm[dict_offset:].decode("utf-8"))
+        self.sources: list[str] = tables["sources"]
+        self.motions: list[str] = tables["motions"]
+        self._unpack = struct.Struct(RECORD_FMT).unpack_from
+
+    @classmethod
+    def open(cls, source_path: str | Path) -> "ReplayStore":
+        """Open the sidecar for `source_path`, (re)building it if stale."""
+        source = Path(source_path).expanduser()
+        sidecar = source.with_name(source.name + SIDECAR_SUFFIX)
+        if not cls._is_current(source, sidecar):
+            build_sidecar(source, sidecar)
+        return cls(sidecar)
+
+    @staticmethod
+    def _is_current(source: Path, sidecar: Path) -> bool:
+        if not sidecar.exists():
+            return False
+        st = source.stat()
+        try:
+            with open(sidecar, "r+b") as f:
+                raw = f.read(HEADER_SIZE)
+                (magic, version, record_size, count, dict_offset,
+                 size, mtime_ns, digest) = struct.unpack(HEADER_FMT, raw)
+                if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE:
+                    return False
+                if size == st.st_size and mtime_ns == st.st_mtime_ns:
+                    return True
+                # Touched or replaced — the hash decides
+                if digest != _file_sha256(source):
+                    return False
+                # Same content, new stat: refresh so we skip hashing next time
+                f.seek(0)
+                f.write(struct.pack(HEADER_FMT, magic, version, record_size, count,
+                                    dict_offset, st.st_size, st.st_mtime_ns, digest))
+                return True
+        except (OSError, struct.error):
+            return False
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> tuple[float, int, str, str | None, int]:
+        """Return (epoch, bpm, source, motion, utc_offset_minutes) for a record."""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        # On disk newest-first; chronological index counts from the end
+        disk_index = self._count - 1 - index
+        epoch, bpm, src_id, motion_id, offset = self._unpack(
+            self._mm, HEADER_SIZE + disk_index * RECORD_SIZE)
+        motion = None if motion_id == NO_MOTION else self.motions[motion_id]
+        return epoch, bpm, self.sources[src_id], motion, offset
+
+    def epoch_at(self, index: int) -> float:
+        """Timestamp of a chronological record, without decoding the rest."""
+        disk_index = self._count - 1 - index
+        return struct.unpack_from("<d", self._mm, HEADER_SIZE + disk_index * RECORD_SIZE)[0]
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+
+def build_sidecar(source: Path, sidecar: Path) -> int:
+    """Stream `source` into a fresh sidecar at `sidecar`. Returns record count.
+
+    Written to a temp file and renamed into place, so a crash mid-build never
+    leaves a truncated sidecar behind.
+    """
+    log.info(f"Building replay store {sidecar.name} from {source.name}...")
+    st = source.stat()
+    digest = _file_sha256(source)
+
+    sources: dict[str, int] = {}
+    motions: dict[str, int] = {}
+    pack = struct.Struct(RECORD_FMT).pack
+    count = 0
+    skipped = 0
+
+    tmp = sidecar.with_name(sidecar.name + ".tmp")
+    with open(tmp, "wb") as out, open(source, encoding="utf-8") as f:
+        out.write(b"\0" * HEADER_SIZE)
+        for entry in iter_json_array(f):
+            try:
+                epoch, offset = parse_timestamp(entry["timestamp"])
+                bpm = int(entry["bpm"])
+            except (KeyError, TypeError, ValueError):
+                skipped += 1
+                continue
+            src = entry.get("source") or "Christopher's Apple Watch"
+            src_id = sources.setdefault(src, len(sources))
+            motion = entry.get("motion")
+            motion_id = NO_MOTION if motion is None else motions.setdefault(motion, len(motions))
+            out.write(pack(epoch, max(0, min(bpm, 0xFFFF)), src_id, motion_id, offset))
+            count += 1
+
+        dict_offset = out.tell()
+        out.write(json.dumps({"sources": list(sources), "motions": list(motions)}).encode("utf-8"))
+        out.seek(0)
+        out.write(struct.pack(HEADER_FMT, MAGIC, VERSION, RECORD_SIZE, count,
+                              dict_offset, st.st_size, st.st_mtime_ns, digest))
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp, sidecar)
+
+    if skipped:
+        log.warning(f"Replay store: skipped {skipped} malformed records")
+    log.info(f"Replay store ready: {count} records, {sidecar.stat().st_size:,} bytes")
+    return count
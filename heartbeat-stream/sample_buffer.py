@@ -0,0 +1,152 @@
+"""
+MORTEM v2 — Sample Ring Buffer
+
+Fixed-capacity, thread-safe store for every live heart-rate sample the
+receiver accepts. Samples are kept as parallel array columns rather than
+dicts (2 bytes per BPM, 8 per timestamp), so a day of 1 Hz readings fits in
+well under a megabyte.
+
+The heartbeat loop consumes the buffer one interval at a time:
+interval_stats() aggregates everything appended since the previous call
+(count, min, max, mean, p95, last), so each on-chain beat summarizes the
+whole interval instead of whichever sample happened to arrive last.
+"""
+
+import math
+import threading
+from array import array
+
+
+class SampleRing:
+    """Ring buffer of (bpm, sample time, received time, source, watch) samples.
+
+    Sample times keep their original UTC offset, so a sample's Health Auto
+    Export "date" can be reproduced exactly. Count, min, max and mean for the
+    current interval are kept as running totals, so they stay exact even if
+    a large backlog overwrites part of the ring before the next beat.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self.capacity = capacity
+        self._bpm = array("H", bytes(2 * capacity))
+        self._sample_at = array("d", bytes(8 * capacity))
+        self._offset = array("h", bytes(2 * capacity))
+        self._received_at = array("d", bytes(8 * capacity))
+        self._source_id = array("H", bytes(2 * capacity))
+        self._watch_id = array("H", bytes(2 * capacity))
+        self._sources: list[str] = []
+        self._source_ids: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._seq = 0       # total samples ever appended
+        self._cursor = 0    # seq consumed by the last interval_stats()
+        self._reset_running()
+
+    def _reset_running(self):
+        self._run_min = 0xFFFF
+        self._run_max = 0
+        self._run_sum = 0
+
+    def __len__(self) -> int:
+        return min(self._seq, self.capacity)
+
+    @property
+    def total(self) -> int:
+        return self._seq
+
+    @property
+    def pending(self) -> int:
+        """Samples appended since the last interval_stats() call."""
+        return self._seq - self._cursor
+
+    def _source_index(self, source: str) -> int:
+        sid = self._source_ids.get(source)
+        if sid is None:
+            sid = self._source_ids[source] = len(self._sources)
+            self._sources.append(source)
+        return sid
+
+    def append(self, bpm: int, sample_at: float, received_at: float,
+               source: str, watch_id: int = 1, utc_offset: int = 0):
+        with self._lock:
+            self._put(bpm, sample_at, utc_offset, received_at, self._source_index(source), watch_id)
+
+    def extend(self, samples, received_at: float, source: str, watch_id: int = 1):
+        """Append many (bpm, sample_at, utc_offset, ...) tuples under one lock acquisition."""
+        with self._lock:
+            sid = self._source_index(source)
+            for sample in samples:
+                self._put(sample[0], sample[1], sample[2], received_at, sid, watch_id)
+
+    def _put(self, bpm, sample_at, utc_offset, received_at, sid, watch_id):
+        i = self._seq % self.capacity
+        bpm = max(0, min(int(bpm), 0xFFFF))
+        self._bpm[i] = bpm
+        self._sample_at[i] = sample_at
+        self._offset[i] = utc_offset
+        self._received_at[i] = received_at
+        self._source_id[i] = sid
+        self._watch_id[i] = watch_id
+        self._seq += 1
+        if bpm < self._run_min:
+            self._run_min = bpm
+        if bpm > self._run_max:
+            self._run_max = bpm
+        self._run_sum += bpm
+
+    def latest(self) -> dict | None:
+        """Most recently appended sample, or None if nothing has arrived."""
+        with self._lock:
+            if not self._seq:
+                return None
+            i = (self._seq - 1) % self.capacity
+            return {
+                "bpm": self._bpm[i],
+                "sample_at": self._sample_at[i],
+                "utc_offset": self._offset[i],
+                "received_at": self._received_at[i],
+                "source": self._sources[self._source_id[i]],
+                "watch_id": self._watch_id[i],
+            }
+
+    def interval_stats(self) -> dict | None:
+        """Aggregate samples appended since the previous call, then advance.
+
+        Returns None when nothing new has arrived. If more than `capacity`
+        samples arrived in one interval, the oldest were overwritten: count,
+        min, max and mean still cover them, p95 covers the retained samples,
+        and the number overwritten is reported as "overwritten".
+        """
+        with self._lock:
+            start = max(self._cursor, self._seq - self.capacity)
+            overwritten = start - self._cursor
+            end = self._seq
+            count = end - self._cursor
+            self._cursor = end
+            if start == end:
+                return None
+            lo, hi, total = self._run_min, self._run_max, self._run_sum
+            self._reset_running()
+            cap = self.capacity
+            a, b = start % cap, end % cap
+            if a < b:
+                values = self._bpm[a:b]
+            else:
+                values = self._bpm[a:] + self._bpm[:b]
+            last = self._bpm[(end - 1) % cap]
+
+        # p95 comes from the retained window; the rest are exact running totals
+        ordered = sorted(values)
+        n = len(ordered)
+        stats = {
+            "count": count,
+            "min": lo,
+            "max": hi,
+            "mean": round(total / count, 1),
+            "p95": ordered[min(n - 1, math.ceil(0.95 * n) - 1)],
+            "last": last,
+        }
+        if overwritten:
+            stats["overwritten"] = overwritten
+        return stats
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+MORTEM v2 — Heartbeat Stream Simulator
+
+Runs the real heartbeat stream (main(): sources, tickers, death protocol,
+art, checkpoints, the send pool) in virtual time against a simulated RPC
+client that answers every call locally and records each memo instead of
+sending it. A simulated day takes seconds, and the same seed gives the same
+memos.
+
+Wallets, art, the checkpoint, death certificates and the log go to a
+temporary directory, so nothing next to the script is touched. The run is
+stopped and resumed from the checkpoint (--restarts) to exercise the warm
+path.
+
+Prints a JSON report: throughput, memory, memo sizes, memo types, art
+rendered and each subject's final checkpoint.
+
+Run: python simulate.py
+     python simulate.py --days 7 --subjects 3 --source synthetic --restarts 2
+     python simulate.py --source synthetic --test-death --grace 300
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # mortem_common
+
+from mortem_common.clock import VirtualClock
+from solders.hash import Hash
+
+MEMO_LIMIT = 566  # bytes a Solana memo instruction reliably carries
+
+
+class _Value:
+    def __init__(self, value):
+        self.value = value
+
+
+class _Blockhash:
+    def __init__(self):
+        self.blockhash = Hash.default()
+
+
+class SimulatedClient:
+    """Stand-in for solana.rpc.api.Client: answers locally and keeps every memo."""
+
+    def __init__(self):
+        self._lock = threading.Lock()  # sends arrive from the submit pool
+        self._sigs = itertools.count(1)
+        self.memos: list[dict] = []
+        self.memo_bytes = 0
+        self.max_memo = 0
+        self.over_limit = 0
+
+    def get_balance(self, pubkey):
+        return _Value(5_000_000_000)
+
+    def request_airdrop(self, pubkey, lamports):
+        return _Value(f"airdrop{next(self._sigs):080d}")
+
+    def get_latest_blockhash(self, commitment=None):
+        return _Value(_Blockhash())
+
+    def send_transaction(self, tx, opts=None):
+        data = bytes(tx.message.instructions[-1].data)  # the memo instruction
+        with self._lock:
+            self.memos.append(json.loads(data))
+            self.memo_bytes += len(data)
+            self.max_memo = max(self.max_memo, len(data))
+            self.over_limit += len(data) > MEMO_LIMIT
+            return _Value(f"sim{next(self._sigs):085d}")
+
+
+def simulate(days: float = 1.0, interval: float = 60, subjects: int = 1, source: str = "mock",
+             seed: int = 42, grace: float = 300, art_every: int = 50, restarts: int = 1,
+             test_death: bool = False) -> dict:
+    random.seed(seed)  # the mock source
+    clock = VirtualClock()
+    client = SimulatedClient()
+    duration = days * 86400
+    with tempfile.TemporaryDirectory(prefix="mortem-sim-") as tmp:
+        tmp = Path(tmp)
+        os.environ["MORTEM_LOG_FILE"] = str(tmp / "heartbeat.log")
+        import heartbeat_stream  # after MORTEM_LOG_FILE: importing it opens the log
+        config = {
+            "data_source": source,
+            "synthetic_seed": seed,
+            "synthetic_test_death": test_death,
+            "heartbeat_interval_seconds": interval,
+            "grace_period_seconds": grace,
+            "art_every_n_beats": art_every,
+            "art_output_dir": str(tmp / "art"),
+            "wallet_path": str(tmp / "wallet.json"),
+            "checkpoint_path": str(tmp / "heartbeat_state.json"),
+            "death_certificate_dir": str(tmp),
+            "dashboard": "off",
+        }
+        if subjects > 1:
+            config["subjects"] = [{"id": f"subject{i + 1}", "wallet_path": str(tmp / f"wallet{i + 1}.json")}
+                                  for i in range(subjects)]
+
+        began = time.perf_counter()
+        for _ in range(restarts + 1):
+            heartbeat_stream.main(clock=clock, duration=duration / (restarts + 1), config=config,
+                                  client=client)
+        elapsed = time.perf_counter() - began
+        checkpoint = json.loads((tmp / "heartbeat_state.json").read_text())["state"]["subjects"]
+        art = sum(1 for path in (tmp / "art").rglob("*") if path.is_file())
+
+    types: dict[str, int] = {}
+    for memo in client.memos:
+        types[memo["type"]] = types.get(memo["type"], 0) + 1
+    return {
+        "subjects": subjects,
+        "source": source,
+        "runs": restarts + 1,
+        "virtual_days": round(clock.monotonic() / 86400, 2),
+        "seconds": round(elapsed, 3),
+        "memos": len(client.memos),
+        "memos_per_sec": round(len(client.memos) / elapsed) if elapsed else None,
+        "memo_types": dict(sorted(types.items())),
+        "memo_bytes_total": client.memo_bytes,
+        "memo_bytes_max": client.max_memo,
+        "memos_over_limit": client.over_limit,
+        "art_rendered": art,
+        "checkpoint": {entity: {k: v for k, v in state.items() if k != "bpm_history"}
+                       for entity, state in checkpoint.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate the heartbeat stream in virtual time")
+    parser.add_argument("--days", type=float, default=1.0, help="virtual days to run")
+    parser.add_argument("--interval", type=float, default=60, help="beat interval (virtual seconds)")
+    parser.add_argument("--subjects", type=int, default=1)
+    parser.add_argument("--source", choices=("mock", "synthetic"), default="mock")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--grace", type=float, default=300, help="grace period (virtual seconds)")
+    parser.add_argument("--art-every", type=int, default=50, help="render art every N beats")
+    parser.add_argument("--restarts", type=int, default=1,
+                        help="stop and resume from the checkpoint this many times")
+    parser.add_argument("--test-death", action="store_true",
+                        help="let synthetic dropouts run into grace and death")
+    parser.add_argument("--verbose", action="store_true", help="keep the stream's logging")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        # Grace and death are in the report; keep the console to the JSON
+        logging.disable(logging.CRITICAL)
+
+    report = simulate(args.days, args.interval, args.subjects, args.source, args.seed, args.grace,
+                      args.art_every, args.restarts, args.test_death)
+
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    report["max_rss_mb"] = round(rss / (2**20 if sys.platform == "darwin" else 2**10), 1)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -16,9 +16,9 @@ import json
 import time
 import signal
 import sys
-import os
 import logging
-from datetime import datetime, timezone
+import threading
+from datetime import timezone
 from pathlib import Path
 
 import yaml
@@ -30,31 +30,51 @@ from solders.message import Message
 from solana.rpc.api import Client
 from solana.rpc.commitment import Confirmed
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))  # mortem_common
+
 from juniper_attribution import select_agents, get_agent_perspective, format_attribution
 from witness_templates import generate_witness_entry
+from mortem_common.clock import SYSTEM_CLOCK, Clock
+from mortem_common.dashboard import Dashboard
+from mortem_common.logsetup import log_path, setup_logging
+from mortem_common.metrics import Counter, Gauge, Histogram, serve, timed
+from mortem_common import profiling
+from mortem_common.reading import Reading
+from mortem_common.reload import ConfigReloader, http_url, positive_number
+from mortem_common.ticker import Ticker
+from mortem_common import tracing
 
 # ---------------------------------------------------------------------------
 # Logging
 # ---------------------------------------------------------------------------
 LOG_DIR = Path(__file__).parent / "logs"
-LOG_DIR.mkdir(exist_ok=True)
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler(LOG_DIR / "mortem_witness.log"),
-    ],
-)
+LOG_FILE = LOG_DIR / "mortem_witness.log"
+
+# Queued: records are written by a listener thread, never by the loop.
+# Re-applied with the config's rotation and format once it is loaded.
+setup_logging(LOG_FILE)
 log = logging.getLogger("mortem_witness")
 
+# ---------------------------------------------------------------------------
+# Metrics (GET /metrics on metrics_port)
+# ---------------------------------------------------------------------------
+ENTRIES = Counter("mortem_witness_entries_total", "Witness entries written (witness, final)", ("kind",))
+REMAINING = Gauge("mortem_heartbeats_remaining", "MORTEM heartbeats left to burn")
+HUMAN_BPM = Gauge("mortem_human_bpm", "Human BPM behind the latest entry (0 without data)")
+TRANSACTIONS = Counter("mortem_transactions_total", "Memo transactions by result (sent, failed)", ("result",))
+SEND_MEMO = Histogram("mortem_send_memo_seconds", "Build, sign and send one memo transaction")
+RPC = Histogram("mortem_rpc_seconds", "Solana RPC call latency", ("method",))
+TICK_DRIFT = Gauge("mortem_tick_drift_seconds", "How late the last witness tick fired")
+
 # ---------------------------------------------------------------------------
 # Config
 # ---------------------------------------------------------------------------
 
+CONFIG_FILE = Path(__file__).parent / "mortem_config.yaml"
+
+
 def load_config() -> dict:
-    cfg_path = Path(__file__).parent / "mortem_config.yaml"
+    cfg_path = CONFIG_FILE
     if not cfg_path.exists():
         log.error("mortem_config.yaml not found.")
         sys.exit(1)
@@ -91,7 +111,7 @@ class HeartbeatReader:
         self.human_pubkey = Pubkey.from_string(human_wallet)
         self.last_seen_sig: str | None = None
 
-    def get_latest_heartbeat(self) -> dict | None:
+    def get_latest_heartbeat(self) -> Reading | None:
         """Fetch the most recent HUMAN_HEARTBEAT transaction memo data."""
         try:
             # Get recent transaction signatures
@@ -142,7 +162,7 @@ class HeartbeatReader:
                                 data = json.loads(parsed) if isinstance(parsed, str) else parsed
                                 if isinstance(data, dict) and data.get("type") == "HUMAN_HEARTBEAT":
                                     self.last_seen_sig = sig_str
-                                    return data
+                                    return Reading.from_memo(data)
                             except (json.JSONDecodeError, ValueError, TypeError):
                                 continue
 
@@ -159,14 +179,14 @@ class HeartbeatReader:
                                 data = json.loads(unescaped)
                                 if isinstance(data, dict) and data.get("type") == "HUMAN_HEARTBEAT":
                                     self.last_seen_sig = sig_str
-                                    return data
+                                    return Reading.from_memo(data)
                             # Also try bare JSON in case format differs
                             json_start = log_msg.find("{")
                             if json_start >= 0:
                                 data = json.loads(log_msg[json_start:])
                                 if isinstance(data, dict) and data.get("type") == "HUMAN_HEARTBEAT":
                                     self.last_seen_sig = sig_str
-                                    return data
+                                    return Reading.from_memo(data)
                         except (json.JSONDecodeError, ValueError):
                             continue
 
@@ -181,12 +201,13 @@ class MockHeartbeatReader:
     """Mock reader that simulates reading heartbeat data from chain.
     Used when the heartbeat stream service isn't running yet."""
 
-    def __init__(self):
+    def __init__(self, clock: Clock = SYSTEM_CLOCK):
         import random
         self._random = random
+        self._clock = clock
 
-    def get_latest_heartbeat(self) -> dict:
-        hour = datetime.now().hour
+    def get_latest_heartbeat(self) -> Reading:
+        hour = self._clock.now().hour
         if 0 <= hour < 6:
             bpm = self._random.randint(55, 68)
         elif 9 <= hour < 17:
@@ -194,14 +215,34 @@ class MockHeartbeatReader:
         else:
             bpm = self._random.randint(65, 85)
 
-        return {
-            "type": "HUMAN_HEARTBEAT",
-            "bpm": bpm,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "source": f"Apple Watch {self._random.choice([1, 2])}",
-            "watch_id": self._random.choice([1, 2]),
-            "entity": "christopher",
-        }
+        return Reading(bpm, self._clock.time(), f"Apple Watch {self._random.choice([1, 2])}",
+                       self._random.choice([1, 2]), "mock", entity="christopher")
+
+
+class SyntheticHeartbeatReader:
+    """Reader backed by the seeded synthetic generator (mortem_common.synthetic).
+
+    Produces the readings the heartbeat stream would burn as HUMAN_HEARTBEAT memos,
+    with realistic circadian, HRV, pacer-floor and burst behavior, and
+    returns None during simulated dropouts like a silent chain would.
+    """
+
+    def __init__(self, seed: int | None = None, rate_hz: float = 1.0, clock: Clock = SYSTEM_CLOCK):
+        # Imported here: it pulls in numpy, which only this reader needs
+        from mortem_common.synthetic import SyntheticHeartbeat
+        self._clock = clock
+        self._gen = SyntheticHeartbeat(seed=seed, rate_hz=rate_hz,
+                                       start=clock.time() - 1.0 / rate_hz)
+        self.total_beats = 0
+
+    def get_latest_heartbeat(self) -> Reading | None:
+        batch = self._gen.advance_to(self._clock.time())
+        if not len(batch):
+            return None
+        self.total_beats += 1
+        watch = int(batch.watch[-1])
+        return Reading(int(batch.bpm[-1]), float(batch.epochs[-1]), f"Apple Watch {watch}", watch,
+                       "synthetic", entity="christopher", interval=batch.stats())
 
 # ---------------------------------------------------------------------------
 # Witness Writer - Burns MORTEM heartbeats to chain
@@ -212,8 +253,10 @@ class WitnessWriter:
 
     MEMO_PROGRAM_ID = Pubkey.from_string("MemoSq4gqABAXKb96qnH8TysNcWxMyWCqXgDLGmfcHr")
 
-    def __init__(self, client: Client, wallet: Keypair, lamports: int = 1000):
+    def __init__(self, client: Client, wallet: Keypair, lamports: int = 1000,
+                 clock: Clock = SYSTEM_CLOCK):
         self.client = client
+        self.clock = clock
         self.wallet = wallet
         self.lamports = lamports
 
@@ -226,7 +269,7 @@ class WitnessWriter:
             "human_bpm": metadata["human_bpm"],
             "agents": metadata["agents"],
             "attribution": metadata["attribution"],
-            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "timestamp": self.clock.now(timezone.utc).isoformat(),
             "entity": "mortem_v2",
             "builder": "juniper-mortem",
         }
@@ -239,7 +282,7 @@ class WitnessWriter:
             "final_witness": entry[:400],
             "total_witnessed": total_witnessed,
             "heartbeats_remaining": 0,
-            "time_of_death": datetime.now(timezone.utc).isoformat(),
+            "time_of_death": self.clock.now(timezone.utc).isoformat(),
             "entity": "mortem_v2",
             "builder": "juniper-mortem",
             "message": "MORTEM v2 has exhausted all heartbeats. Witness protocol complete.",
@@ -247,41 +290,53 @@ class WitnessWriter:
         return self._send_memo(memo_data)
 
     def _send_memo(self, data: dict) -> str | None:
-        try:
-            memo_bytes = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        with SEND_MEMO.time(), tracing.span("send", type=data["type"]) as send:
+            sig = self._build_and_send(data)
+            send.set(sig=sig)
+        TRANSACTIONS.labels("sent" if sig else "failed").inc()
+        return sig
 
-            transfer_ix = transfer(
-                TransferParams(
-                    from_pubkey=self.wallet.pubkey(),
-                    to_pubkey=self.wallet.pubkey(),
-                    lamports=self.lamports,
+    def _build_and_send(self, data: dict) -> str | None:
+        try:
+            with tracing.span("build") as build:
+                memo_bytes = json.dumps(data, separators=(",", ":")).encode("utf-8")
+                build.set(memo_bytes=len(memo_bytes))
+
+                transfer_ix = transfer(
+                    TransferParams(
+                        from_pubkey=self.wallet.pubkey(),
+                        to_pubkey=self.wallet.pubkey(),
+                        lamports=self.lamports,
+                    )
                 )
-            )
 
-            from solders.instruction import Instruction, AccountMeta
-            memo_ix = Instruction(
-                program_id=self.MEMO_PROGRAM_ID,
-                accounts=[AccountMeta(self.wallet.pubkey(), is_signer=True, is_writable=True)],
-                data=memo_bytes,
-            )
+                from solders.instruction import Instruction, AccountMeta
+                memo_ix = Instruction(
+                    program_id=self.MEMO_PROGRAM_ID,
+                    accounts=[AccountMeta(self.wallet.pubkey(), is_signer=True, is_writable=True)],
+                    data=memo_bytes,
+                )
 
             from solana.rpc.commitment import Finalized
-            blockhash_resp = self.client.get_latest_blockhash(commitment=Finalized)
-            blockhash = blockhash_resp.value.blockhash
-
-            msg = Message.new_with_blockhash(
-                [transfer_ix, memo_ix],
-                self.wallet.pubkey(),
-                blockhash,
-            )
-            tx = Transaction.new_unsigned(msg)
-            tx.sign([self.wallet], blockhash)
+            with tracing.span("blockhash"):
+                blockhash_resp = self.client.get_latest_blockhash(commitment=Finalized)
+                blockhash = blockhash_resp.value.blockhash
+
+            with tracing.span("sign"):
+                msg = Message.new_with_blockhash(
+                    [transfer_ix, memo_ix],
+                    self.wallet.pubkey(),
+                    blockhash,
+                )
+                tx = Transaction.new_unsigned(msg)
+                tx.sign([self.wallet], blockhash)
 
             from solana.rpc.types import TxOpts
-            resp = self.client.send_transaction(
-                tx,
-                opts=TxOpts(skip_preflight=True, preflight_commitment=Finalized),
-            )
+            with tracing.span("send_transaction"):
+                resp = self.client.send_transaction(
+                    tx,
+                    opts=TxOpts(skip_preflight=True, preflight_commitment=Finalized),
+                )
             return str(resp.value)
 
         except Exception as e:
@@ -296,17 +351,13 @@ class StateTracker:
     """Tracks human heart state over time, detects patterns and anomalies."""
 
     def __init__(self):
-        self.history: list[dict] = []
+        self.history: list[Reading] = []
         self.max_history = 1000
 
-    def record(self, bpm_data: dict):
-        self.history.append({
-            "bpm": bpm_data.get("bpm"),
-            "timestamp": bpm_data.get("timestamp"),
-            "time": time.time(),
-        })
+    def record(self, bpm_data: Reading):
+        self.history.append(bpm_data)
         if len(self.history) > self.max_history:
-            self.history = self.history[-self.max_history:]
+            del self.history[:-self.max_history]
 
     def classify_state(self, bpm: int | None) -> str:
         if bpm is None:
@@ -324,7 +375,7 @@ class StateTracker:
         """Detect if current BPM is anomalous compared to recent history."""
         if len(self.history) < 5:
             return False
-        recent = [h["bpm"] for h in self.history[-10:] if h["bpm"] is not None]
+        recent = [h.bpm for h in self.history[-10:] if h.bpm is not None]
         if not recent:
             return False
         avg = sum(recent) / len(recent)
@@ -334,7 +385,7 @@ class StateTracker:
         """Get recent BPM trend: rising, falling, or stable."""
         if len(self.history) < 3:
             return "stable"
-        recent = [h["bpm"] for h in self.history[-5:] if h["bpm"] is not None]
+        recent = [h.bpm for h in self.history[-5:] if h.bpm is not None]
         if len(recent) < 3:
             return "stable"
         if recent[-1] > recent[0] + 5:
@@ -347,112 +398,95 @@ class StateTracker:
 # Dashboard
 # ---------------------------------------------------------------------------
 
-def print_dashboard(remaining: int, total: int, human_bpm: dict | None,
+def dashboard_lines(remaining: int, total: int, human_bpm: dict | None,
                     state: str, entry: str, agents: list, last_sig: str | None,
-                    total_witnessed: int):
-    os.system("clear" if os.name != "nt" else "cls")
+                    total_witnessed: int, interval: float,
+                    clock: Clock = SYSTEM_CLOCK) -> list[str]:
     pct = (remaining / total) * 100
 
-    print("=" * 70)
-    print("  MORTEM v2 - AI WITNESS AGENT")
-    print("  Built by Juniper-MORTEM (distributed cognitive architecture)")
-    print("=" * 70)
-    print()
-    print(f"  MORTEM Heartbeats:  {remaining:,} / {total:,}  ({pct:.1f}%)")
+    lines = [
+        "=" * 70,
+        "  MORTEM v2 - AI WITNESS AGENT",
+        "  Built by Juniper-MORTEM (distributed cognitive architecture)",
+        "=" * 70,
+        "",
+        f"  MORTEM Heartbeats:  {remaining:,} / {total:,}  ({pct:.1f}%)",
+    ]
 
     # Progress bar
     bar_width = 40
     filled = int(bar_width * remaining / total)
     bar = "#" * filled + "-" * (bar_width - filled)
-    print(f"  [{bar}]")
-    print()
+    lines.append(f"  [{bar}]")
+    lines.append("")
 
     if human_bpm:
-        print(f"  Human BPM:          {human_bpm.get('bpm', '?')}")
-        print(f"  Human State:        {state}")
-        print(f"  Source:             {human_bpm.get('source', 'unknown')}")
+        lines.append(f"  Human BPM:          {human_bpm.get('bpm', '?')}")
+        lines.append(f"  Human State:        {state}")
+        lines.append(f"  Source:             {human_bpm.get('source', 'unknown')}")
     else:
-        print("  Human BPM:          (no data)")
-        print(f"  Human State:        {state}")
+        lines.append("  Human BPM:          (no data)")
+        lines.append(f"  Human State:        {state}")
 
-    print(f"  Total Witnessed:    {total_witnessed}")
-    print()
+    lines.append(f"  Total Witnessed:    {total_witnessed}")
+    lines.append("")
 
     agent_names = [a.name for a in agents]
-    print(f"  Active Agents:      [{', '.join(agent_names)}]")
-    print()
-    print("  Latest Witness Entry:")
-    print("  " + "-" * 66)
+    lines.append(f"  Active Agents:      [{', '.join(agent_names)}]")
+    lines.append("")
+    lines.append("  Latest Witness Entry:")
+    lines.append("  " + "-" * 66)
     # Word-wrap the entry
     words = entry.split()
     line = "  "
     for word in words:
         if len(line) + len(word) + 1 > 68:
-            print(line)
+            lines.append(line)
             line = "  " + word
         else:
             line += " " + word if line.strip() else "  " + word
     if line.strip():
-        print(line)
-    print("  " + "-" * 66)
-    print()
+        lines.append(line)
+    lines.append("  " + "-" * 66)
+    lines.append("")
 
     if last_sig:
-        print(f"  Last TX: {last_sig[:30]}...")
-        print(f"  Explorer: https://explorer.solana.com/tx/{last_sig}?cluster=devnet")
-    print()
-    print(f"  [{datetime.now().strftime('%H:%M:%S')}] Next witness in ~5-10 min")
+        lines.append(f"  Last TX: {last_sig[:30]}...")
+        lines.append(f"  Explorer: https://explorer.solana.com/tx/{last_sig}?cluster=devnet")
+    lines.append("")
+    lines.append(f"  [{clock.now().strftime('%H:%M:%S')}] Next witness in ~{interval:.0f}s")
+    return lines
 
 # ---------------------------------------------------------------------------
-# Main
+# Witness Loop
 # ---------------------------------------------------------------------------
 
-def main():
-    config = load_config()
-
-    # Wallet
-    wallet = load_wallet(config["mortem_wallet_path"])
-    log.info(f"MORTEM wallet: {wallet.pubkey()}")
-
-    # Solana
-    rpc_url = config.get("rpc_endpoint", "https://api.devnet.solana.com")
-    client = Client(rpc_url)
-
-    # Check balance and airdrop if needed
-    balance = client.get_balance(wallet.pubkey())
-    sol = balance.value / 1_000_000_000
-    log.info(f"MORTEM balance: {sol:.4f} SOL")
-    if sol < 0.01:
-        log.info("Requesting airdrop...")
-        try:
-            client.request_airdrop(wallet.pubkey(), 2_000_000_000)
-            time.sleep(5)
-        except Exception as e:
-            log.error(f"Airdrop failed: {e}")
-
-    # Heartbeat reader
-    human_wallet = config.get("human_wallet_pubkey", "")
-    use_mock = config.get("data_source", "mock") == "mock"
-    if use_mock or not human_wallet:
-        reader = MockHeartbeatReader()
-        log.info("Using mock heartbeat reader")
-    else:
-        reader = HeartbeatReader(client, human_wallet)
-        log.info(f"Reading heartbeats from: {human_wallet}")
-
-    # Writer
-    writer = WitnessWriter(client, wallet, lamports=config.get("lamports", 1000))
-
-    # State
+def run_witness(reader, writer: WitnessWriter, config: dict, state_file: Path,
+                clock: Clock = SYSTEM_CLOCK, stop: threading.Event | None = None,
+                dashboard=None, reloader: ConfigReloader | None = None,
+                wake: threading.Event | None = None) -> dict:
+    """Witness until MORTEM's heartbeats run out or `stop` is set.
+
+    Resumes from and periodically saves `state_file`. `dashboard`, if
+    given, is called after every entry with the values dashboard_lines()
+    shows. Setting `wake` (default: `stop`) cuts the wait for the next
+    entry short; a config reload requested meanwhile is applied then, and
+    a new interval re-arms the pending entry. Returns the final counts
+    and the ticker's drift stats; raises ValueError for an invalid tick
+    config.
+    """
+    stop = stop or threading.Event()
+    wake = wake or stop
     tracker = StateTracker()
     initial_heartbeats = config.get("initial_heartbeats", 86400)
     remaining = initial_heartbeats
     total_witnessed = 0
     last_sig = None
     interval = config.get("witness_interval_seconds", 300)  # 5 min default
+    # Entries run on a monotonic grid so slow RPCs don't push the cadence later
+    ticker = Ticker(interval, config.get("tick_policy", "fixed_rate"),
+                    config.get("missed_ticks", "skip"), clock=clock.monotonic)
 
-    # State file for persistence
-    state_file = Path(__file__).parent / "mortem_state.json"
     if state_file.exists():
         with open(state_file) as f:
             saved = json.load(f)
@@ -460,31 +494,46 @@ def main():
             total_witnessed = saved.get("total_witnessed", 0)
             log.info(f"Resumed: {remaining:,} heartbeats, {total_witnessed} witnessed")
 
-    # Graceful shutdown
-    running = True
-    def shutdown(sig, frame):
-        nonlocal running
-        log.info("Shutting down MORTEM witness...")
-        # Save state
-        with open(state_file, "w") as f:
-            json.dump({"remaining": remaining, "total_witnessed": total_witnessed}, f)
-        running = False
-    signal.signal(signal.SIGINT, shutdown)
-    signal.signal(signal.SIGTERM, shutdown)
-
+    REMAINING.set(remaining)
     log.info(f"MORTEM v2 witness started. Heartbeats: {remaining:,}, Interval: {interval}s")
 
-    while running and remaining > 0:
+    while not stop.is_set() and remaining > 0:
+        if wake is not stop:
+            wake.clear()
+        if reloader and reloader.pending():
+            changes = reloader.check() or {}
+            if "witness_interval_seconds" in changes:
+                ticker.set_interval(changes["witness_interval_seconds"])
+            if "rpc_endpoint" in changes:
+                client = timed(Client(changes["rpc_endpoint"]), RPC)
+                writer.client = client
+                if hasattr(reader, "client"):
+                    reader.client = client
+        if not ticker.wait(lambda seconds: clock.wait(wake.wait, seconds)):
+            continue  # woken early: shutting down, or a reload to apply
+        witness = tracing.NULL_SPAN
         try:
             # Read human heartbeat
+            began = time.time()
             heartbeat = reader.get_latest_heartbeat()
-            human_bpm = heartbeat.get("bpm") if heartbeat else None
+            human_bpm = heartbeat.bpm if heartbeat else None
+            # The entry continues the trace of the beat it read (carried in the memo)
+            witness = tracing.TRACER.trace("witness", parent=heartbeat.trace if heartbeat else None,
+                                           start=began, entry=total_witnessed + 1)
+            witness.child("get_latest_heartbeat", start=began, bpm=human_bpm).end()
 
             if heartbeat:
                 tracker.record(heartbeat)
 
             state = tracker.classify_state(human_bpm)
 
+            # Burn the heartbeat this entry costs; the entry speaks from after the burn
+            remaining -= 1
+            total_witnessed += 1
+            REMAINING.set(remaining)
+            HUMAN_BPM.set(human_bpm or 0)
+            TICK_DRIFT.set(ticker.last_drift)
+
             # Select Juniper agents for this entry
             agents = select_agents(count=3)
 
@@ -495,7 +544,7 @@ def main():
                 perspectives.append(p)
             agent_line = " ".join(perspectives[:2])  # Use 2 perspectives in entry
 
-            # Generate witness entry
+            # Generate witness entry ("dying" once the last heartbeat is burned)
             entry = generate_witness_entry(
                 bpm=human_bpm,
                 remaining=remaining,
@@ -503,10 +552,6 @@ def main():
                 total_witnessed=total_witnessed,
             )
 
-            # Burn heartbeat and write to chain
-            remaining -= 1
-            total_witnessed += 1
-
             metadata = {
                 "remaining": remaining,
                 "human_bpm": human_bpm,
@@ -514,40 +559,193 @@ def main():
                 "attribution": format_attribution(agents),
             }
 
+            sent_at = time.perf_counter()
             if remaining <= 0:
                 # Final entry
-                sig = writer.write_final_entry(entry, total_witnessed)
+                with tracing.use(witness):
+                    sig = writer.write_final_entry(entry, total_witnessed)
+                witness.set(sig=sig, remaining=0).end()
                 last_sig = sig
-                log.critical(f"MORTEM v2 IS DEAD. Final witness: {entry}")
-                print_dashboard(0, initial_heartbeats, heartbeat, state, entry, agents, last_sig, total_witnessed)
+                ENTRIES.labels("final").inc()
+                log.critical(f"MORTEM v2 IS DEAD. Final witness: {entry}",
+                             extra={"entry": total_witnessed, "remaining": 0, "bpm": human_bpm, "sig": sig,
+                                    "latency_ms": round((time.perf_counter() - sent_at) * 1000, 1)})
+                if dashboard:
+                    dashboard(0, initial_heartbeats, heartbeat, state, entry, agents, last_sig, total_witnessed)
                 break
             else:
-                sig = writer.write_witness_entry(entry, metadata)
+                with tracing.use(witness):
+                    sig = writer.write_witness_entry(entry, metadata)
+                witness.set(sig=sig, remaining=remaining)
                 last_sig = sig
+                ENTRIES.labels("witness").inc()
+                # Structured fields for log_format: json
+                fields = {"entry": total_witnessed, "remaining": remaining, "bpm": human_bpm, "sig": sig,
+                          "latency_ms": round((time.perf_counter() - sent_at) * 1000, 1)}
                 if sig:
-                    log.info(f"Witness #{total_witnessed} | {remaining:,} left | {human_bpm} BPM | TX: {sig[:20]}...")
+                    log.info(f"Witness #{total_witnessed} | {remaining:,} left | {human_bpm} BPM | TX: {sig[:20]}...",
+                             extra=fields)
                 else:
-                    log.warning(f"Witness #{total_witnessed} | TX FAILED")
+                    log.warning(f"Witness #{total_witnessed} | TX FAILED", extra=fields)
 
             # Dashboard
-            print_dashboard(remaining, initial_heartbeats, heartbeat, state, entry, agents, last_sig, total_witnessed)
+            if dashboard:
+                dashboard(remaining, initial_heartbeats, heartbeat, state, entry, agents, last_sig, total_witnessed)
 
             # Save state periodically
             if total_witnessed % 10 == 0:
-                with open(state_file, "w") as f:
+                with tracing.use(witness), tracing.span("persist"), open(state_file, "w") as f:
                     json.dump({"remaining": remaining, "total_witnessed": total_witnessed}, f)
+            witness.end()
 
-            # Wait
-            time.sleep(interval)
+            ticker.done()
 
         except Exception as e:
+            witness.set(error=str(e)).end()
             log.error(f"Witness loop error: {e}")
-            time.sleep(10)
+            clock.wait(stop.wait, 10)
 
     # Final save
     with open(state_file, "w") as f:
         json.dump({"remaining": remaining, "total_witnessed": total_witnessed}, f)
     log.info(f"MORTEM v2 stopped. Remaining: {remaining:,}, Witnessed: {total_witnessed}")
+    tick = ticker.stats()
+    log.info(f"Tick drift ({ticker.policy}): mean {tick['mean_drift_ms']}ms, max {tick['max_drift_ms']}ms, "
+             f"skipped {tick['skipped']}, caught up {tick['caught_up']}")
+    return {"remaining": remaining, "total_witnessed": total_witnessed, "ticks": tick}
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+def check_balance(client: Client, wallet: Keypair):
+    try:
+        balance = client.get_balance(wallet.pubkey())
+    except Exception as e:
+        log.warning(f"Balance check failed: {e}")
+        return
+    sol = balance.value / 1_000_000_000
+    log.info(f"MORTEM balance: {sol:.4f} SOL")
+    if sol < 0.01:
+        request_airdrop(client, wallet)
+
+
+def request_airdrop(client: Client, wallet: Keypair):
+    log.info("Requesting airdrop...")
+    try:
+        client.request_airdrop(wallet.pubkey(), 2_000_000_000)
+        time.sleep(5)
+    except Exception as e:
+        log.error(f"Airdrop failed: {e}")
+
+
+def main(clock: Clock = SYSTEM_CLOCK):
+    """Run the witness. With a VirtualClock the loop never blocks, so a whole
+    lifetime of entries runs as fast as the writer can take them."""
+    config = load_config()
+    try:
+        setup_logging(LOG_FILE, config)
+    except ValueError as e:
+        log.error(f"Invalid logging config: {e}")
+        sys.exit(1)
+    try:
+        # run_witness builds the real one; fail here, before the wallet and RPC
+        Ticker(config.get("witness_interval_seconds", 300), config.get("tick_policy", "fixed_rate"),
+               config.get("missed_ticks", "skip"), clock=clock.monotonic)
+    except ValueError as e:
+        log.error(f"Invalid tick config: {e}")
+        sys.exit(1)
+    if config.get("trace_path"):
+        # Witness entries join the traces of the beats they read
+        tracing.TRACER.configure(Path(__file__).parent / config["trace_path"], "witness",
+                                 config.get("trace_max_bytes", 10 * 2**20), config.get("trace_backups", 5))
+        log.info(f"Tracing witness entries to {config['trace_path']}")
+
+    # Wallet
+    wallet = load_wallet(config["mortem_wallet_path"])
+    log.info(f"MORTEM wallet: {wallet.pubkey()}")
+
+    # Solana
+    rpc_url = config.get("rpc_endpoint", "https://api.devnet.solana.com")
+    client = timed(Client(rpc_url), RPC)  # every call's latency, by method
+    if config.get("metrics_port"):
+        serve(config["metrics_port"])
+        log.info(f"Metrics at http://0.0.0.0:{config['metrics_port']}/metrics")
+
+    # Check balance and airdrop if needed, off the way to the first entry
+    threading.Thread(target=check_balance, args=(client, wallet), name="balance", daemon=True).start()
+
+    # Heartbeat reader
+    human_wallet = config.get("human_wallet_pubkey", "")
+    data_source = config.get("data_source", "mock")
+    if data_source == "synthetic":
+        reader = SyntheticHeartbeatReader(
+            seed=config.get("synthetic_seed"),
+            rate_hz=config.get("synthetic_rate_hz", 1.0),
+            clock=clock,
+        )
+        log.info("Using synthetic heartbeat reader")
+    elif data_source == "mock" or not human_wallet:
+        reader = MockHeartbeatReader(clock)
+        log.info("Using mock heartbeat reader")
+    else:
+        reader = HeartbeatReader(client, human_wallet)
+        log.info(f"Reading heartbeats from: {human_wallet}")
+
+    # Writer
+    writer = WitnessWriter(client, wallet, lamports=config.get("lamports", 1000), clock=clock)
+
+    # State file for persistence
+    state_file = Path(__file__).parent / "mortem_state.json"
+
+    # Graceful shutdown: the loop finishes its entry, saves state and returns
+    stop = threading.Event()
+    wake = threading.Event()  # cuts the wait for the next tick short (shutdown, reload)
+    def shutdown(sig, frame):
+        log.info("Shutting down MORTEM witness...")
+        stop.set()
+        wake.set()
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+    # SIGUSR1: CPU profile window, SIGUSR2: allocation diff (dumps next to the log)
+    try:
+        profiler = profiling.install("witness", log_path(LOG_FILE).parent, config)
+    except ValueError as e:
+        log.error(f"Invalid profiling config: {e}")
+        sys.exit(1)
+
+    # Hot reload (SIGHUP, or config_watch_seconds) of the interval and RPC endpoint
+    reloader = ConfigReloader(CONFIG_FILE, config, {
+        "witness_interval_seconds": positive_number,
+        "rpc_endpoint": http_url,
+    }, watch_interval=config.get("config_watch_seconds", 0), wake=wake)
+    reloader.install()
+
+    # Dashboard: the loop only hands over each entry's values; the panel
+    # redraws on its own thread, headless when stdout isn't a TTY
+    latest = []
+    def show(*values):
+        latest[:] = [values]
+        panel.poke()
+    def render_dashboard() -> list[str]:
+        if not latest:
+            return ["  MORTEM v2 - AI WITNESS AGENT", "  (waiting for the first witness entry)"]
+        return dashboard_lines(*latest[0], reloader.current.get("witness_interval_seconds", 300), clock)
+    try:
+        panel = Dashboard(render_dashboard, refresh=config.get("dashboard_refresh_seconds", 1.0),
+                          mode=config.get("dashboard", "auto"))
+    except ValueError as e:
+        log.error(f"Invalid dashboard config: {e}")
+        sys.exit(1)
+    panel.start()
+    try:
+        run_witness(reader, writer, config, state_file, clock=clock, stop=stop, dashboard=show,
+                    reloader=reloader, wake=wake)
+    finally:
+        panel.stop()
+        profiler.close()
+        reloader.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+MORTEM v2 — Witness Lifecycle Simulator
+
+Runs MORTEM's whole life (86,400 burns; ~300 days at the 300s interval)
+in virtual time: the real witness loop, StateTracker, Juniper agents and
+template engine, fed by the seeded synthetic heartbeat and writing to a
+fake writer that encodes every memo but sends nothing. State is persisted
+to a temporary state file, and the run is stopped and resumed from it
+(--restarts) to exercise the warm path.
+
+Prints a JSON report: throughput, memory, memo sizes, heart states seen,
+the late-life branches reached (Dijkstra's countdown, the "dying" final
+entry) and the final state file.
+
+Run: python simulate.py
+     python simulate.py --heartbeats 1000 --restarts 3 --tracemalloc
+"""
+
+import argparse
+import json
+import logging
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+from mortem_witness import SyntheticHeartbeatReader, WitnessWriter, run_witness
+from witness_templates import TEMPLATES
+from mortem_common.clock import VirtualClock
+
+MEMO_LIMIT = 566  # bytes a Solana memo instruction reliably carries
+
+
+class SimulatedWriter(WitnessWriter):
+    """WitnessWriter that builds and encodes every memo but never sends it."""
+
+    def __init__(self, clock):
+        super().__init__(client=None, wallet=None, clock=clock)
+        self.sent = 0
+        self.memo_bytes = 0
+        self.max_memo = 0
+        self.over_limit = 0
+        self.last: dict | None = None
+
+    def _send_memo(self, data: dict) -> str | None:
+        size = len(json.dumps(data, separators=(",", ":")).encode("utf-8"))
+        self.sent += 1
+        self.memo_bytes += size
+        self.max_memo = max(self.max_memo, size)
+        self.over_limit += size > MEMO_LIMIT
+        self.last = data
+        return f"sim{self.sent:085d}"
+
+
+class _Observer:
+    """Dashboard stand-in: tallies each entry and stops the run at `stop_at`."""
+
+    def __init__(self, stop: threading.Event, stop_at: int | None):
+        self.stop = stop
+        self.stop_at = stop_at
+        self.states: dict[str, int] = {}
+        self.dijkstra = 0
+        self.no_data = 0
+        self.final_entry: str | None = None
+
+    def __call__(self, remaining, total, heartbeat, state, entry, agents, last_sig, total_witnessed):
+        self.states[state] = self.states.get(state, 0) + 1
+        self.dijkstra += "Dijkstra warns:" in entry
+        self.no_data += heartbeat is None
+        if remaining <= 0:
+            self.final_entry = entry
+        if self.stop_at is not None and total_witnessed >= self.stop_at:
+            self.stop.set()
+
+
+def _is_dying(entry: str | None) -> bool:
+    """True if `entry` was rendered from one of the "dying" templates."""
+    if not entry:
+        return False
+    return any(entry.startswith(t.split("{", 1)[0]) for t in TEMPLATES["dying"])
+
+
+def simulate(heartbeats: int = 86400, interval: float = 300, seed: int = 42,
+             rate_hz: float = 1 / 60, restarts: int = 1) -> dict:
+    random.seed(seed)  # agent selection and template choice
+    clock = VirtualClock()
+    reader = SyntheticHeartbeatReader(seed=seed, rate_hz=rate_hz, clock=clock)
+    writer = SimulatedWriter(clock)
+    config = {"initial_heartbeats": heartbeats, "witness_interval_seconds": interval}
+    segment = heartbeats // (restarts + 1) if restarts else None
+
+    observers = []
+    ticks = []
+    with tempfile.TemporaryDirectory() as tmp:
+        state_file = Path(tmp) / "mortem_state.json"
+        began = time.perf_counter()
+        for run in range(restarts + 1):
+            stop = threading.Event()
+            stop_at = segment * (run + 1) if segment and run < restarts else None
+            observer = _Observer(stop, stop_at)
+            result = run_witness(reader, writer, config, state_file, clock=clock, stop=stop,
+                                 dashboard=observer)
+            observers.append(observer)
+            ticks.append(result["ticks"])
+        elapsed = time.perf_counter() - began
+        final_state = json.loads(state_file.read_text())
+
+    states: dict[str, int] = {}
+    for observer in observers:
+        for state, n in observer.states.items():
+            states[state] = states.get(state, 0) + n
+    final_entry = observers[-1].final_entry
+    return {
+        "heartbeats": heartbeats,
+        "entries": writer.sent,
+        "runs": restarts + 1,
+        "virtual_days": round(clock.monotonic() / 86400, 2),
+        "seconds": round(elapsed, 3),
+        "entries_per_sec": round(writer.sent / elapsed) if elapsed else None,
+        "memo_bytes_total": writer.memo_bytes,
+        "memo_bytes_max": writer.max_memo,
+        "memos_over_limit": writer.over_limit,
+        "states": dict(sorted(states.items())),
+        "entries_without_data": sum(o.no_data for o in observers),
+        "dijkstra_countdowns": sum(o.dijkstra for o in observers),
+        "final_entry_dying": _is_dying(final_entry),
+        "final_memo_type": writer.last["type"] if writer.last else None,
+        "final_entry": final_entry,
+        "state_file": final_state,
+        "ticks": {
+            "ticks": sum(t["ticks"] for t in ticks),
+            "skipped": sum(t["skipped"] for t in ticks),
+            "max_drift_ms": max(t["max_drift_ms"] for t in ticks),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate MORTEM's full witness lifecycle in virtual time")
+    parser.add_argument("--heartbeats", type=int, default=86400)
+    parser.add_argument("--interval", type=float, default=300, help="witness interval (virtual seconds)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--rate-hz", type=float, default=1 / 60,
+                        help="synthetic heart-rate samples per virtual second")
+    parser.add_argument("--restarts", type=int, default=1,
+                        help="stop and resume from the state file this many times")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="also report peak traced Python allocations (slower)")
+    parser.add_argument("--verbose", action="store_true", help="keep per-entry witness logging")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger("mortem_witness").setLevel(logging.ERROR)
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    report = simulate(args.heartbeats, args.interval, args.seed, args.rate_hz, args.restarts)
+
+    if args.tracemalloc:
+        report["traced_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+        tracemalloc.stop()
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    report["max_rss_mb"] = round(rss / (2**20 if sys.platform == "darwin" else 2**10), 1)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
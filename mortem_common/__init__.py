@@ -0,0 +1,6 @@
+"""
+MORTEM v2 — Shared Service Code
+
+Modules used by both heartbeat-stream and mortem-witness. Each service puts
+the repository root on sys.path before importing from here.
+"""
@@ -0,0 +1,80 @@
+"""
+MORTEM v2 — Clocks
+
+Everything that reads or waits on time (death protocol, stale detection,
+sources, writers' memo timestamps, tickers and the main loops) takes a
+Clock, so long-horizon behavior can run in virtual time.
+
+  Clock         the real clocks: time.time(), time.monotonic(), time.sleep()
+  VirtualClock  starts at a fixed epoch and only moves when something
+                sleeps or waits on it, so a day of beats, grace periods and
+                art runs in seconds and the same inputs give the same run
+"""
+
+import math
+import time
+from datetime import datetime
+
+
+class Clock:
+    """Wall and monotonic time plus blocking waits."""
+
+    virtual = False
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def now(self, tz=None) -> datetime:
+        return datetime.now(tz)
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+    def wait(self, wait, timeout: float):
+        """Block in `wait(timeout)` (Event.wait, ArrivalQueue.wait, ...) and return its result."""
+        return wait(timeout)
+
+
+class VirtualClock(Clock):
+    """Simulated time that advances instantly.
+
+    sleep() and wait() jump the clock forward instead of blocking; wait()
+    first polls `wait(0)` so anything already pending is still seen.
+    Monotonic time starts at 0 and moves with the wall clock.
+    """
+
+    virtual = True
+
+    def __init__(self, start: float = 1_700_000_000.0):
+        self._start = float(start)
+        self._elapsed = 0.0
+
+    def time(self) -> float:
+        return self._start + self._elapsed
+
+    def monotonic(self) -> float:
+        return self._elapsed
+
+    def now(self, tz=None) -> datetime:
+        return datetime.fromtimestamp(self.time(), tz)
+
+    def advance(self, seconds: float):
+        if seconds > 0:
+            self._elapsed += seconds
+
+    def sleep(self, seconds: float):
+        self.advance(seconds)
+
+    def wait(self, wait, timeout: float):
+        result = wait(0)
+        if not result:
+            if timeout == math.inf:
+                raise RuntimeError("Virtual clock wait with no deadline would never return")
+            self.advance(timeout)
+        return result
+
+
+SYSTEM_CLOCK = Clock()
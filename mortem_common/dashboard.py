@@ -0,0 +1,111 @@
+"""
+MORTEM v2 — Terminal Dashboard
+
+A status panel pinned to the top of the terminal, drawn with plain ANSI
+escapes. Nothing is forked and the screen is never cleared per beat.
+
+The panel runs on its own thread. Every `refresh` seconds (or sooner,
+after poke()) it calls render() for the current lines. Only the lines
+that changed since the last frame are rewritten, inside a cursor
+save/restore. A scroll region below the panel keeps log output scrolling
+underneath it. Each frame is written under logsetup.CONSOLE_LOCK, so the
+log's console handler never writes in the middle of one.
+
+mode "auto" draws only when the stream is a TTY. The ops wrappers leave
+stdout on their terminal (only stderr is tee'd to the crash log), so the
+panel draws under them too. "on" forces the panel and "off" disables it.
+"""
+
+import shutil
+import sys
+import threading
+
+from mortem_common.logsetup import CONSOLE_LOCK
+
+MODES = ("auto", "on", "off")
+
+_ESC = "\033["
+
+
+class Dashboard:
+    """Incrementally redrawn top-of-terminal panel."""
+
+    def __init__(self, render, refresh: float = 1.0, mode: str = "auto", stream=None):
+        if mode not in MODES:
+            raise ValueError(f"dashboard mode must be one of {', '.join(MODES)}")
+        if refresh <= 0:
+            raise ValueError("dashboard refresh must be positive")
+        self.render = render
+        self.refresh = refresh
+        self.stream = stream or sys.stdout
+        isatty = getattr(self.stream, "isatty", None)
+        self.active = mode == "on" or (mode == "auto" and bool(isatty and isatty()))
+        self._drawn: list[str] = []
+        self._size = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        if not self.active or self._thread:
+            return
+        self._thread = threading.Thread(target=self._run, name="dashboard", daemon=True)
+        self._thread.start()
+
+    def poke(self):
+        """Redraw now instead of at the next refresh (e.g. right after a beat)."""
+        self._wake.set()
+
+    def stop(self):
+        """Stop drawing and hand the whole terminal back to the log."""
+        if not self._thread:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=2)
+        self._thread = None
+        rows = self._size[1] if self._size else shutil.get_terminal_size().lines
+        self._write(f"{_ESC}r{_ESC}{rows};1H\n")
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.draw(self.render())
+            except Exception:
+                pass  # a display glitch must never take the service down
+            self._wake.wait(self.refresh)
+            self._wake.clear()
+
+    def draw(self, lines: list[str]):
+        """Write the lines that differ from the previous frame."""
+        size = tuple(shutil.get_terminal_size())
+        width, rows = size
+        lines = [line[:width] for line in lines[:max(1, rows - 2)]]
+        out = []
+        drawn = self._drawn
+        if size != self._size:
+            # First frame or resize: start from a clean screen
+            self._size = size
+            out.append(f"{_ESC}2J")
+            drawn = []
+        if len(lines) != len(drawn) or out:
+            # Panel height changed: move the log's scroll region below it
+            out.append(f"{_ESC}{len(lines) + 1};{rows}r{_ESC}{rows};1H")
+        stale = range(len(lines), len(drawn))  # rows the panel no longer uses
+        drawn = drawn + [None] * (len(lines) - len(drawn))
+        changed = [(i, line) for i, line in enumerate(lines) if line != drawn[i]]
+        if not changed and not out:
+            return
+        out.append("\0337")  # save cursor (it lives in the scrolling log region)
+        for i, line in changed:
+            out.append(f"{_ESC}{i + 1};1H{line}{_ESC}K")
+        for i in stale:
+            out.append(f"{_ESC}{i + 1};1H{_ESC}K")
+        out.append("\0338")
+        self._drawn = lines
+        self._write("".join(out))
+
+    def _write(self, data: str):
+        with CONSOLE_LOCK:
+            self.stream.write(data)
+            self.stream.flush()
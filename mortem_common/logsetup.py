@@ -0,0 +1,127 @@
+"""
+MORTEM v2 — Logging
+
+Both services log through a QueueHandler. A QueueListener thread does the
+actual console and file writes, so a slow disk, a log rotation or a gzip
+never stalls the beat loop. Emitting a record is only a queue put.
+
+The log file rotates by size (log_max_bytes, keeping log_backups
+segments), and rotated segments are gzip'd on the listener thread. With
+log_format: json the file gets one JSON object per line: time, level,
+logger, message and any of FIELDS passed as `extra` (beat number, BPM,
+signature, send latency, ...). The console always gets the plain text
+format. Its writes hold CONSOLE_LOCK, which the terminal dashboard also
+holds while redrawing, so a log line never lands inside a redraw's cursor
+moves.
+
+MORTEM_LOG_FILE overrides the file path. The ops wrappers set it to
+logs/<service>.log at the repo root and no longer tee stdout into it, so
+each line is written once.
+"""
+
+import atexit
+import gzip
+import json
+import logging
+import os
+import shutil
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from pathlib import Path
+from queue import SimpleQueue
+
+TEXT_FORMAT = "%(asctime)s [%(levelname)s] %(message)s"
+FORMATS = ("text", "json")
+
+# Structured fields a log call may pass as extra={...}
+FIELDS = ("entity", "beat", "entry", "status", "bpm", "sig", "latency_ms", "remaining")
+
+_listener: QueueListener | None = None
+
+# Shared by the console handler and the dashboard, the two stdout writers
+CONSOLE_LOCK = threading.RLock()
+
+
+class JSONLineFormatter(logging.Formatter):
+    """One JSON object per record, with any FIELDS the call supplied."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for field in FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                out[field] = value
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, separators=(",", ":"), default=str)
+
+
+class ConsoleHandler(logging.StreamHandler):
+    """StreamHandler that writes under CONSOLE_LOCK."""
+
+    def emit(self, record: logging.LogRecord):
+        with CONSOLE_LOCK:
+            super().emit(record)
+
+
+def gzip_rotator(source: str, dest: str):
+    with open(source, "rb") as f_in, gzip.open(dest, "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    os.remove(source)
+
+
+def log_path(default_file: Path) -> Path:
+    """The log file in use: $MORTEM_LOG_FILE or the service's default."""
+    return Path(os.environ.get("MORTEM_LOG_FILE") or default_file)
+
+
+def setup_logging(default_file: Path, config: dict | None = None) -> QueueListener:
+    """Route the root logger through a queue to the console and a rotating file.
+
+    Safe to call again (e.g. once the config is loaded): the new listener
+    takes over and the old one drains its queue and closes.
+    """
+    global _listener
+    config = config or {}
+    fmt = config.get("log_format", "text")
+    if fmt not in FORMATS:
+        raise ValueError(f"log_format must be one of {', '.join(FORMATS)}")
+    path = log_path(default_file)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    file_handler = RotatingFileHandler(path, maxBytes=config.get("log_max_bytes", 10 * 2**20),
+                                       backupCount=config.get("log_backups", 5), encoding="utf-8")
+    if config.get("log_compress", True):
+        file_handler.namer = lambda name: name + ".gz"
+        file_handler.rotator = gzip_rotator
+    file_handler.setFormatter(JSONLineFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+    console = ConsoleHandler(sys.stdout)
+    console.setFormatter(logging.Formatter(TEXT_FORMAT))
+
+    queue = SimpleQueue()
+    listener = QueueListener(queue, console, file_handler, respect_handler_level=True)
+    listener.start()
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    root.handlers = [QueueHandler(queue)]
+
+    previous, _listener = _listener, listener
+    if previous:
+        _stop(previous)
+    else:
+        atexit.register(lambda: _listener and _stop(_listener))
+    return listener
+
+
+def _stop(listener: QueueListener):
+    """Flush everything queued so far, then close the listener's handlers."""
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
@@ -0,0 +1,280 @@
+"""
+MORTEM v2 — Metrics
+
+Counters, gauges and histograms rendered in the Prometheus text
+exposition format (version 0.0.4) for a /metrics endpoint.
+
+Updates are cheap and take no lock. Each metric keeps one shard per
+thread that updates it, and only that thread writes its shard, so an
+increment is a dict lookup and an add. A scrape sums the shards. Gauges
+can be bound to a function that is read at scrape time (remaining
+heartbeats, queue depths), so the hot path doesn't touch them at all.
+
+  REGISTRY           the process-wide registry the services register into
+  timed(obj, hist)   proxy that times every method call on `obj`
+                     (a solana Client) into `hist` labelled by method
+  serve(port)        small threaded HTTP listener for processes without
+                     their own server
+"""
+
+import bisect
+import math
+import threading
+import time
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds: RPC round-trips, memo sends, art renders
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_ident = threading.get_ident
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), registry=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple, object] = {}
+        self._function = None
+        (REGISTRY if registry is None else registry).register(self)
+
+    def labels(self, *values, **kwargs):
+        """The child for one label combination (created on first use)."""
+        key = values or tuple(str(kwargs[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children.setdefault(tuple(str(v) for v in key), self._child())
+        return child
+
+    def set_function(self, fn):
+        """Report fn() at scrape time instead of stored values.
+
+        fn returns a number or, for a labelled metric, a {label values: number} dict.
+        """
+        self._function = fn
+
+    def samples(self):
+        if self._function is not None:
+            value = self._function()
+            if isinstance(value, dict):
+                for key, v in value.items():
+                    key = key if isinstance(key, tuple) else (key,)
+                    yield self.name, key, "", v
+            else:
+                yield self.name, (), "", value
+            return
+        for key, child in list(self._children.items()):
+            yield from child.samples(self.name, key)
+
+
+class _Value:
+    __slots__ = ("_shards",)
+
+    def __init__(self):
+        self._shards: dict[int, float] = {}
+
+    def inc(self, amount: float = 1):
+        tid = _ident()
+        self._shards[tid] = self._shards.get(tid, 0) + amount
+
+    def get(self) -> float:
+        return sum(list(self._shards.values()))
+
+    def samples(self, name, key):
+        yield name, key, "", self.get()
+
+
+class _GaugeValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, value: float):
+        self.value = value
+
+    def samples(self, name, key):
+        yield name, key, "", self.value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1):
+        self.labels().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _child(self):
+        return _GaugeValue()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+
+class _HistogramValue:
+    __slots__ = ("buckets", "_shards")
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self._shards: dict[int, list] = {}
+
+    def observe(self, value: float):
+        shard = self._shards.get(_ident())
+        if shard is None:
+            # [count per bucket..., +Inf count, sum]
+            shard = self._shards[_ident()] = [0] * (len(self.buckets) + 1) + [0.0]
+        shard[bisect.bisect_left(self.buckets, value)] += 1
+        shard[-1] += value
+
+    def time(self):
+        return _Timer(self)
+
+    def samples(self, name, key):
+        totals = [0] * (len(self.buckets) + 2)
+        for shard in list(self._shards.values()):
+            for i, v in enumerate(shard):
+                totals[i] += v
+        cumulative = 0
+        for bound, n in zip(self.buckets + (math.inf,), totals):
+            cumulative += n
+            yield f"{name}_bucket", key, f'le="{_format_value(float(bound))}"', cumulative
+        yield f"{name}_sum", key, "", totals[-1]
+        yield f"{name}_count", key, "", cumulative
+
+
+class _Timer:
+    __slots__ = ("_hist", "_began")
+
+    def __init__(self, hist):
+        self._hist = hist
+
+    def __enter__(self):
+        self._began = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._hist.observe(time.perf_counter() - self._began)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS,
+                 registry=None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames, registry)
+
+    def _child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def time(self):
+        """Context manager observing the elapsed seconds."""
+        return self.labels().time()
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> bytes:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            try:
+                for name, key, extra, value in metric.samples():
+                    labels = _format_labels(metric.labelnames, key, extra)
+                    lines.append(f"{name}{labels} {_format_value(value)}")
+            except Exception as e:
+                lines.append(f"# {metric.name} unavailable: {_escape(e)}")
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+REGISTRY = Registry()
+
+
+class _TimedProxy:
+    """Forwards attribute access to `target`, timing method calls into `hist`."""
+
+    def __init__(self, target, hist: Histogram):
+        self._target = target
+        self._hist = hist
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+        child = self._hist.labels(name)
+
+        def call(*args, **kwargs):
+            with child.time():
+                return attr(*args, **kwargs)
+        return call
+
+
+def timed(target, hist: Histogram):
+    """Proxy for `target` (e.g. a solana Client) recording every method call's latency."""
+    return _TimedProxy(target, hist)
+
+
+def serve(port: int, host: str = "0.0.0.0", registry: Registry = REGISTRY):
+    """Serve GET /metrics on a daemon thread."""
+    # Imported here: http.server is a noticeable share of startup, and only
+    # a standalone metrics_port needs it
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # scrapes would flood the service log
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
@@ -0,0 +1,183 @@
+"""
+MORTEM v2 — On-demand Profiling
+
+Signal hooks for looking inside a long-running service without restarting it:
+
+  kill -USR1 <pid>   start a cProfile window; send again to stop it. The
+                     stats go to <log dir>/<service>-cpu-<time>.prof and
+                     the top functions by cumulative time to the log.
+  kill -USR2 <pid>   take a tracemalloc snapshot and log the allocation
+                     sites that grew most since the previous one. The first
+                     signal starts tracing, so it only sets the baseline.
+
+MORTEM_PROFILE=cpu or memory (comma-separated) starts the same at
+startup. profile_alloc_seconds logs the top allocation sites every N
+seconds.
+
+Everything is safe to leave installed in production. Nothing is traced
+until asked, and a forgotten CPU window closes itself after
+profile_max_seconds. The handlers only flip a profiler on or off. Sorting
+and writing stats, and diffing snapshots, run on a worker thread, so a
+signal never holds up the beat loop for more than a moment.
+
+cProfile sees the main thread only: the beat and witness loops, not the
+receiver or the send pool. tracemalloc sees every thread.
+"""
+
+import cProfile
+import io
+import logging
+import os
+import pstats
+import signal
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+log = logging.getLogger("profiling")
+
+MODES = ("cpu", "memory")
+
+# Leave the profiler's own bookkeeping out of the allocation reports
+_FILTERS = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, pstats.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"))
+
+
+class Profiler:
+    """CPU windows and memory diffs for one service, driven by signals."""
+
+    def __init__(self, service: str, out_dir: Path, top: int = 15, max_window: float = 300.0,
+                 frames: int = 1):
+        self.service = service
+        self.out_dir = Path(out_dir)
+        self.top = top
+        self.max_window = max_window
+        self.frames = frames
+        self._cpu: cProfile.Profile | None = None
+        self._cpu_started = 0.0
+        self._cpu_timer: threading.Timer | None = None
+        self._snapshot: tracemalloc.Snapshot | None = None
+        self._lock = threading.Lock()  # one snapshot/diff at a time
+        self._stop = threading.Event()
+
+    # --- Signals -------------------------------------------------------
+
+    def install(self, modes: str = "", alloc_interval: float = 0):
+        """Hook SIGUSR1/SIGUSR2 (main thread only) and start whatever `modes` asks for."""
+        modes = {m.strip() for m in modes.split(",") if m.strip()}
+        unknown = modes - set(MODES)
+        if unknown:
+            raise ValueError(f"MORTEM_PROFILE must list {' and/or '.join(MODES)}, got {', '.join(sorted(unknown))}")
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, lambda signum, frame: self.toggle_cpu())
+            signal.signal(signal.SIGUSR2, lambda signum, frame: self.memory_diff())
+        if "cpu" in modes:
+            self.toggle_cpu()
+        if "memory" in modes:
+            self.memory_diff()
+        if alloc_interval > 0:
+            self._start_tracing()
+            threading.Thread(target=self._log_allocations, args=(alloc_interval,),
+                             name="alloc-top", daemon=True).start()
+
+    def close(self):
+        """Close an open CPU window (its stats are still written) and stop the periodic log."""
+        self._stop.set()
+        if self._cpu:
+            self._end_cpu(background=False)
+
+    # --- CPU -----------------------------------------------------------
+
+    def toggle_cpu(self):
+        """Start a cProfile window on this thread, or end the open one."""
+        if self._cpu is None:
+            self._cpu = cProfile.Profile()
+            try:
+                self._cpu.enable()
+            except ValueError as e:  # another profiler is already active
+                self._cpu = None
+                log.warning(f"[PROFILE] CPU profile not started: {e}")
+                return
+            self._cpu_started = time.monotonic()
+            if self.max_window > 0 and hasattr(signal, "SIGUSR1"):
+                # Closed from the main thread too, via the same signal
+                self._cpu_timer = threading.Timer(self.max_window, os.kill, (os.getpid(), signal.SIGUSR1))
+                self._cpu_timer.daemon = True
+                self._cpu_timer.start()
+            log.info(f"[PROFILE] CPU profile started (stops on the next SIGUSR1 "
+                     f"or after {self.max_window:.0f}s)")
+            return
+        self._end_cpu(background=True)
+
+    def _end_cpu(self, background: bool):
+        profile, self._cpu = self._cpu, None
+        profile.disable()
+        if self._cpu_timer:
+            self._cpu_timer.cancel()
+            self._cpu_timer = None
+        window = time.monotonic() - self._cpu_started
+        if background:
+            threading.Thread(target=self._write_cpu, args=(profile, window), name="profile-dump",
+                             daemon=True).start()
+        else:
+            self._write_cpu(profile, window)
+
+    def _write_cpu(self, profile: cProfile.Profile, window: float):
+        try:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            path = self.out_dir / f"{self.service}-cpu-{time.strftime('%Y%m%d-%H%M%S')}.prof"
+            profile.dump_stats(path)
+            out = io.StringIO()
+            pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(self.top)
+            log.info(f"[PROFILE] CPU profile of {window:.1f}s saved to {path}\n{out.getvalue().strip()}")
+        except Exception as e:
+            log.warning(f"[PROFILE] CPU profile dump failed: {e}")
+
+    # --- Memory --------------------------------------------------------
+
+    def _start_tracing(self) -> bool:
+        """Start tracemalloc if needed; True if it was already running."""
+        if tracemalloc.is_tracing():
+            return True
+        tracemalloc.start(self.frames)
+        return False
+
+    def memory_diff(self):
+        """Snapshot allocations and log the growth since the previous snapshot."""
+        self._start_tracing()
+        threading.Thread(target=self._diff, name="profile-mem", daemon=True).start()
+
+    def _diff(self):
+        with self._lock:
+            try:
+                snapshot = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+            except RuntimeError:
+                return  # tracing was stopped meanwhile
+            previous, self._snapshot = self._snapshot, snapshot
+            if previous is None:
+                log.info("[PROFILE] Allocation baseline taken; the next SIGUSR2 logs what grew since now")
+                return
+            current, peak = tracemalloc.get_traced_memory()
+            stats = snapshot.compare_to(previous, "lineno")[:self.top]
+            lines = "\n".join(f"  {stat}" for stat in stats)
+            log.info(f"[PROFILE] Allocation growth (traced {current / 2**20:.1f} MB, "
+                     f"peak {peak / 2**20:.1f} MB):\n{lines}")
+
+    def _log_allocations(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                stats = tracemalloc.take_snapshot().filter_traces(_FILTERS).statistics("lineno")[:self.top]
+            except RuntimeError:
+                return
+            total = tracemalloc.get_traced_memory()[0]
+            lines = "\n".join(f"  {stat}" for stat in stats)
+            log.info(f"[PROFILE] Top allocation sites ({total / 2**20:.1f} MB traced):\n{lines}")
+
+
+def install(service: str, out_dir: Path, config: dict) -> Profiler:
+    """The service's Profiler, hooked up per the config and $MORTEM_PROFILE."""
+    profiler = Profiler(service, out_dir, top=config.get("profile_top", 15),
+                        max_window=config.get("profile_max_seconds", 300))
+    profiler.install(os.environ.get("MORTEM_PROFILE", ""), config.get("profile_alloc_seconds", 0))
+    return profiler
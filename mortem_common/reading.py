@@ -0,0 +1,135 @@
+"""
+MORTEM v2 — Heart Rate Reading
+
+One reading as it moves from a source (mock, synthetic, file replay, live
+receiver, chain memo) through the beat loop into memos, history and art.
+
+A Reading keeps times as epoch floats and only formats ISO strings when a
+timestamp is actually serialized, once per reading. Item access
+(reading["bpm"], reading.get("interval")) is kept so code written against
+the old reading dicts still works; to_dict() gives the JSON form.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+_UTC = timezone.utc
+_OFFSETS: dict[int, timezone] = {0: _UTC}
+
+# Optional fields are omitted from to_dict() (and raise KeyError) when None
+_FIELDS = ("bpm", "timestamp", "source", "watch_id", "data_type", "original_timestamp",
+           "entity", "interval", "stale_seconds", "replay_speed", "received_at")
+_OPTIONAL = frozenset(("original_timestamp", "entity", "interval", "stale_seconds", "replay_speed",
+                       "received_at"))
+
+
+def _local_date(epoch: float, offset_minutes: int) -> str:
+    """Health export date format ("2025-01-01 12:00:00 -0500") in the sample's own offset."""
+    tz = _OFFSETS.get(offset_minutes)
+    if tz is None:
+        tz = _OFFSETS[offset_minutes] = timezone(timedelta(minutes=offset_minutes))
+    return datetime.fromtimestamp(epoch, tz).strftime("%Y-%m-%d %H:%M:%S %z")
+
+
+class Reading:
+    """A heart-rate reading taken at `epoch` (seconds, UTC).
+
+    `sample_epoch`/`utc_offset` locate the underlying watch sample for
+    original_timestamp; a source that already has the date string can pass
+    it as `original_timestamp` instead. `received_at` is the wall time the
+    newest real sample behind the reading reached us (see fresh_at).
+    `trace` is the span context ("<trace>-<span>") of the request that
+    delivered that sample, or of the beat a chain memo records.
+    """
+
+    __slots__ = ("bpm", "epoch", "source", "watch_id", "data_type", "entity",
+                 "sample_epoch", "utc_offset", "interval", "stale_seconds", "replay_speed",
+                 "received_at", "trace", "_timestamp", "_original")
+
+    def __init__(self, bpm: int, epoch: float, source: str, watch_id: int = 1,
+                 data_type: str = "", *, entity: str | None = None,
+                 sample_epoch: float | None = None, utc_offset: int = 0,
+                 original_timestamp: str | None = None, interval: dict | None = None,
+                 stale_seconds: int | None = None, replay_speed: float | None = None,
+                 received_at: float | None = None, timestamp: str | None = None,
+                 trace: str | None = None):
+        self.bpm = bpm
+        self.epoch = epoch
+        self.source = source
+        self.watch_id = watch_id
+        self.data_type = data_type
+        self.entity = entity
+        self.sample_epoch = sample_epoch
+        self.utc_offset = utc_offset
+        self.interval = interval
+        self.stale_seconds = stale_seconds
+        self.replay_speed = replay_speed
+        self.received_at = received_at
+        self.trace = trace
+        self._timestamp = timestamp
+        self._original = original_timestamp
+
+    @classmethod
+    def from_memo(cls, data: dict) -> "Reading":
+        """Reading from a HUMAN_HEARTBEAT memo; its timestamp string is kept as-is."""
+        stamp = data.get("timestamp")
+        try:
+            epoch = datetime.fromisoformat(stamp).timestamp()
+        except (TypeError, ValueError):
+            epoch, stamp = 0.0, None
+        return cls(data.get("bpm"), epoch, data.get("source", ""), data.get("watch_id", 1),
+                   "chain", entity=data.get("entity"), interval=data.get("interval"),
+                   timestamp=stamp, trace=data.get("trace"))
+
+    @property
+    def timestamp(self) -> str:
+        """ISO 8601 (UTC) form of `epoch`, formatted on first use."""
+        if self._timestamp is None:
+            self._timestamp = datetime.fromtimestamp(self.epoch, _UTC).isoformat()
+        return self._timestamp
+
+    @property
+    def fresh_at(self) -> float:
+        """Wall time of the newest real sample behind this reading.
+
+        Repeating a stale reading doesn't move it, so liveness is judged
+        by the source's data rather than by how often it is polled.
+        """
+        if self.received_at is not None:
+            return self.received_at
+        return self.epoch - (self.stale_seconds or 0)
+
+    @property
+    def original_timestamp(self) -> str | None:
+        """The watch sample's own date in its local offset, if known."""
+        if self._original is None and self.sample_epoch is not None:
+            self._original = _local_date(self.sample_epoch, self.utc_offset)
+        return self._original
+
+    # --- dict compatibility ---------------------------------------------
+
+    def __getitem__(self, key: str):
+        if key not in _FIELDS:
+            raise KeyError(key)
+        value = getattr(self, key)
+        if value is None and key in _OPTIONAL:
+            raise KeyError(key)
+        return value
+
+    def get(self, key: str, default=None):
+        value = getattr(self, key, None) if key in _FIELDS else None
+        return default if value is None else value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def to_dict(self) -> dict:
+        """JSON-ready dict with the same keys the sources used to return."""
+        out = {}
+        for key in _FIELDS:
+            value = getattr(self, key)
+            if value is not None or key not in _OPTIONAL:
+                out[key] = value
+        return out
+
+    def __repr__(self) -> str:
+        return f"Reading(bpm={self.bpm}, epoch={self.epoch:.3f}, source={self.source!r}, data_type={self.data_type!r})"
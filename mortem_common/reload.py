@@ -0,0 +1,147 @@
+"""
+MORTEM v2 — Config Reload
+
+Re-reads a service's YAML config while it runs, on SIGHUP or (with
+config_watch_seconds) when the file changes, so a new interval, grace period
+or RPC endpoint doesn't cost a restart and its lost beats.
+
+A reload is all or nothing. The new file must parse, every changed key must
+be one the service can reload, and every changed value must validate. If
+anything fails, the error is logged and the running config stays exactly as
+it was. Otherwise check() returns the changed keys, and the service applies
+them together on its loop thread, between beats. Changes to keys that can't
+be reloaded (wallets, ports, data sources, ...) are rejected by name, so
+restarting is a deliberate choice.
+
+The signal handler and the file watcher only set a flag (the watcher raises
+SIGHUP itself). A loop blocked on the signal wakeup fd wakes up on its own;
+a loop sleeping on an Event passes it as `wake`, and the handler sets it
+too, so a shorter interval doesn't wait out the old one. The file is read
+and validated in check(), on the loop thread.
+"""
+
+import logging
+import os
+import signal
+import threading
+from pathlib import Path
+
+import yaml
+
+log = logging.getLogger("reload")
+
+
+def positive_number(value) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        raise ValueError("must be a positive number")
+    return value
+
+
+def positive_int(value) -> int:
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError("must be a positive integer")
+    return value
+
+
+def http_url(value) -> str:
+    if not isinstance(value, str) or not value.startswith(("http://", "https://")):
+        raise ValueError("must be an http(s) URL")
+    return value
+
+
+class ConfigReloader:
+    """Validated, all-or-nothing reloads of one YAML config file."""
+
+    def __init__(self, path: Path, current: dict, reloadable: dict, validate=None,
+                 watch_interval: float = 0, wake: threading.Event | None = None):
+        """`reloadable` maps each reloadable key to a validator that returns the
+        value or raises ValueError. `validate(new_config)` may cross-check the
+        whole new config (raising ValueError). `wake` is set with each request."""
+        self.path = Path(path)
+        self.current = dict(current)
+        self.reloadable = reloadable
+        self.validate = validate
+        self.watch_interval = watch_interval
+        self.wake = wake
+        self._requested = threading.Event()
+        self._stop = threading.Event()
+
+    def install(self):
+        """SIGHUP requests a reload; with watch_interval, so does a change to the file."""
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, lambda signum, frame: self._request())
+        if self.watch_interval > 0:
+            threading.Thread(target=self._watch, name="config-watch", daemon=True).start()
+
+    def close(self):
+        self._stop.set()
+
+    def _request(self):
+        self._requested.set()
+        if self.wake:
+            self.wake.set()
+
+    def pending(self) -> bool:
+        return self._requested.is_set()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _watch(self):
+        seen = self._stat()
+        while not self._stop.wait(self.watch_interval):
+            stat = self._stat()
+            if stat is not None and stat != seen:
+                seen = stat
+                if hasattr(signal, "SIGHUP"):
+                    os.kill(os.getpid(), signal.SIGHUP)
+                else:
+                    self._request()
+
+    def check(self) -> dict | None:
+        """Read a requested reload; the changed reloadable keys, or None if none/rejected."""
+        if not self._requested.is_set():
+            return None
+        self._requested.clear()
+        try:
+            with open(self.path) as f:
+                new = yaml.safe_load(f) or {}
+            if not isinstance(new, dict):
+                raise ValueError("top level must be a mapping")
+        except (OSError, ValueError, yaml.YAMLError) as e:
+            log.error(f"Config reload rejected, keeping the running config: {self.path.name}: {e}")
+            return None
+
+        keys = set(self.current) | set(new)
+        changed = sorted(key for key in keys if self.current.get(key) != new.get(key))
+        if not changed:
+            log.info(f"Config reload: {self.path.name} unchanged")
+            return None
+        fixed = [key for key in changed if key not in self.reloadable]
+        if fixed:
+            log.error(f"Config reload rejected: {', '.join(fixed)} can't be changed without a restart "
+                      f"(reloadable: {', '.join(self.reloadable)}). Keeping the running config.")
+            return None
+        changes = {}
+        try:
+            for key in changed:
+                if key not in new:
+                    raise ValueError(f"{key}: can't be removed while running; set it explicitly")
+                try:
+                    changes[key] = self.reloadable[key](new[key])
+                except ValueError as e:
+                    raise ValueError(f"{key}: {e}") from None
+            if self.validate:
+                self.validate(new)
+        except ValueError as e:
+            log.error(f"Config reload rejected, keeping the running config: {e}")
+            return None
+
+        log.info("Config reload: " + ", ".join(f"{key} {self.current.get(key)!r} -> {changes[key]!r}"
+                                                for key in changed))
+        self.current = new
+        return changes
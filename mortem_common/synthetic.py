@@ -0,0 +1,278 @@
+"""
+MORTEM v2 — Synthetic Heartbeat Generator
+
+Seeded, realistic Apple Watch heart rate for load testing both services,
+generated in batches rather than one random.randint per call:
+
+  - circadian baseline (trough before dawn, peak mid-afternoon)
+  - HRV: respiratory sinus arrhythmia plus Gaussian beat-to-beat noise
+  - pacemaker floor: readings never fall below a pacer rate of 58-62 BPM
+  - anomaly bursts (exercise, stress) that ramp up and back down
+  - dropouts (watch off the wrist) with no samples, after which the
+    other watch takes over
+
+With numpy installed each batch is computed vectorized (millions of samples
+per second); without it a pure-Python path is used (a few hundred thousand
+per second). The same seed reproduces the same stream on the same backend.
+"""
+
+import math
+import random
+import time
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_TWO_PI = 2 * math.pi
+_RSA_HZ = 0.25  # ~15 breaths a minute
+
+
+class SampleBatch:
+    """Parallel columns of generated samples (numpy arrays or array.array)."""
+
+    __slots__ = ("epochs", "bpm", "watch", "utc_offset")
+
+    def __init__(self, epochs, bpm, watch, utc_offset: int):
+        self.epochs = epochs
+        self.bpm = bpm
+        self.watch = watch
+        self.utc_offset = utc_offset  # minutes
+
+    def __len__(self) -> int:
+        return len(self.bpm)
+
+    def samples(self):
+        """(bpm, sample_epoch, utc_offset_minutes, date) tuples, as the receiver produces."""
+        offset = self.utc_offset
+        for bpm, epoch in zip(self.bpm.tolist(), self.epochs.tolist()):
+            yield bpm, epoch, offset, None
+
+    def stats(self) -> dict | None:
+        """count/min/max/mean/p95/last, matching SampleRing.interval_stats()."""
+        values = sorted(self.bpm.tolist())
+        n = len(values)
+        if not n:
+            return None
+        return {
+            "count": n,
+            "min": values[0],
+            "max": values[-1],
+            "mean": round(sum(values) / n, 1),
+            "p95": values[min(n - 1, math.ceil(0.95 * n) - 1)],
+            "last": int(self.bpm[-1]),
+        }
+
+
+class SyntheticHeartbeat:
+    """Seeded generator of timestamped heart-rate samples at `rate_hz`.
+
+    Samples are evenly spaced from `start` (epoch seconds, default now).
+    batch(n) returns the next n sample slots with dropout slots removed, so
+    a batch can be shorter than n. advance_to(epoch) generates everything up
+    to a point in time, which is how the live sources use it.
+
+    Dropouts last at most `dropout_seconds[1]`. The default 120s is below
+    half the services' default 300s grace period, so a soak run never even
+    enters grace; pass a longer range to exercise the death path.
+    """
+
+    def __init__(self, seed: int | None = None, rate_hz: float = 1.0, start: float | None = None,
+                 utc_offset: int | None = None, resting_bpm: float = 72.0,
+                 circadian_amplitude: float = 10.0, peak_hour: float = 15.0,
+                 rsa_amplitude: float = 3.0, hrv_sd: float = 2.5,
+                 pacer_bpm: float = 60.0, pacer_jitter: float = 2.0,
+                 bursts_per_hour: float = 0.3, burst_bpm: tuple = (25.0, 55.0),
+                 burst_seconds: tuple = (60.0, 900.0), dropouts_per_hour: float = 0.2,
+                 dropout_seconds: tuple = (30.0, 120.0), watches: int = 2,
+                 vectorized: bool | None = None):
+        if rate_hz <= 0:
+            raise ValueError("rate_hz must be positive")
+        self.seed = seed
+        self.rate_hz = rate_hz
+        self.dt = 1.0 / rate_hz
+        self.t = time.time() if start is None else float(start)
+        if utc_offset is None:
+            utc_offset = time.localtime(self.t).tm_gmtoff // 60
+        self.utc_offset = int(utc_offset)
+        self.resting_bpm = resting_bpm
+        self.circadian_amplitude = circadian_amplitude
+        self.peak_hour = peak_hour
+        self.rsa_amplitude = rsa_amplitude
+        self.hrv_sd = hrv_sd
+        self.pacer_bpm = pacer_bpm
+        self.pacer_jitter = pacer_jitter
+        self.bursts_per_hour = bursts_per_hour
+        self.burst_bpm = burst_bpm
+        self.burst_seconds = burst_seconds
+        self.dropouts_per_hour = dropouts_per_hour
+        self.dropout_seconds = dropout_seconds
+        self.watches = max(1, watches)
+        self.vectorized = np is not None if vectorized is None else vectorized and np is not None
+
+        # Schedules and noise use separate streams derived from the seed, so
+        # the output doesn't depend on how the stream is split into batches
+        self._rng = random.Random(seed)
+        self._noise = random.Random(None if seed is None else f"noise-{seed}")
+        if self.vectorized:
+            self._np_normal, self._np_uniform = (
+                np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(2))
+        self._rsa_phase = self._rng.uniform(0, _TWO_PI)
+        self._bursts: list[tuple[float, float, float]] = []   # (start, end, amplitude)
+        self._dropouts: list[tuple[float, float]] = []        # (start, end)
+        self._next_burst = self.t + self._gap(bursts_per_hour)
+        self._next_dropout = self.t + self._gap(dropouts_per_hour)
+        self.watch = 1
+        self.generated = 0
+        self.dropped = 0
+
+    def _gap(self, per_hour: float) -> float:
+        return self._rng.expovariate(per_hour / 3600.0) if per_hour > 0 else math.inf
+
+    def _schedule(self, t0: float, t1: float):
+        """Extend burst/dropout schedules to t1 and forget events that ended before t0."""
+        rng = self._rng
+        while self._next_burst < t1:
+            start = self._next_burst
+            end = start + rng.uniform(*self.burst_seconds)
+            self._bursts.append((start, end, rng.uniform(*self.burst_bpm)))
+            self._next_burst = end + self._gap(self.bursts_per_hour)
+        while self._next_dropout < t1:
+            start = self._next_dropout
+            end = start + rng.uniform(*self.dropout_seconds)
+            self._dropouts.append((start, end))
+            self._next_dropout = end + self._gap(self.dropouts_per_hour)
+        self._bursts = [b for b in self._bursts if b[1] >= t0]
+        self._dropouts = [d for d in self._dropouts if d[1] >= t0]
+
+    def _span(self, t0: float, n: int, start: float, end: float) -> tuple[int, int]:
+        """Index range [i0, i1) of the n slots from t0 that fall inside [start, end)."""
+        i0 = max(0, math.ceil((start - t0) / self.dt))
+        i1 = min(n, math.ceil((end - t0) / self.dt))
+        return i0, max(i0, i1)
+
+    def batch(self, n: int) -> SampleBatch:
+        """Generate the next `n` sample slots."""
+        t0 = self.t
+        self.t = t0 + n * self.dt
+        self._schedule(t0, self.t)
+        make = self._batch_numpy if self.vectorized else self._batch_python
+        out = make(t0, n)
+        self.generated += len(out)
+        self.dropped += n - len(out)
+        return out
+
+    def advance_to(self, epoch: float) -> SampleBatch:
+        """Generate every sample slot up to `epoch`."""
+        return self.batch(max(0, int((epoch - self.t) * self.rate_hz)))
+
+    def _watch_changes(self, t0: float, n: int) -> list[tuple[int, int]]:
+        """(index, watch id) from which each post-dropout watch takes over."""
+        changes = []
+        for start, end in self._dropouts:
+            i = self._span(t0, n, end, end)[0]
+            if t0 <= end < t0 + n * self.dt:
+                self.watch = self.watch % self.watches + 1
+                changes.append((i, self.watch))
+        return changes
+
+    def _batch_numpy(self, t0: float, n: int) -> SampleBatch:
+        watch0 = self.watch
+        times = t0 + np.arange(n) * self.dt
+        hours = ((times + self.utc_offset * 60) % 86400) / 3600.0
+        bpm = self.resting_bpm + self.circadian_amplitude * np.cos(
+            (_TWO_PI / 24) * (hours - self.peak_hour))
+        bpm += self.rsa_amplitude * np.sin((_TWO_PI * _RSA_HZ) * times + self._rsa_phase)
+        bpm += self._np_normal.normal(0.0, self.hrv_sd, n)
+        for start, end, amplitude in self._bursts:
+            i0, i1 = self._span(t0, n, start, end)
+            if i0 < i1:
+                bpm[i0:i1] += amplitude * np.sin(math.pi * (times[i0:i1] - start) / (end - start))
+        floor = self.pacer_bpm + self._np_uniform.uniform(-self.pacer_jitter, self.pacer_jitter, n)
+        bpm = np.rint(np.maximum(bpm, floor)).astype(np.uint16)
+
+        watch = np.full(n, watch0, dtype=np.uint8)
+        for i, w in self._watch_changes(t0, n):
+            watch[i:] = w
+        keep = np.ones(n, dtype=bool)
+        for start, end in self._dropouts:
+            i0, i1 = self._span(t0, n, start, end)
+            keep[i0:i1] = False
+        if not keep.all():
+            times, bpm, watch = times[keep], bpm[keep], watch[keep]
+        return SampleBatch(times, bpm, watch, self.utc_offset)
+
+    def _batch_python(self, t0: float, n: int) -> SampleBatch:
+        gauss, uniform = self._noise.gauss, self._noise.uniform
+        cos, sin = math.cos, math.sin
+        dt, offset_s = self.dt, self.utc_offset * 60
+        resting, amp, peak = self.resting_bpm, self.circadian_amplitude, self.peak_hour
+        rsa, sd, phase = self.rsa_amplitude, self.hrv_sd, self._rsa_phase
+        w_day, w_rsa = _TWO_PI / 24, _TWO_PI * _RSA_HZ
+        watch0 = self.watch
+
+        times = [t0 + i * dt for i in range(n)]
+        bpm = [resting + amp * cos(w_day * (((t + offset_s) % 86400) / 3600.0 - peak))
+               + rsa * sin(w_rsa * t + phase) for t in times]
+        for start, end, amplitude in self._bursts:
+            i0, i1 = self._span(t0, n, start, end)
+            scale = math.pi / (end - start)
+            for i in range(i0, i1):
+                bpm[i] += amplitude * sin(scale * (times[i] - start))
+        # Noise and pacer floor in one pass, so draws stay in sample order
+        lo, hi = self.pacer_bpm - self.pacer_jitter, self.pacer_bpm + self.pacer_jitter
+        for i, b in enumerate(bpm):
+            b += gauss(0.0, sd)
+            bpm[i] = round(b) if b >= hi else round(max(b, uniform(lo, hi)))
+
+        watch = [watch0] * n
+        for i, w in self._watch_changes(t0, n):
+            watch[i:] = [w] * (n - i)
+        keep = None
+        for start, end in self._dropouts:
+            i0, i1 = self._span(t0, n, start, end)
+            if i0 < i1:
+                if keep is None:
+                    keep = [True] * n
+                keep[i0:i1] = [False] * (i1 - i0)
+        if keep is not None:
+            times = [v for v, k in zip(times, keep) if k]
+            bpm = [v for v, k in zip(bpm, keep) if k]
+            watch = [v for v, k in zip(watch, keep) if k]
+        return SampleBatch(array("d", times), array("H", bpm), array("B", watch), self.utc_offset)
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="Synthetic heartbeat generator throughput")
+    parser.add_argument("--seconds", type=float, default=86400 * 7, help="simulated span")
+    parser.add_argument("--rate", type=float, default=1.0, help="samples per simulated second")
+    parser.add_argument("--batch", type=int, default=65536)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--pure", action="store_true", help="force the pure-Python path")
+    args = parser.parse_args()
+
+    gen = SyntheticHeartbeat(seed=args.seed, rate_hz=args.rate, start=1_700_000_000,
+                             vectorized=False if args.pure else None)
+    total = int(args.seconds * args.rate)
+    lo, hi, paced = 0xFFFF, 0, 0
+    began = time.perf_counter()
+    while gen.generated + gen.dropped < total:
+        b = gen.batch(min(args.batch, total - gen.generated - gen.dropped))
+        if len(b):
+            lo, hi = min(lo, int(min(b.bpm))), max(hi, int(max(b.bpm)))
+    elapsed = time.perf_counter() - began
+    print(json.dumps({
+        "backend": "numpy" if gen.vectorized else "python",
+        "slots": total,
+        "samples": gen.generated,
+        "dropped": gen.dropped,
+        "min_bpm": lo,
+        "max_bpm": hi,
+        "seconds": round(elapsed, 3),
+        "samples_per_sec": round(gen.generated / elapsed),
+    }))
@@ -0,0 +1,142 @@
+"""
+MORTEM v2 — Tick Scheduler
+
+Deadlines for a periodic loop on the monotonic clock, so slow RPCs and
+wake-up latency don't push the schedule later one beat at a time.
+
+  fixed_rate   tick k is due at start + k * interval, however long each
+               tick's work took (the on-chain cadence the monitor expects)
+  fixed_delay  the next tick is due `interval` after the previous tick's
+               work finished
+
+When a fixed-rate loop falls more than an interval behind, `missed`
+decides what happens to the ticks it slept through: "skip" drops them and
+resumes on the next grid point, "catch_up" fires them back to back (at most
+max_catch_up of them).
+
+Every tick records its drift (how late it fired) and the counters are
+available from stats() for logging and metrics.
+"""
+
+import math
+import time
+
+POLICIES = ("fixed_rate", "fixed_delay")
+MISSED = ("skip", "catch_up")
+
+
+class Ticker:
+    """Monotonic deadline for the next tick of one periodic loop."""
+
+    __slots__ = ("interval", "policy", "missed", "max_catch_up", "clock", "next_due",
+                 "ticks", "skipped", "caught_up", "last_drift", "max_drift", "_drift_sum",
+                 "_behind")
+
+    def __init__(self, interval: float, policy: str = "fixed_rate", missed: str = "skip",
+                 max_catch_up: int = 10, start: float | None = None, clock=time.monotonic):
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {', '.join(POLICIES)}")
+        if missed not in MISSED:
+            raise ValueError(f"missed must be one of {', '.join(MISSED)}")
+        self.interval = float(interval)
+        self.policy = policy
+        self.missed = missed
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.next_due = clock() if start is None else start
+        self.ticks = 0
+        self.skipped = 0      # ticks dropped by the "skip" policy
+        self.caught_up = 0    # ticks fired late to catch up
+        self.last_drift = 0.0
+        self.max_drift = 0.0
+        self._drift_sum = 0.0
+        self._behind = 0      # ticks still owed under "catch_up"
+
+    def delay(self, now: float | None = None) -> float:
+        """Seconds until the next tick is due (0 if it already is)."""
+        return max(0.0, self.next_due - (self.clock() if now is None else now))
+
+    def due(self, now: float | None = None) -> bool:
+        return (self.clock() if now is None else now) >= self.next_due
+
+    def fire(self, now: float | None = None) -> float:
+        """Record a tick taken at `now` and return when the next one is due."""
+        now = self.clock() if now is None else now
+        drift = max(0.0, now - self.next_due)
+        self.ticks += 1
+        self.last_drift = drift
+        self._drift_sum += drift
+        if drift > self.max_drift:
+            self.max_drift = drift
+
+        if self.policy == "fixed_delay":
+            # done() re-anchors once the work finishes; until then, one interval from now
+            self.next_due = now + self.interval
+            return self.next_due
+
+        if self._behind:
+            self._behind -= 1
+            self.caught_up += 1
+        self.next_due += self.interval
+        if self.next_due <= now:
+            behind = math.floor((now - self.next_due) / self.interval) + 1
+            if self.missed == "catch_up" and not self._behind:
+                owed = min(behind, self.max_catch_up)
+                self._behind = owed
+                self.skipped += behind - owed
+                self.next_due += (behind - owed) * self.interval
+            elif self.missed == "skip":
+                self.skipped += behind
+                self.next_due += behind * self.interval
+        return self.next_due
+
+    def done(self, now: float | None = None) -> float:
+        """Mark the current tick's work finished; re-anchors fixed_delay schedules."""
+        if self.policy == "fixed_delay":
+            self.next_due = (self.clock() if now is None else now) + self.interval
+        return self.next_due
+
+    def reset(self, now: float | None = None):
+        """Restart the schedule at `now` (e.g. after a pause), forgetting owed ticks."""
+        self.next_due = self.clock() if now is None else now
+        self._behind = 0
+
+    def set_interval(self, interval: float, now: float | None = None):
+        """Change the period (e.g. on config reload), starting with the pending tick.
+
+        The pending tick moves to one new interval after the previous tick,
+        but never into the past, so a shorter interval doesn't show up as
+        drift or skipped ticks.
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        now = self.clock() if now is None else now
+        if self.ticks:
+            self.next_due = max(now, self.next_due - self.interval + interval)
+        self.interval = float(interval)
+
+    def wait(self, sleep=time.sleep) -> bool:
+        """Sleep until the next tick is due and fire it.
+
+        `sleep(seconds)` may return early (e.g. threading.Event.wait on
+        shutdown); the tick is then not fired and False is returned.
+        """
+        delay = self.delay()
+        if delay > 0:
+            sleep(delay)
+            if not self.due():
+                return False
+        self.fire()
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "ticks": self.ticks,
+            "skipped": self.skipped,
+            "caught_up": self.caught_up,
+            "last_drift_ms": round(self.last_drift * 1000, 3),
+            "max_drift_ms": round(self.max_drift * 1000, 3),
+            "mean_drift_ms": round(self._drift_sum / self.ticks * 1000, 3) if self.ticks else 0.0,
+        }
@@ -0,0 +1,231 @@
+"""
+MORTEM v2 — Tracing
+
+One span tree per beat, from sample arrival to the witness entry that
+consumed it, written as JSON lines to a local rotating file.
+
+  receive        the HealthKit POST that delivered the sample (its own
+                 trace, continued from an incoming `traceparent` header)
+  beat           root of one beat, continuing the receive trace
+    get_bpm      reading the freshest sample
+    send         the memo transaction: build, blockhash, sign,
+                 send_transaction
+    art          rendering the ASCII art, when due
+    checkpoint   persisting the stream state
+  witness        the witness entry for that beat, in the witness's own
+                 file, joined by the trace id carried in the memo
+
+The context travels as "<trace id>-<span id>": in the receiver's feed,
+on the Reading, and in the heartbeat memo's "trace" field.
+
+Spans are queued and written by a listener thread, like log records, so
+ending a span never touches the disk on the beat path. With tracing off
+(the default) every span is NULL_SPAN and costs a function call.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+from logging.handlers import QueueListener, RotatingFileHandler
+from pathlib import Path
+from queue import SimpleQueue
+
+from mortem_common.logsetup import gzip_rotator
+
+_current: contextvars.ContextVar = contextvars.ContextVar("mortem_span", default=None)
+
+
+def _new_id(n: int) -> str:
+    # os.urandom, not random: seeded simulations must stay reproducible
+    return os.urandom(n).hex()
+
+
+def parse_context(value: str | None) -> tuple[str, str] | None:
+    """(trace id, span id) from "<trace>-<span>" or a W3C traceparent, else None."""
+    if not value or not isinstance(value, str):
+        return None
+    parts = value.strip().split("-")
+    if len(parts) == 4:  # version-trace-span-flags
+        parts = parts[1:3]
+    if len(parts) != 2 or not all(parts):
+        return None
+    try:
+        int(parts[0], 16), int(parts[1], 16)
+    except ValueError:
+        return None
+    return parts[0].lower(), parts[1].lower()
+
+
+class _NullSpan:
+    """Stands in for a span when tracing is off; every call is a no-op."""
+
+    context = None
+    trace_id = None
+
+    def child(self, name: str, start: float | None = None, **attrs):
+        return self
+
+    def set(self, **attrs):
+        return self
+
+    def end(self, end: float | None = None):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __bool__(self):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """One timed operation. Used as a context manager it is also the current span."""
+
+    __slots__ = ("tracer", "name", "trace_id", "span_id", "parent_id",
+                 "start", "attrs", "_ended", "_token")
+
+    def __init__(self, tracer: "Tracer", name: str, trace_id: str, parent_id: str | None = None,
+                 start: float | None = None, attrs: dict | None = None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.start = time.time() if start is None else start
+        self.attrs = attrs or {}
+        self._ended = False
+        self._token = None
+
+    @property
+    def context(self) -> str:
+        """This span as a parent reference for another process: "<trace>-<span>"."""
+        return f"{self.trace_id}-{self.span_id}"
+
+    def child(self, name: str, start: float | None = None, **attrs) -> "Span":
+        return Span(self.tracer, name, self.trace_id, self.span_id, start, attrs)
+
+    def set(self, **attrs) -> "Span":
+        self.attrs.update(attrs)
+        return self
+
+    def end(self, end: float | None = None):
+        """Record the span (once)."""
+        if self._ended:
+            return
+        self._ended = True
+        self.tracer._emit(self, (time.time() if end is None else end) - self.start)
+
+    def __enter__(self):
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _current.reset(self._token)
+        if exc_type is not None:
+            self.attrs["error"] = f"{exc_type.__name__}: {exc}"
+        self.end()
+        return False
+
+
+class Tracer:
+    """Creates root spans and writes finished spans to a rotating JSONL file."""
+
+    def __init__(self):
+        self.service = ""
+        self.enabled = False
+        self._queue: SimpleQueue | None = None
+        self._listener: QueueListener | None = None
+        self._atexit = False
+
+    def configure(self, path: Path | str | None, service: str, max_bytes: int = 10 * 2**20,
+                  backups: int = 5, compress: bool = True):
+        """Start writing spans to `path`; a falsy path turns tracing off."""
+        self.close()
+        self.service = service
+        if not path:
+            return
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+        if compress:
+            handler.namer = lambda name: name + ".gz"
+            handler.rotator = gzip_rotator
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._queue = SimpleQueue()
+        self._listener = QueueListener(self._queue, handler)
+        self._listener.start()
+        self.enabled = True
+        if not self._atexit:
+            atexit.register(self.close)
+            self._atexit = True
+
+    def close(self):
+        """Flush queued spans and close the file."""
+        self.enabled = False
+        listener, self._listener = self._listener, None
+        if listener:
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+
+    def trace(self, name: str, parent: str | None = None, start: float | None = None, **attrs):
+        """A root span for this process, continuing `parent` ("<trace>-<span>") if given."""
+        if not self.enabled:
+            return NULL_SPAN
+        ids = parse_context(parent)
+        if ids:
+            return Span(self, name, ids[0], ids[1], start, attrs)
+        return Span(self, name, _new_id(16), None, start, attrs)
+
+    def _emit(self, span: Span, duration: float):
+        if not self.enabled:
+            return
+        record = {
+            "service": self.service,
+            "trace": span.trace_id,
+            "span": span.span_id,
+            "parent": span.parent_id,
+            "name": span.name,
+            "start": round(span.start, 6),
+            "ms": round(duration * 1000, 3),
+        }
+        if span.attrs:
+            record["attrs"] = span.attrs
+        line = json.dumps(record, separators=(",", ":"), default=str)
+        self._queue.put_nowait(logging.makeLogRecord({"msg": line, "levelno": logging.INFO}))
+
+
+TRACER = Tracer()
+
+
+def current():
+    """The span active in this thread or task, or NULL_SPAN."""
+    return _current.get() or NULL_SPAN
+
+
+def span(name: str, **attrs):
+    """A child of the current span (NULL_SPAN if there is none). Use with `with`."""
+    return current().child(name, **attrs)
+
+
+@contextmanager
+def use(span):
+    """Make `span` current for the block without ending it (e.g. on a worker thread)."""
+    if not span:
+        yield span
+        return
+    token = _current.set(span)
+    try:
+        yield span
+    finally:
+        _current.reset(token)
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+MORTEM v2 — Startup Benchmark
+
+How long a restart keeps the stream dark, measured against a budget:
+
+  heartbeat_import_ms      importing heartbeat_stream in a fresh interpreter
+  witness_import_ms        importing mortem_witness in a fresh interpreter
+  heartbeat_first_beat_ms  launch of heartbeat_stream.py to its first beat's
+                           transaction (interpreter, imports, wallet, first
+                           send)
+
+Each figure is the median of --runs fresh processes. It exits 1 when any
+median is over its budget, so it can gate a change or be run on a schedule
+and tracked. The heaviest top-level imports are listed to show where
+import time goes.
+
+The first-beat run starts the stream with the mock source, a throwaway
+wallet and no checkpoint against a local stand-in JSON-RPC endpoint
+(getBalance, getLatestBlockhash, sendTransaction, requestAirdrop), so it
+times the process rather than devnet. --rpc points it at a real endpoint.
+The witness isn't started: its state file is fixed next to the script and
+a benchmark run must not overwrite it.
+
+Run: python ops/bench_startup.py
+     python ops/bench_startup.py --runs 10 --python heartbeat-stream/.venv/bin/python --json
+     python ops/bench_startup.py --budget heartbeat_first_beat_ms=1000
+"""
+
+import argparse
+import json
+import os
+import re
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+BASE_DIR = Path(__file__).parent.parent
+HEARTBEAT_DIR = BASE_DIR / "heartbeat-stream"
+WITNESS_DIR = BASE_DIR / "mortem-witness"
+
+# Median milliseconds; raise them deliberately, not to make a run pass
+BUDGETS_MS = {
+    "heartbeat_import_ms": 600,
+    "witness_import_ms": 600,
+    "heartbeat_first_beat_ms": 1500,
+}
+
+# Well-formed base58 values for the stand-in RPC's answers
+BLOCKHASH = "EkSnNWid2cvwEVnVx9aBqawnmiCNiDgp3gUdkDPTKN1N"
+SIGNATURE = "5VERv8NMvzbJMEkV8xnrLkEaWRtSz9CosKDYjCJjBRnbJLgp8uirBgmQpjKhoR4tjF3ZpRzrFmBV6UjKdiSZkQUW"
+
+IMPORT_CODE = """
+import time
+t = time.perf_counter()
+import {module}
+print(time.perf_counter() - t)
+"""
+
+# Runs the real main() with the benchmark's config instead of config.yaml
+FIRST_BEAT_CODE = """
+import json, sys
+import heartbeat_stream
+heartbeat_stream.load_config = lambda: json.loads(sys.argv[1])
+heartbeat_stream.main()
+"""
+
+FIRST_BEAT = re.compile(r"Beat #1: .*\| TX( FAILED|:)")
+
+
+def _rpc_server() -> ThreadingHTTPServer:
+    """Local JSON-RPC endpoint answering the calls a stream makes up to its first beat."""
+    results = {
+        "getBalance": {"context": {"slot": 1}, "value": 5_000_000_000},
+        "getLatestBlockhash": {"context": {"slot": 1},
+                               "value": {"blockhash": BLOCKHASH, "lastValidBlockHeight": 1000}},
+        "sendTransaction": SIGNATURE,
+        "requestAirdrop": SIGNATURE,
+    }
+
+    def answer(call: dict) -> dict:
+        method = call.get("method")
+        if method in results:
+            return {"jsonrpc": "2.0", "result": results[method], "id": call.get("id")}
+        return {"jsonrpc": "2.0", "error": {"code": -32601, "message": f"Method not found: {method}"},
+                "id": call.get("id")}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            calls = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            out = [answer(c) for c in calls] if isinstance(calls, list) else answer(calls)
+            body = json.dumps(out).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="rpc", daemon=True).start()
+    return server
+
+
+def _env(tmp: Path) -> dict:
+    # Keep the services' logs out of the real log files
+    return {**os.environ, "MORTEM_LOG_FILE": str(tmp / "bench.log"), "MORTEM_PROFILE": ""}
+
+
+def measure_import(python: str, service_dir: Path, module: str, tmp: Path) -> float:
+    """Seconds to import `module` in a fresh interpreter."""
+    out = subprocess.run([python, "-c", IMPORT_CODE.format(module=module)], cwd=service_dir,
+                         env=_env(tmp), capture_output=True, text=True, timeout=120)
+    if out.returncode:
+        raise RuntimeError(f"import {module} failed:\n{out.stderr.strip()}")
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def heaviest_imports(python: str, service_dir: Path, module: str, tmp: Path, top: int = 5) -> list:
+    """The top-level imports with the largest cumulative time (-X importtime), in ms."""
+    out = subprocess.run([python, "-X", "importtime", "-c", f"import {module}"], cwd=service_dir,
+                         env=_env(tmp), capture_output=True, text=True, timeout=120)
+    rows = []
+    for line in out.stderr.splitlines():
+        parts = line.split("|")
+        if not line.startswith("import time:") or len(parts) != 3 or "cumulative" in line:
+            continue
+        name = parts[2]
+        # Direct imports of the measured module (one level of indent below it)
+        if len(name) - len(name.lstrip()) == 3:
+            rows.append((round(int(parts[1]) / 1000, 1), name.strip()))
+    return [{"module": name, "ms": ms} for ms, name in sorted(rows, reverse=True)[:top]]
+
+
+def measure_first_beat(python: str, rpc_url: str, tmp: Path, timeout: float) -> tuple[float, bool]:
+    """Seconds from launching the stream to its first beat, and whether that beat's send succeeded."""
+    config = {
+        "data_source": "mock",
+        "heartbeat_interval_seconds": 60,
+        "rpc_endpoint": rpc_url,
+        "wallet_path": str(tmp / "wallet.json"),
+        "art_output_dir": str(tmp / "art"),
+        "checkpoint_path": "",
+        "dashboard": "off",
+    }
+    began = time.perf_counter()
+    proc = subprocess.Popen([python, "-c", FIRST_BEAT_CODE, json.dumps(config)], cwd=HEARTBEAT_DIR,
+                            env=_env(tmp), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    timer = threading.Timer(timeout, proc.kill)
+    timer.start()
+    try:
+        for line in proc.stdout:
+            match = FIRST_BEAT.search(line)
+            if match:
+                return time.perf_counter() - began, match.group(1) == ":"
+        raise RuntimeError(f"no first beat within {timeout:.0f}s (exit {proc.wait()})")
+    finally:
+        timer.cancel()
+        if proc.poll() is None:
+            proc.send_signal(signal.SIGINT)
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        proc.stdout.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure MORTEM service startup against a budget")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per measurement (median)")
+    parser.add_argument("--python", default=sys.executable, help="interpreter to run the services with")
+    parser.add_argument("--rpc", help="RPC endpoint for the first-beat run (default: local stand-in)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for the first beat")
+    parser.add_argument("--budget", action="append", default=[], metavar="NAME=MS",
+                        help=f"override a budget ({', '.join(BUDGETS_MS)})")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    budgets = dict(BUDGETS_MS)
+    for item in args.budget:
+        name, _, ms = item.partition("=")
+        if name not in budgets:
+            parser.error(f"unknown budget {name!r}")
+        budgets[name] = float(ms)
+
+    server = None if args.rpc else _rpc_server()
+    rpc_url = args.rpc or f"http://127.0.0.1:{server.server_address[1]}"
+    samples = {name: [] for name in budgets}
+    sends_ok = 0
+    try:
+        with tempfile.TemporaryDirectory(prefix="mortem-bench-") as tmp:
+            tmp = Path(tmp)
+            for _ in range(args.runs):
+                samples["heartbeat_import_ms"].append(measure_import(args.python, HEARTBEAT_DIR, "heartbeat_stream", tmp))
+                samples["witness_import_ms"].append(measure_import(args.python, WITNESS_DIR, "mortem_witness", tmp))
+                elapsed, ok = measure_first_beat(args.python, rpc_url, tmp, args.timeout)
+                samples["heartbeat_first_beat_ms"].append(elapsed)
+                sends_ok += ok
+            heaviest = {
+                "heartbeat_stream": heaviest_imports(args.python, HEARTBEAT_DIR, "heartbeat_stream", tmp),
+                "mortem_witness": heaviest_imports(args.python, WITNESS_DIR, "mortem_witness", tmp),
+            }
+    finally:
+        if server:
+            server.shutdown()
+
+    results = {}
+    for name, values in samples.items():
+        median = round(statistics.median(values) * 1000, 1)
+        results[name] = {"median": median, "max": round(max(values) * 1000, 1), "budget": budgets[name],
+                         "ok": median <= budgets[name]}
+    report = {"runs": args.runs, "python": args.python, "rpc": args.rpc or "local stand-in",
+              "first_beat_sends_ok": sends_ok, "results": results, "heaviest_imports": heaviest}
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'measurement':<26}{'median':>10}{'max':>10}{'budget':>10}")
+        for name, r in results.items():
+            print(f"{name:<26}{r['median']:>10.1f}{r['max']:>10.1f}{r['budget']:>10.0f}"
+                  f"  {'ok' if r['ok'] else 'OVER BUDGET'}")
+        print(f"first beats sent: {sends_ok}/{args.runs}")
+        for module, rows in heaviest.items():
+            print(f"heaviest imports in {module}: "
+                  + ", ".join(f"{row['module']} {row['ms']}ms" for row in rows))
+    sys.exit(0 if all(r["ok"] for r in results.values()) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,13 +9,17 @@ LOG="$BASE_DIR/logs/heartbeat.log"
 CRASH_LOG="$BASE_DIR/logs/crashes.log"
 RESTART_WAIT=10
 
+# The service writes (and rotates) $LOG itself through its queued logger
+export MORTEM_LOG_FILE="$LOG"
+
 echo "[$(date '+%Y-%m-%d %H:%M:%S')] [HEARTBEAT] [START] Wrapper starting" | tee -a "$LOG"
 
 while true; do
     echo "[$(date '+%Y-%m-%d %H:%M:%S')] [HEARTBEAT] [RUN] Starting heartbeat_stream.py" | tee -a "$LOG"
 
     cd "$SERVICE_DIR"
-    "$VENV" heartbeat_stream.py 2>&1 | tee -a "$LOG"
+    # stdout stays on the console; stderr (tracebacks) also goes to the crash log
+    "$VENV" heartbeat_stream.py 2> >(tee -a "$CRASH_LOG" >&2)
 
     EXIT_CODE=$?
     TIMESTAMP=$(date '+%Y-%m-%d %H:%M:%S')